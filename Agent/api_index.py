@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+api_index.py
+API Index - Serialized index of the OpenROAD Python API
+
+The index lists the classes and functions of the openroad and odb modules,
+the arity of each method, the return types the validator uses to follow
+values from one call to the next, and the Tcl commands evalTclString
+accepts. It is stored as JSON next to this file and loaded once per
+process.
+
+    python api_index.py build     # merge in what the installed openroad/odb expose
+    python api_index.py show      # counts of what the index holds
+"""
+import importlib
+import inspect
+import json
+import sys
+from functools import lru_cache
+from pathlib import Path
+
+DEFAULT_INDEX_PATH = Path(__file__).with_name("openroad_api_index.json")
+
+
+class ApiIndex:
+    """Read-only view of an index file"""
+
+    def __init__(self, data):
+        self.data = data
+        self.classes = data['classes']
+        self.conventions = data.get('conventions', {})
+        self.invalid = data.get('invalid', {})
+        self.tcl_commands = frozenset(data.get('tcl_commands', ()))
+        # module -> {name: 'class' | function entry}
+        self.modules = {}
+        for module, entries in data['modules'].items():
+            names = {name: 'class' for name in entries.get('classes', ())}
+            names.update(entries.get('functions', {}))
+            self.modules[module] = names
+
+    def method(self, class_name, method_name):
+        """Method entry ({'args': [min, max], 'returns': ...}) or None"""
+        entry = self.classes.get(class_name)
+        return entry['methods'].get(method_name) if entry else None
+
+    def methods(self, class_name):
+        return self.classes.get(class_name, {}).get('methods', {})
+
+    def constructor(self, class_name):
+        """[min, max] constructor arguments, or None when it is not constructed directly"""
+        return self.classes.get(class_name, {}).get('init')
+
+    def stats(self):
+        return {
+            'modules': len(self.modules),
+            'classes': len(self.classes),
+            'methods': sum(len(entry['methods']) for entry in self.classes.values()),
+            'tcl_commands': len(self.tcl_commands)
+        }
+
+
+@lru_cache(maxsize=None)
+def load_index(path=None):
+    """
+    Load an index file; each path is read once per process.
+
+    Args:
+        path: Index JSON (default: openroad_api_index.json next to this file)
+
+    Returns:
+        ApiIndex
+    """
+    with open(path or DEFAULT_INDEX_PATH) as f:
+        return ApiIndex(json.load(f))
+
+
+def _arity(function):
+    """[min, max] positional arguments without self, or None when unknown (e.g. SWIG wrappers)"""
+    try:
+        signature = inspect.signature(function)
+    except (TypeError, ValueError):
+        return None
+    params = [p for p in signature.parameters.values() if p.name != 'self']
+    if any(p.kind == p.VAR_POSITIONAL for p in params):
+        return [sum(1 for p in params if p.default is p.empty and p.kind == p.POSITIONAL_OR_KEYWORD), None]
+    positional = [p for p in params if p.kind in (p.POSITIONAL_ONLY, p.POSITIONAL_OR_KEYWORD)]
+    return [sum(1 for p in positional if p.default is p.empty), len(positional)]
+
+
+def build_index(data, modules=("openroad", "odb")):
+    """
+    Add what the installed modules expose to an index.
+
+    Curated entries win: they keep their arity and return types. New
+    classes and methods are added with the arity inspect can read, or any
+    arity when it cannot.
+
+    Returns:
+        dict: The updated index data
+    """
+    for module_name in modules:
+        try:
+            module = importlib.import_module(module_name)
+        except ImportError as e:
+            print(f"Skipping {module_name}: {e}")
+            continue
+
+        entries = data['modules'].setdefault(module_name, {'classes': [], 'functions': {}})
+        for name, obj in vars(module).items():
+            if name.startswith('_'):
+                continue
+            if inspect.isclass(obj):
+                if name not in entries['classes']:
+                    entries['classes'].append(name)
+                methods = data['classes'].setdefault(name, {'methods': {}})['methods']
+                for method_name, method in vars(obj).items():
+                    if not method_name.startswith('_') and callable(method) and method_name not in methods:
+                        methods[method_name] = {'args': _arity(method) or [0, None]}
+            elif callable(obj) and name not in entries['functions']:
+                entries['functions'][name] = {'args': _arity(obj) or [0, None]}
+    return data
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "show"
+    if command == "build":
+        with open(DEFAULT_INDEX_PATH) as f:
+            data = json.load(f)
+        build_index(data)
+        with open(DEFAULT_INDEX_PATH, 'w') as f:
+            json.dump(data, f, indent=2)
+        print(f"Wrote {DEFAULT_INDEX_PATH}")
+    print(json.dumps(load_index().stats()))
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+async_executor.py
+Async Executor - Runs OpenROAD scripts from an event loop with live output
+
+Output is read as it is produced and handed line by line to optional
+callbacks; only the last buffer_lines lines of each stream are kept, so a
+multi-gigabyte detailed-routing log never sits in memory. Runs can be
+cancelled at any time. On timeout or cancellation the process group gets
+SIGTERM, then SIGKILL if it has not exited after grace_seconds.
+"""
+import asyncio
+import inspect
+import os
+import signal
+import sys
+import tempfile
+import time
+from collections import deque
+from pathlib import Path
+
+READ_CHUNK = 64 * 1024
+# A "line" longer than this is delivered in pieces
+MAX_LINE_BYTES = 64 * 1024
+
+
+class OutputBuffer:
+    """Bounded tail of one output stream"""
+
+    def __init__(self, max_lines):
+        self.lines = deque(maxlen=max_lines)
+        self.total_lines = 0
+        self.total_bytes = 0
+
+    def append(self, line):
+        self.lines.append(line)
+        self.total_lines += 1
+        self.total_bytes += len(line)
+
+    @property
+    def dropped_lines(self):
+        return self.total_lines - len(self.lines)
+
+    def text(self):
+        return "".join(self.lines)
+
+
+async def _call(callback, *args):
+    if callback is not None:
+        result = callback(*args)
+        if inspect.isawaitable(result):
+            await result
+
+
+class AsyncExecutor:
+    """Concurrent, streaming, cancellable script execution"""
+
+    def __init__(self, working_dir=".", python=None, buffer_lines=2000, grace_seconds=5.0, max_concurrency=4):
+        """
+        Args:
+            working_dir: Directory scripts run in
+            python: Interpreter to run scripts with (default: this one)
+            buffer_lines: Lines of stdout/stderr kept per execution
+            grace_seconds: Wait between SIGTERM and SIGKILL
+            max_concurrency: Executions allowed to run at the same time
+        """
+        self.working_dir = Path(working_dir)
+        self.working_dir.mkdir(parents=True, exist_ok=True)
+        self.python = python or sys.executable
+        self.buffer_lines = buffer_lines
+        self.grace_seconds = grace_seconds
+        self.max_concurrency = max_concurrency
+        self._semaphores = {}
+
+    def _limit(self):
+        # One semaphore per event loop; asyncio primitives cannot be shared between loops
+        loop = asyncio.get_running_loop()
+        if loop not in self._semaphores:
+            self._semaphores = {loop: asyncio.Semaphore(self.max_concurrency)}
+        return self._semaphores[loop]
+
+    async def execute(self, code, timeout=30, on_stdout=None, on_stderr=None, cancel_event=None):
+        """
+        Run one script, streaming its output.
+
+        Args:
+            code: Python source
+            timeout: Seconds before the script is stopped
+            on_stdout: Called with each stdout line (sync or async)
+            on_stderr: Called with each stderr line (sync or async)
+            cancel_event: asyncio.Event; setting it stops the script
+
+        Returns:
+            dict: success, stdout, stderr (buffered tails), exitcode,
+                  seconds, line counts, and 'error' on timeout/cancel
+        """
+        async with self._limit():
+            return await self._execute(code, timeout, on_stdout, on_stderr, cancel_event)
+
+    async def run_many(self, codes, timeout=30, on_line=None):
+        """
+        Run several scripts concurrently (max_concurrency at a time).
+
+        Args:
+            codes: Python sources
+            timeout: Per-script timeout
+            on_line: Called with (index, stream name, line)
+
+        Returns:
+            list: Result dicts in the order of codes
+        """
+        def bind(index, stream):
+            if on_line is None:
+                return None
+            return lambda line: on_line(index, stream, line)
+
+        return await asyncio.gather(*(
+            self.execute(code, timeout, bind(index, 'stdout'), bind(index, 'stderr'))
+            for index, code in enumerate(codes)
+        ))
+
+    async def _execute(self, code, timeout, on_stdout, on_stderr, cancel_event):
+        with tempfile.NamedTemporaryFile(mode='w', suffix='.py', dir=self.working_dir, delete=False) as f:
+            f.write(code)
+            script = Path(f.name)
+
+        stdout, stderr = OutputBuffer(self.buffer_lines), OutputBuffer(self.buffer_lines)
+        start = time.perf_counter()
+        error = None
+        process = finished = cancelled = None
+        try:
+            process = await asyncio.create_subprocess_exec(
+                self.python, str(script),
+                cwd=self.working_dir,
+                stdin=asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                # Own process group, so OpenROAD's child processes are stopped too
+                start_new_session=True
+            )
+            pumps = asyncio.gather(
+                self._pump(process.stdout, stdout, on_stdout),
+                self._pump(process.stderr, stderr, on_stderr)
+            )
+            finished = asyncio.ensure_future(self._finish(process, pumps))
+
+            waiters = {finished}
+            if cancel_event is not None:
+                cancelled = asyncio.ensure_future(cancel_event.wait())
+                waiters.add(cancelled)
+
+            done, _ = await asyncio.wait(waiters, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            if cancelled is not None and not cancelled.done():
+                cancelled.cancel()
+
+            if finished not in done:
+                error = ('Execution cancelled' if cancelled in done
+                         else f'Execution timeout after {timeout}s')
+                await self._stop(process)
+                await finished
+        except asyncio.CancelledError:
+            if process is not None:
+                await asyncio.shield(self._stop(process))
+            # Stop the output readers and the cancel waiter instead of leaving them pending
+            tasks = [task for task in (finished, cancelled) if task is not None]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        finally:
+            script.unlink(missing_ok=True)
+
+        result = {
+            'success': error is None and process.returncode == 0,
+            'stdout': stdout.text(),
+            'stderr': stderr.text(),
+            'exitcode': process.returncode,
+            'seconds': time.perf_counter() - start,
+            'stdout_lines': stdout.total_lines,
+            'stderr_lines': stderr.total_lines,
+            'dropped_lines': stdout.dropped_lines + stderr.dropped_lines
+        }
+        if error:
+            result['error'] = error
+        return result
+
+    async def _finish(self, process, pumps):
+        await pumps
+        return await process.wait()
+
+    async def _pump(self, stream, buffer, callback):
+        """Split a stream into lines as chunks arrive"""
+        partial = b""
+        while True:
+            chunk = await stream.read(READ_CHUNK)
+            if not chunk:
+                break
+            partial += chunk
+            *lines, partial = partial.split(b"\n")
+            if len(partial) > MAX_LINE_BYTES:
+                lines.append(partial)
+                partial = b""
+            for line in lines:
+                await self._emit(line + b"\n", buffer, callback)
+        if partial:
+            await self._emit(partial, buffer, callback)
+
+    async def _emit(self, raw, buffer, callback):
+        line = raw.decode(errors='replace')
+        buffer.append(line)
+        await _call(callback, line.rstrip("\n"))
+
+    async def _stop(self, process):
+        """SIGTERM the process group, then SIGKILL after the grace period"""
+        if process.returncode is not None:
+            return
+        for sig, wait in ((signal.SIGTERM, self.grace_seconds), (signal.SIGKILL, None)):
+            try:
+                os.killpg(process.pid, sig)
+            except ProcessLookupError:
+                return
+            try:
+                await asyncio.wait_for(process.wait(), wait)
+                return
+            except asyncio.TimeoutError:
+                continue
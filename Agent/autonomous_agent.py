@@ -1,9 +1,9 @@
 
-import torch
-from transformers import AutoModelForCausalLM,AutoTokenizer
-from peft import PeftModel
 import json
 import os
+import sys
+import threading
+import time
 
 from memory_store import MemoryStore
 from executor import Executor
@@ -12,36 +12,100 @@ from corrector import CodeCorrector
 from planner import PlannerAgent
 from metrics_parser import MetricsParser
 from decision_engine import DecisionEngine
+from scheduler import DagScheduler, step_dependencies, unique_step_ids
+from checkpoint_store import CheckpointStore
+from state_summary import StateSummarizer
+from tracing import Tracer
+from explorer import Explorer, sample_candidates, knob_description, format_table
+from generation_cache import GenerationCache
+from backends import HFBackend, CachedBackend, TemplateBackend
+
+CODE_PROMPT_PREFIX="<s>[INST] Write OpenROAD Python code to:"
+# 'stop':'code' ends generation as soon as the script's code block is closed
+CODE_GENERATION_PARAMS={'max_new_tokens':200,'temperature':0.7,'top_p':0.9,'stop':'code'}
+# Steps that read the design without changing it; they can run on a copy loaded from a checkpoint
+ANALYSIS_ACTIONS=('timing_report','congestion_report','drc_check')
 
 class AutonomousFlowAgent:
 
-    def __init__(self,base_model_path,adapter_path):
-        self.tokenizer=AutoTokenizer.from_pretrained(
-            base_model_path,
-            local_files_only=False,
-            use_fast=False
-        )
+    def __init__(self,base_model_path=None,adapter_path=None,backend=None,generation_batch_size=8,
+                 use_prefix_cache=True,cache_dir=".generation_cache",merged_path=None,constrained_planning=False,
+                 max_parallel_steps=4,checkpoint_dir=".checkpoints",memory_dir=".memory",state_token_budget=256,
+                 retrieval_dir=".retrieval",direct_threshold=0.85,fewshot_threshold=0.4,direct_min_terms=3,
+                 trace=False):
+        """
+        The model is not loaded here: the default HFBackend loads it on the
+        first generation that misses the cache. Pass backend= (e.g. a
+        TemplateBackend) to run without a model at all, or merged_path= to
+        use a merged/quantized artifact from merge_model.py.
 
-        self.tokenizer.pad_token=self.tokenizer.eos_token
-        base=AutoModelForCausalLM.from_pretrained(
-            base_model_path,
-            torch_dtype=torch.float16,
-            local_files_only=False).to("mps" if torch.backends.mps.is_available() else "cpu")
-        
+        Independent plan steps (see "depends_on") run concurrently, at most
+        max_parallel_steps at a time. Steps that change the design take
+        turns on one warm executor worker, which holds the flow's design.
+        With checkpoints on, analysis steps (ANALYSIS_ACTIONS) run on
+        separate workers that load the checkpointed design they depend on,
+        so reports overlap each other and the next design step. Mock steps
+        never wait for a worker.
+        Successful stages are checkpointed in checkpoint_dir (None disables
+        it), so a replanned flow only reruns stages whose inputs changed.
+        Executions and conversations are appended to memory_dir as they
+        happen (a directory of JSONL segments, or a .db file for SQLite;
+        None keeps them in memory only). The planner sees the state as a
+        summary of at most state_token_budget tokens.
+
+        When retrieval_dir holds an index built by retrieval.py, step code
+        is looked up in the corpus first: matches with confidence of at
+        least direct_threshold that share at least direct_min_terms words
+        with the description return the corpus script without generating,
+        matches above fewshot_threshold are added to the prompt as examples.
 
-        self.model=PeftModel.from_pretrained(  base, adapter_path, is_trainable=False,   local_files_only=True)
-        self.model.eval()
+        With trace=True every stage is timed as a span (see tracing.py),
+        nested per iteration and per step, and logged to memory; export
+        them with self.tracer.write_chrome_trace() or tracer.percentiles().
+        """
+        if backend is None:
+            backend=HFBackend(base_model_path,adapter_path,use_prefix_cache=use_prefix_cache,merged_path=merged_path)
+        if cache_dir:
+            backend=CachedBackend(backend,GenerationCache(cache_dir,merged_path or adapter_path,
+                                                          backend_id=backend.cache_identity()))
+        self.backend=backend
+        self.generation_batch_size=generation_batch_size
 
-        self.memory=MemoryStore()
-        self.executor=Executor()
+        self.memory=MemoryStore(memory_dir)
+        self.tracer=Tracer(trace,sink=self.memory.log_span)
+        self.state_summary=StateSummarizer(state_token_budget,self.backend.count_tokens)
+        # One worker, never recycled: every step must see the design earlier steps loaded
+        self.executor=Executor(pool_size=1,max_jobs_per_worker=None)
+        self.max_parallel_steps=max_parallel_steps
+        self.scheduler=DagScheduler(max_parallel_steps)
+        self.checkpoints=CheckpointStore(checkpoint_dir,self.executor.working_dir) if checkpoint_dir else None
+        # Held around artifact snapshots, diffs and restores only
+        self._stage_lock=threading.Lock()
+        # Held while a step's scripts run on the design worker, so its state DB is that step's design
+        self._design_lock=threading.Lock()
+        self._analysis_executor=None
+        self._analysis_lock=threading.Lock()
+        self._dependencies={}
+        self._restored_states={}
+        self._loaded_states=set()
+        self._step_states={}
         self.validator=CodeValidator()
         self.corrector=CodeCorrector()
-        self.planner=PlannerAgent(self.model,self.tokenizer)
+        self.planner=PlannerAgent(self.backend,constrained=constrained_planning)
         self.parser=MetricsParser()
         self.decision_engine=DecisionEngine()
 
+        self.retrieval=None
+        if retrieval_dir and os.path.exists(os.path.join(retrieval_dir,"meta.json")):
+            from retrieval import RetrievalIndex
+            self.retrieval=RetrievalIndex(retrieval_dir)
+        self.direct_threshold=direct_threshold
+        self.fewshot_threshold=fewshot_threshold
+        self.direct_min_terms=direct_min_terms
+        self.retrieval_stats={'direct':0,'fewshot':0,'miss':0}
+
     
-    def run_autonomous_flow(self,user_goal,max_iterations=3,use_mock=True):
+    def run_autonomous_flow(self,user_goal,max_iterations=3,use_mock=True,batch_generation=True):
 
         print(f"\n{'='*70}")
         print("STARTING AUTONOMOUS FLOW")
@@ -49,9 +113,11 @@ class AutonomousFlowAgent:
         print(f"Goal: {user_goal}")
         print(f"Max iterations: {max_iterations}")
         print(f"Mode: {'MOCK' if use_mock else 'REAL'}")
+        print(f"Generation: {'BATCHED' if batch_generation else 'SEQUENTIAL'}")
 
         iteration=0
         final_decision=None
+        schedule=None
 
         while iteration< max_iterations:
             iteration+=1
@@ -59,41 +125,57 @@ class AutonomousFlowAgent:
             print(f"\n{'='*70}")
             print(f"ITERATION {iteration}/{max_iterations}")
             print(f"{'='*70}")
-            
-            #Step1: Plan
-            plan=self.planner.create_plan(user_goal,self.memory.state)
-            self.memory.store('plan',plan)
-            
-            #Step2: Execute each step
-            for step in plan.get('steps',[]):
-                print(f"\n[Step {step['step']}] {step['description']}")
-                
-                code=self._generate_code(step['description'])
-                is_valid,errors,warnings=self.validator.validate(code)
 
-                if not is_valid:
-                    print(f"Validation failed:{errors}")
+            with self.tracer.span('iteration',iteration=iteration) as iteration_span:
+                # Fixes that made earlier runs of a step succeed become correction rules
+                learned=self.corrector.learn_from_memory(self.memory)
+                if learned:
+                    print(f"Learned {len(learned)} correction rules: {', '.join(learned)}")
 
-                    code,fixes=self.corrector.auto_correct(code)
-                    print(f" Applied {len(fixes)} corrections")
+                #Step1: Plan
+                with self.tracer.span('plan') as span:
+                    plan=self.planner.create_plan(user_goal,self.state_summary)
+                    self._generation_attrs(span)
+                self._store('plan',plan)
 
-                if use_mock:
-                    result=self.executor.mock_execute(step['action'])
+                #Step2: Generate code for all steps, then execute them in dependency order
+                steps=unique_step_ids(plan.get('steps',[]))
+                if batch_generation:
+                    codes=self._generate_code_batch([step['description'] for step in steps])
                 else:
-                    result=self.executor.execute(code)
-            
-                
-                self.memory.log_execution(step['step'],code,result)
-                print(f"Result: {'✓' if result.get('success') else '✗'}")
-            
-            #Step3 : PARSE reports
-            last_result=self.memory.execution_log[-1]['result']
-            reports=last_result.get('reports',{})
-            metrics=self.parser.parse_all(reports)
-            
-            #Step4 : Decide
-            final_decision=self.decision_engine.evaluate(metrics)
-            
+                    codes=[self._generate_code(step['description']) for step in steps]
+                code_by_step={step['step']:code for step,code in zip(steps,codes)}
+
+                try:
+                    schedule=self._execute_plan(steps,code_by_step,use_mock,iteration_span)
+                except ValueError as e:
+                    # Unusable dependencies: fall back to running the plan in order
+                    print(f"Invalid step dependencies ({e}), running steps serially")
+                    steps=[{k:v for k,v in step.items() if k!='depends_on'} for step in steps]
+                    schedule=self._execute_plan(steps,code_by_step,use_mock,iteration_span)
+
+                step_by_id={step['step']:step for step in steps}
+                for step_id in schedule['skipped']:
+                    self.memory.log_execution(step_id,code_by_step[step_id],schedule['results'][step_id],
+                                              step_by_id[step_id]['action'],step_by_id[step_id]['description'])
+                print(f"Critical path: {' -> '.join(str(s) for s in schedule['critical_path'])} "
+                      f"({schedule['critical_path_seconds']:.2f}s of {schedule['makespan_seconds']:.2f}s wall, "
+                      f"parallelism {schedule['parallelism']:.2f})")
+
+                #Step3 : PARSE reports of every executed step, later steps overriding earlier ones
+                with self.tracer.span('parse'):
+                    reports={}
+                    for step in steps:
+                        reports.update(schedule['results'][step['step']].get('reports',{}))
+                    metrics=self.parser.parse_all(reports)
+
+                #Step4 : Decide
+                with self.tracer.span('decide') as span:
+                    final_decision=self.decision_engine.evaluate(metrics)
+                    span.set(status=final_decision['status'])
+                self.memory.store('last_decision',final_decision)
+                self.state_summary.record_decision(final_decision,metrics)
+
             #Step5: Loop or finish
             if final_decision['status']=='success':
                 print(f"\n{'='*70}")
@@ -111,29 +193,275 @@ class AutonomousFlowAgent:
             'goal': user_goal,
             'iterations': iteration,
             'status': final_decision['status'] if final_decision else 'incomplete',
-            'total_steps':len(self.memory.execution_log)
+            'total_steps':self.memory.execution_count,
+            'generation':self.backend.stats(),
+            'execution':self.executor.stats(),
+            'analysis_execution':self._analysis_executor.stats() if self._analysis_executor else None,
+            'schedule':self._schedule_summary(schedule) if schedule else None,
+            'checkpoints':self.checkpoints.stats() if self.checkpoints else {},
+            'retrieval':dict(self.retrieval_stats) if self.retrieval else None,
+            'corrections':{rule:hits for rule,hits in self.corrector.hit_counts().items() if hits},
+            'trace':self.tracer.percentiles() if self.tracer.enabled else None
         }
     
 
+    def explore(self,user_goal,space=None,candidates=8,max_workers=None,use_mock=True,prune_margin=0.1,seed=0):
+        """
+        Run several candidate flows with different knobs in parallel.
+
+        Args:
+            user_goal: High-level user goal, planned once for all candidates
+            space: knob -> values (default explorer.DEFAULT_SPACE)
+            candidates: Number of knob combinations to try
+            max_workers: Candidate processes at once (default: CPU count)
+            use_mock: Knob-scaled mock reports instead of running OpenROAD
+            prune_margin: How clearly a candidate must lose before it is stopped
+            seed: Candidate sampling seed
+
+        Returns:
+            list: Candidate records, best first
+        """
+        print(f"\n{'='*70}")
+        print("DESIGN-SPACE EXPLORATION")
+        print(f"{'='*70}")
+
+        plan=self.planner.create_plan(user_goal,self.state_summary)
+        steps=unique_step_ids(plan.get('steps',[]))
+        pool=sample_candidates(space,candidates,seed)
+        print(f"Goal: {user_goal}")
+        print(f"Candidates: {len(pool)}, steps per candidate: {len(steps)}")
+
+        # One batched generation for every candidate's knob-specific step prompts
+        descriptions=[knob_description(step['description'],step['action'],candidate['knobs'])
+                      for candidate in pool for step in steps]
+        codes=self._generate_code_batch(descriptions)
+        codes_by_candidate={candidate['id']:codes[i*len(steps):(i+1)*len(steps)] for i,candidate in enumerate(pool)}
+
+        explorer=Explorer(self.decision_engine,max_workers,prune_margin)
+        ranked=explorer.run(pool,steps,codes_by_candidate,use_mock,str(self.executor.working_dir/"explore"))
+        print(format_table(ranked))
+
+        self._store('exploration',[{k:r[k] for k in ('rank','id','knobs','status','metrics')} for r in ranked])
+        return ranked
+
+    def _execute_plan(self,steps,code_by_step,use_mock,parent_span=None):
+        stage_keys=self.checkpoints.stage_keys(steps,code_by_step,'mock' if use_mock else None) if self.checkpoints else {}
+        # Restored stages' state DBs, loaded into the worker before their first dependent runs
+        self._dependencies=step_dependencies(steps)
+        self._restored_states={}
+        self._loaded_states=set()
+        self._step_states={}
+        return self.scheduler.run(
+            steps,
+            lambda step:self._run_step(step,code_by_step[step['step']],use_mock,stage_keys.get(step['step']),parent_span)
+        )
+
+    def _run_step(self,step,code,use_mock,stage_key=None,parent_span=None):
+        """Validate, correct and execute one step, or restore it from its checkpoint; called from scheduler threads"""
+        # Scheduler threads have no open span, so the step nests under the iteration explicitly
+        with self.tracer.span('step',parent=parent_span,step=step['step'],action=step['action']) as span:
+            result=self._run_step_stages(step,code,use_mock,stage_key)
+            span.set(success=bool(result.get('success')),checkpoint='checkpoint' in result)
+        return result
+
+    def _run_step_stages(self,step,code,use_mock,stage_key):
+        print(f"\n[Step {step['step']}] {step['description']}")
+
+        if stage_key:
+            checkpoint=self.checkpoints.load(stage_key)
+            # A real run can only resume from a stage whose design was saved with it
+            if checkpoint and checkpoint['result'].get('success') and (use_mock or checkpoint.get('state')):
+                with self._stage_lock:
+                    self.checkpoints.restore(checkpoint)
+                self._restored_states[step['step']]=checkpoint.get('state')
+                self._step_states[step['step']]=checkpoint.get('state')
+                result=dict(checkpoint['result'],checkpoint=stage_key)
+                self.memory.log_execution(step['step'],checkpoint['code'],result,step['action'],step['description'])
+                print(f"Result: ✓ (checkpoint {stage_key[:12]})")
+                return result
+
+        with self.tracer.span('validate') as span:
+            is_valid,errors,warnings=self.validator.validate(code)
+            span.set(errors=len(errors),warnings=len(warnings))
+        if not is_valid:
+            print(f"Validation failed:{errors}")
+
+            with self.tracer.span('correct') as span:
+                code,fixes=self.corrector.auto_correct(code)
+                span.set(fixes=len(fixes))
+            print(f" Applied {len(fixes)} corrections")
+
+        analysis_state=self._analysis_state(step) if stage_key and not use_mock else None
+        with self.tracer.span('execute',mock=use_mock,analysis=analysis_state is not None):
+            if use_mock:
+                before=self._artifact_state(stage_key)
+                result=self.executor.mock_execute(step['action'])
+                self._checkpoint(stage_key,step,code,result,before)
+            elif analysis_state:
+                result=self._execute_analysis(code,analysis_state)
+                # Analysis steps write no design files and leave the design as they found it
+                self._checkpoint(stage_key,step,code,result,None,analysis_state)
+            else:
+                queued=time.perf_counter()
+                with self._design_lock:
+                    waited=time.perf_counter()-queued
+                    before=self._artifact_state(stage_key)
+                    result=self._load_restored_state(step) or self.executor.execute(code)
+                    state=self._save_state(stage_key) if stage_key and result.get('success') else None
+                    self._checkpoint(stage_key,step,code,result,before,state)
+                result['wait_seconds']=result.get('wait_seconds',0.0)+waited
+
+        self.memory.log_execution(step['step'],code,result,step['action'],step['description'])
+        print(f"Result: {'✓' if result.get('success') else '✗'}")
+        return result
+
+    def _artifact_state(self,stage_key):
+        if not stage_key:
+            return None
+        with self._stage_lock:
+            return self.checkpoints.artifact_state()
+
+    def _checkpoint(self,stage_key,step,code,result,before,state=None):
+        """Checkpoint a successful stage; before=None means it wrote no design files"""
+        if not stage_key or not result.get('success'):
+            return
+        with self._stage_lock:
+            self.checkpoints.save(stage_key,step,code,result,
+                                  self.checkpoints.artifact_state() if before is None else before,state)
+        self._step_states[step['step']]=state
+
+    def _save_state(self,stage_key):
+        """Write the design worker's design to the stage's state DB; returns its path or None"""
+        state=self.checkpoints.state_path(stage_key)
+        if not self.executor.execute(self.checkpoints.save_state_script(state)).get('success'):
+            print("Design state not saved: this stage will rerun rather than be restored")
+            return None
+        return state
+
+    def _analysis_state(self,step):
+        """State DB an analysis step can run on instead of the design worker, or None"""
+        if step['action'] not in ANALYSIS_ACTIONS:
+            return None
+        states={self._step_states.get(dep) for dep in self._dependencies.get(step['step'],())}
+        # Exactly one design to read; a step without dependencies has none to load
+        return states.pop() if len(states)==1 and None not in states else None
+
+    def _execute_analysis(self,code,state):
+        """Run an analysis step on a worker of its own after loading the design it reads"""
+        with self._analysis_lock:
+            if self._analysis_executor is None:
+                self._analysis_executor=Executor(self.executor.working_dir,pool_size=self.max_parallel_steps)
+        return self._analysis_executor.execute(self.checkpoints.load_state_script(state)+code)
+
+    def _load_restored_state(self,step):
+        """Read the design of restored dependencies into the worker; returns a failed result, or None"""
+        for dep in self._dependencies.get(step['step'],()):
+            state=self._restored_states.get(dep)
+            if state and state not in self._loaded_states:
+                self._loaded_states.add(state)
+                loaded=self.executor.execute(self.checkpoints.load_state_script(state))
+                if not loaded.get('success'):
+                    return dict(loaded,error=f"Could not load the design restored for step {dep}")
+        return None
+
+    def _schedule_summary(self,schedule):
+        return {
+            'critical_path':schedule['critical_path'],
+            'critical_path_seconds':round(schedule['critical_path_seconds'],3),
+            'makespan_seconds':round(schedule['makespan_seconds'],3),
+            'serial_seconds':round(schedule['serial_seconds'],3),
+            'skipped':schedule['skipped']
+        }
+
+    def _store(self,key,value):
+        """Store state in memory and keep the planner's summary of it current"""
+        self.memory.store(key,value)
+        self.state_summary.update(key,value)
+
+    def _generation_attrs(self,span,prompts=()):
+        """Add token counts and timing of the backend's last generation to a span"""
+        if not span:
+            return
+        attrs={'prompt_tokens':sum(self.backend.count_tokens(prompt) for prompt in prompts)} if prompts else {}
+        record=getattr(self.backend,'last_generation',None)
+        if record:
+            generated=sum(record.get('generated_tokens',()))
+            attrs['generated_tokens']=generated
+            if record.get('first_token_seconds') is not None:
+                attrs['first_token_ms']=round(record['first_token_seconds']*1e3,2)
+            if record.get('seconds'):
+                attrs['tokens_per_second']=round(generated/record['seconds'],1)
+        span.set(**attrs)
+
+    def _code_prompt_suffix(self,description):
+        return f"{description} [/INST]"
+
+    def _code_prompt(self,description,examples=()):
+        # Examples go after the fixed prefix, so its KV cache is still reused
+        shots="".join(f"\nExample: {example['prompt']}\n{example['script']}\n" for example in examples)
+        return f"{CODE_PROMPT_PREFIX}{shots} {self._code_prompt_suffix(description)}"
+
+    def _retrieve(self,description):
+        """
+        Corpus lookup for a step description.
+
+        Returns:
+            tuple: (vetted script or None, few-shot examples)
+        """
+        if self.retrieval is None:
+            return None,[]
+        hits=self.retrieval.search(description,k=2)
+        # A short description can match a document perfectly on one or two words
+        if hits and hits[0]['confidence']>=self.direct_threshold and hits[0]['matched']>=self.direct_min_terms:
+            self.retrieval_stats['direct']+=1
+            return hits[0]['script'],[]
+        examples=[hit for hit in hits if hit['confidence']>=self.fewshot_threshold]
+        self.retrieval_stats['fewshot' if examples else 'miss']+=1
+        return None,examples
+
     def _generate_code(self,description):
         """Generate code for step description"""
+        with self.tracer.span('generate',steps=1) as span:
+            script,examples=self._retrieve(description)
+            if script is not None:
+                span.set(source='corpus')
+                return script
 
-        prompt=f"<s>[INST] Write OpenROAD Python code to: {description} [/INST]"
-        inputs=self.tokenizer(prompt,return_tensors="pt")
-        inputs = {k: v.to(self.model.device) for k, v in inputs.items()}
-
-        with torch.no_grad():
-            outputs=self.model.generate(
-                **inputs,
-                max_new_tokens=200,
-                temperature=0.7,
-                top_p=0.9
-            )
-        
-        code=self.tokenizer.decode(outputs[0],skip_special_tokens=True)
-        if "[/INST]" in code:
-            code=code.split("[/INST]")[-1].strip()
-        return code
+            prompt=self._code_prompt(description,examples)
+            code=self.backend.generate(prompt,CODE_GENERATION_PARAMS,prefix=CODE_PROMPT_PREFIX)
+            self._generation_attrs(span,[prompt])
+            return code
+
+    def _generate_code_batch(self,descriptions,batch_size=None):
+        """
+        Generate code for several step descriptions in batched generate calls.
+
+        Descriptions with a confident corpus match are not generated at all.
+
+        Returns:
+            list: Generated code, in the same order as descriptions
+        """
+        with self.tracer.span('generate',steps=len(descriptions)) as span:
+            codes=[]
+            prompts={}
+            for i,description in enumerate(descriptions):
+                script,examples=self._retrieve(description)
+                codes.append(script)
+                if script is None:
+                    prompts[i]=self._code_prompt(description,examples)
+            span.set(from_corpus=len(descriptions)-len(prompts))
+
+            if prompts:
+                generated=self.backend.generate_batch(
+                    list(prompts.values()),
+                    CODE_GENERATION_PARAMS,
+                    batch_size=batch_size or self.generation_batch_size,
+                    prefix=CODE_PROMPT_PREFIX
+                )
+                for i,code in zip(prompts,generated):
+                    codes[i]=code
+                self._generation_attrs(span,list(prompts.values()))
+            return codes
     
 
 
@@ -141,7 +469,16 @@ if __name__ == "__main__":
     base= "mistralai/Mistral-7B-Instruct-v0.2"
     adapter = "/Users/manivannans/EDA-Corpus/openroad_mistral_7b_finetuned/checkpoint-100"
     
-    agent= AutonomousFlowAgent(base,adapter)
+    # --template: model-free pipeline test using the code template library
+    backend=TemplateBackend() if "--template" in sys.argv else None
+    # --trace: time every stage and write trace.json (chrome://tracing, ui.perfetto.dev)
+    agent= AutonomousFlowAgent(base,adapter,backend=backend,trace="--trace" in sys.argv)
+
+    # --explore: rank knob combinations instead of retrying one flow
+    if "--explore" in sys.argv:
+        agent.explore("Complete RTL to GDS with timing closure",candidates=8,use_mock=True)
+        sys.exit(0)
+
     result= agent.run_autonomous_flow(
         user_goal="Complete RTL to GDS with timing closure",
         max_iterations=2,
@@ -153,6 +490,11 @@ if __name__ == "__main__":
     print("="*70)
     print(json.dumps(result, indent=2))
 
+    if agent.tracer.enabled:
+        from tracing import format_percentiles
+        print(format_percentiles(result['trace']))
+        print(f"Trace written to {agent.tracer.write_chrome_trace('trace.json')}")
+
             
     
 
@@ -0,0 +1,544 @@
+#!/usr/bin/env python3
+"""
+backends.py
+Generator Backends - Pluggable text generation for the agents
+"""
+import json
+import re
+import threading
+import time
+import urllib.request
+
+# Words, numbers and single punctuation marks: close to a SentencePiece
+# token count for the short English/JSON text the agents put in prompts
+TOKEN_PIECE = re.compile(r"\w+|[^\w\s]")
+
+
+def approximate_token_count(text):
+    """Token count estimate for when no tokenizer is at hand"""
+    return len(TOKEN_PIECE.findall(text))
+
+
+class GeneratorBackend:
+    """Turns prompts into completions; subclasses decide how"""
+
+    def generate(self, prompt, params, prefix=None, bypass_cache=None):
+        """
+        Generate a completion for one prompt.
+
+        Args:
+            prompt: Full prompt text
+            params: Generation parameters (max_new_tokens, temperature, ...)
+            prefix: Optional fixed leading part of prompt, for prefix caching
+            bypass_cache: Honoured by caching backends; None uses their default
+
+        Returns:
+            str: Completion text (prompt excluded)
+        """
+        raise NotImplementedError
+
+    def generate_batch(self, prompts, params, batch_size=8, prefix=None):
+        """
+        Generate completions for several prompts.
+
+        Args:
+            prompts: Full prompt texts
+            params: Generation parameters, shared by every prompt
+            batch_size: Most prompts generated together
+            prefix: Optional fixed leading part of the prompts, as in generate()
+
+        Returns:
+            list: Completions, in the same order as prompts
+        """
+        return [self.generate(prompt, params, prefix=prefix) for prompt in prompts]
+
+    def stream(self, prompt, params, cancel_event=None, stats=None, bypass_cache=None):
+        """
+        Yield the completion incrementally.
+
+        Backends without token streaming yield the whole completion at once.
+
+        Args:
+            prompt: Full prompt text
+            params: Generation parameters
+            cancel_event: Optional threading.Event; setting it stops generation
+            stats: Optional dict; 'tokens' is set to the generated token count
+                   when the backend knows it
+            bypass_cache: Honoured by caching backends
+
+        Yields:
+            str: Pieces of completion text
+        """
+        yield self.generate(prompt, params)
+
+    def count_tokens(self, text):
+        """Prompt tokens text takes; an estimate unless the backend has a tokenizer"""
+        return approximate_token_count(text)
+
+    def cache_identity(self):
+        """What produces this backend's completions, for generation cache keys"""
+        return type(self).__name__
+
+    def stats(self):
+        """Backend-specific counters"""
+        return {'backend': type(self).__name__}
+
+
+class HFBackend(GeneratorBackend):
+    """Hugging Face base model + LoRA adapter, loaded on first generation"""
+
+    def __init__(self, base_model_path, adapter_path=None, use_prefix_cache=True, merged_path=None):
+        """
+        Initialize backend without loading anything.
+
+        Args:
+            base_model_path: Base model name or path
+            adapter_path: Optional LoRA adapter directory
+            use_prefix_cache: Reuse KV cache of fixed prompt prefixes
+            merged_path: Optional merge_model.py artifact (adapter already
+                         merged, possibly int8); replaces base + adapter
+        """
+        self.base_model_path = base_model_path
+        self.adapter_path = adapter_path
+        self.use_prefix_cache = use_prefix_cache
+        self.merged_path = merged_path
+
+        self._model = None
+        self._tokenizer = None
+        self.prefix_cache = None
+        self.load_seconds = None
+
+        self.last_generation = None
+        self.early_stop = {'calls': 0, 'structure_stops': 0, 'tokens_saved': 0}
+
+    def cache_identity(self):
+        # The adapter/merged artifact is hashed by the cache itself
+        return f"{type(self).__name__}:{self.merged_path or self.base_model_path}"
+
+    @property
+    def is_loaded(self):
+        return self._model is not None
+
+    def load(self):
+        """Import torch/transformers/peft and load the model; no-op once loaded"""
+        if self._model is not None:
+            return
+
+        start = time.perf_counter()
+        print(f"Loading model: {self.merged_path or self.base_model_path}")
+
+        import torch
+        from transformers import AutoModelForCausalLM, AutoTokenizer
+        from prefix_cache import PrefixCache
+
+        if self.merged_path:
+            from merge_model import load_merged
+            model, tokenizer = load_merged(self.merged_path)
+        else:
+            tokenizer = AutoTokenizer.from_pretrained(
+                self.base_model_path,
+                local_files_only=False,
+                use_fast=False
+            )
+
+            model = AutoModelForCausalLM.from_pretrained(
+                self.base_model_path,
+                torch_dtype=torch.float16,
+                local_files_only=False
+            ).to("mps" if torch.backends.mps.is_available() else "cpu")
+
+            if self.adapter_path:
+                from peft import PeftModel
+                model = PeftModel.from_pretrained(model, self.adapter_path, is_trainable=False, local_files_only=True)
+            model.eval()
+
+        tokenizer.pad_token = tokenizer.eos_token
+        # Decoder-only models must be left padded for batched generation
+        tokenizer.padding_side = "left"
+
+        self._tokenizer = tokenizer
+        self._model = model
+        if self.use_prefix_cache:
+            self.prefix_cache = PrefixCache(model, tokenizer)
+
+        self.load_seconds = time.perf_counter() - start
+        print(f"Model loaded in {self.load_seconds:.1f}s")
+
+    @property
+    def model(self):
+        self.load()
+        return self._model
+
+    @property
+    def tokenizer(self):
+        self.load()
+        return self._tokenizer
+
+    def count_tokens(self, text):
+        # Counting alone must not load the model (e.g. when every prompt is cached)
+        if self._tokenizer is None:
+            return approximate_token_count(text)
+        return len(self._tokenizer(text, add_special_tokens=False).input_ids)
+
+    def _generate_kwargs(self, params, extra_criteria=()):
+        """
+        Turn our params into model.generate kwargs.
+
+        The 'stop' param ('json' or 'code') is ours, not a generate argument:
+        it becomes a StructureStoppingCriteria. Likewise 'grammar' ('plan')
+        becomes a constrained-decoding logits processor.
+
+        Returns:
+            tuple: (kwargs, structure criteria or None)
+        """
+        from transformers import LogitsProcessorList, StoppingCriteriaList
+        from stopping import StructureStoppingCriteria
+
+        kwargs = dict(params)
+        kind = kwargs.pop('stop', None)
+        grammar = kwargs.pop('grammar', None)
+        kwargs['pad_token_id'] = self.tokenizer.pad_token_id
+
+        if grammar:
+            from json_grammar import GRAMMARS
+            processor = GRAMMARS[grammar](self.tokenizer, params.get('max_new_tokens', 20))
+            kwargs['logits_processor'] = LogitsProcessorList([processor])
+
+        criteria = list(extra_criteria)
+        structure = StructureStoppingCriteria(self.tokenizer, kind) if kind else None
+        if structure is not None:
+            criteria.append(structure)
+        if criteria:
+            kwargs['stopping_criteria'] = StoppingCriteriaList(criteria)
+        return kwargs, structure
+
+    def _record_generation(self, params, generated_counts, structure, started=None, timer=None):
+        """Track decode budget left unused, e.g. by structure-aware stopping, and generation timing"""
+        max_new_tokens = params.get('max_new_tokens', 20)
+        saved = sum(max(max_new_tokens - count, 0) for count in generated_counts)
+        structure_stops = sum(scanner.done for scanner in structure.scanners or []) if structure else 0
+
+        self.early_stop['calls'] += 1
+        self.early_stop['structure_stops'] += structure_stops
+        self.early_stop['tokens_saved'] += saved
+        self.last_generation = {
+            'generated_tokens': list(generated_counts),
+            'structure_stops': structure_stops,
+            'tokens_saved': saved,
+            'seconds': time.perf_counter() - started if started else None,
+            'first_token_seconds': timer.first_token_at - started if timer and timer.first_token_at else None
+        }
+
+    def generate(self, prompt, params, prefix=None, bypass_cache=None):
+        import torch
+        from stopping import FirstTokenTimer
+
+        self.load()
+        started = time.perf_counter()
+        timer = FirstTokenTimer()
+        kwargs, structure = self._generate_kwargs(params, [timer])
+
+        if prefix and self.prefix_cache is not None and prompt.startswith(prefix):
+            suffix = prompt[len(prefix):].lstrip(" ")
+            new_tokens = self.prefix_cache.generate(prefix, suffix, **kwargs)
+        else:
+            inputs = self.tokenizer(prompt, return_tensors="pt").to(self.model.device)
+
+            with torch.no_grad():
+                outputs = self.model.generate(**inputs, **kwargs)
+            new_tokens = outputs[0, inputs['input_ids'].shape[1]:]
+
+        self._record_generation(params, [len(new_tokens)], structure, started, timer)
+        return self.tokenizer.decode(new_tokens, skip_special_tokens=True).strip()
+
+    def stream(self, prompt, params, cancel_event=None, stats=None, bypass_cache=None):
+        from transformers import TextIteratorStreamer
+        from stopping import CancelCriteria
+
+        self.load()
+        closed = threading.Event()
+        inputs = self.tokenizer(prompt, return_tensors="pt").to(self.model.device)
+        criteria = CancelCriteria(inputs['input_ids'].shape[1], cancel_event, closed)
+        kwargs, structure = self._generate_kwargs(params, [criteria])
+        streamer = TextIteratorStreamer(self.tokenizer, skip_prompt=True, skip_special_tokens=True)
+        errors = []
+
+        def run():
+            import torch
+            try:
+                with torch.no_grad():
+                    self.model.generate(**inputs, streamer=streamer, **kwargs)
+            except Exception as e:
+                errors.append(e)
+                # Unblock the consumer, which would otherwise wait forever
+                streamer.end()
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        try:
+            for piece in streamer:
+                yield piece
+        finally:
+            # Reached on normal end and when the consumer closes us early
+            closed.set()
+            thread.join()
+            self._record_generation(params, [criteria.generated], structure)
+            if stats is not None:
+                stats['tokens'] = criteria.generated
+
+        if errors:
+            raise errors[0]
+
+    def generate_batch(self, prompts, params, batch_size=8, prefix=None):
+        """
+        Generate with left-padded, bounded-size batched generate calls.
+
+        Every row ends at the same position, so new tokens start at the
+        padded prompt length. At most batch_size prompts go into one call.
+        When every prompt starts with prefix, each call reuses the prefix's
+        cached KV and prefills only the (left-padded) suffixes.
+        """
+        import torch
+        from stopping import FirstTokenTimer
+
+        self.load()
+        completions = []
+        started = time.perf_counter()
+        chunks = []
+
+        for start in range(0, len(prompts), batch_size):
+            chunk = prompts[start:start + batch_size]
+            chunk_started = time.perf_counter()
+            timer = FirstTokenTimer()
+            kwargs, structure = self._generate_kwargs(params, [timer])
+            suffixes = [prompt[len(prefix):].lstrip(" ") for prompt in chunk] \
+                if prefix and self.prefix_cache is not None and all(p.startswith(prefix) for p in chunk) else None
+
+            if suffixes and all(suffixes):
+                new_tokens = self.prefix_cache.generate_batch(prefix, suffixes, **kwargs)
+            else:
+                inputs = self.tokenizer(chunk, return_tensors="pt", padding=True).to(self.model.device)
+                with torch.no_grad():
+                    outputs = self.model.generate(**inputs, **kwargs)
+                new_tokens = outputs[:, inputs['input_ids'].shape[1]:]
+            # Rows that finished early are padded with pad (= eos) tokens
+            self._record_generation(
+                params,
+                (new_tokens != self.tokenizer.pad_token_id).sum(dim=1).tolist(),
+                structure,
+                chunk_started,
+                timer
+            )
+            chunks.append(self.last_generation)
+            for row in new_tokens:
+                completions.append(self.tokenizer.decode(row, skip_special_tokens=True).strip())
+
+        if chunks:
+            # One record for the whole batch; its first token comes from the first chunk
+            self.last_generation = {
+                'generated_tokens': [count for chunk in chunks for count in chunk['generated_tokens']],
+                'structure_stops': sum(chunk['structure_stops'] for chunk in chunks),
+                'tokens_saved': sum(chunk['tokens_saved'] for chunk in chunks),
+                'seconds': time.perf_counter() - started,
+                'first_token_seconds': chunks[0]['first_token_seconds']
+            }
+        return completions
+
+    def stats(self):
+        return {
+            'backend': type(self).__name__,
+            'loaded': self.is_loaded,
+            'load_seconds': round(self.load_seconds, 2) if self.load_seconds else None,
+            'prefix_cache': self.prefix_cache.stats() if self.prefix_cache else None,
+            'early_stop': dict(self.early_stop)
+        }
+
+
+class CachedBackend(GeneratorBackend):
+    """Serves completions from a GenerationCache, delegating misses"""
+
+    def __init__(self, backend, cache):
+        """
+        Args:
+            backend: GeneratorBackend used on cache misses
+            cache: GenerationCache
+        """
+        self.backend = backend
+        self.cache = cache
+        # Generation record of the last call; None when it was served from the cache
+        self.last_generation = None
+
+    def generate(self, prompt, params, prefix=None, bypass_cache=None):
+        self.last_generation = None
+        completion = self.cache.get(prompt, params, bypass=bypass_cache)
+        if completion is None:
+            completion = self.backend.generate(prompt, params, prefix=prefix)
+            self.last_generation = getattr(self.backend, 'last_generation', None)
+            self.cache.put(prompt, params, completion, bypass=bypass_cache)
+        return completion
+
+    def stream(self, prompt, params, cancel_event=None, stats=None, bypass_cache=None):
+        completion = self.cache.get(prompt, params, bypass=bypass_cache)
+        if completion is not None:
+            yield completion
+            return
+
+        pieces = []
+        for piece in self.backend.stream(prompt, params, cancel_event=cancel_event, stats=stats):
+            pieces.append(piece)
+            yield piece
+
+        # Only complete answers are stored; a closed generator never gets here
+        if cancel_event is None or not cancel_event.is_set():
+            self.cache.put(prompt, params, "".join(pieces).strip(), bypass=bypass_cache)
+
+    def generate_batch(self, prompts, params, batch_size=8, prefix=None):
+        self.last_generation = None
+        completions = [self.cache.get(prompt, params) for prompt in prompts]
+        pending = [i for i, completion in enumerate(completions) if completion is None]
+
+        if pending:
+            generated = self.backend.generate_batch([prompts[i] for i in pending], params, batch_size, prefix=prefix)
+            self.last_generation = getattr(self.backend, 'last_generation', None)
+            for i, completion in zip(pending, generated):
+                completions[i] = completion
+                self.cache.put(prompts[i], params, completion)
+
+        return completions
+
+    def count_tokens(self, text):
+        return self.backend.count_tokens(text)
+
+    def cache_identity(self):
+        return self.backend.cache_identity()
+
+    def stats(self):
+        stats = self.backend.stats()
+        stats['generation_cache'] = self.cache.stats()
+        return stats
+
+
+class RemoteBackend(GeneratorBackend):
+    """Client for a shared model_server.py process"""
+
+    def __init__(self, url="http://127.0.0.1:8765", timeout=600):
+        """
+        Args:
+            url: Base URL of the model server
+            timeout: Seconds to wait for a completion
+        """
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+        self.requests = 0
+
+    def _call(self, path, payload=None):
+        data = json.dumps(payload).encode() if payload is not None else None
+        request = urllib.request.Request(
+            self.url + path,
+            data=data,
+            headers={'Content-Type': 'application/json'}
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            return json.loads(response.read())
+
+    def generate(self, prompt, params, prefix=None, bypass_cache=None):
+        # The server batches concurrent requests, so prefix caching is not used
+        self.requests += 1
+        return self._call('/generate', {'prompt': prompt, 'params': params})['completion']
+
+    def generate_batch(self, prompts, params, batch_size=8, prefix=None):
+        self.requests += 1
+        return self._call('/generate_batch', {'prompts': prompts, 'params': params})['completions']
+
+    def stats(self):
+        try:
+            server = self._call('/stats')
+        except OSError as e:
+            server = {'error': str(e)}
+        return {
+            'backend': type(self).__name__,
+            'url': self.url,
+            'requests': self.requests,
+            'server': server
+        }
+
+
+# Start of a code prompt's instruction, e.g. "<s>[INST] Write OpenROAD Python code to:"
+INSTRUCTION = re.compile(r'\[INST\][^\n]*?\bto:')
+# Corpus examples the agent puts between the instruction and the step description
+FEW_SHOT = re.compile(r'\nExample: .*\n', re.S)
+
+# Keyword sets matched against the step description, first match wins
+CODE_TEMPLATES = [
+    (('verilog', 'lef', 'lib', 'read'), """from openroad import Tech, Design
+tech = Tech()
+tech.readLef("tech.lef")
+tech.readLef("cells.lef")
+tech.readLiberty("cells.lib")
+design = Design(tech)
+design.readVerilog("design.v")
+design.link("top")"""),
+    (('floorplan',), """from openroad import Tech, Design
+design.evalTclString("initialize_floorplan -utilization 70 -site core")"""),
+    (('placement', 'place'), """from openroad import Tech, Design
+design.evalTclString("global_placement")
+design.evalTclString("detailed_placement")"""),
+    (('clock', 'cts'), """from openroad import Tech, Design
+design.evalTclString("clock_tree_synthesis -root_buf BUF_X4 -buf_list BUF_X4")"""),
+    (('routing', 'route'), """from openroad import Tech, Design
+design.evalTclString("global_route")
+design.evalTclString("detailed_route")"""),
+    (('gds', 'write'), """from openroad import Tech, Design
+design.evalTclString("write_def final.def")"""),
+]
+
+
+class TemplateBackend(GeneratorBackend):
+    """Model-free backend returning vetted code templates"""
+
+    def __init__(self, templates=None):
+        """
+        Args:
+            templates: List of (keywords, code) pairs; defaults to CODE_TEMPLATES
+        """
+        self.templates = templates or CODE_TEMPLATES
+        self.matched = 0
+        self.unmatched = 0
+
+    def generate(self, prompt, params, prefix=None, bypass_cache=None):
+        # Planner prompts get no template; PlannerAgent falls back to its default plan
+        if "execution planner" in prompt:
+            self.unmatched += 1
+            return ""
+
+        text = self.step_text(prompt, prefix).lower()
+        for keywords, code in self.templates:
+            if any(keyword in text for keyword in keywords):
+                self.matched += 1
+                return code
+
+        self.unmatched += 1
+        return ""
+
+    @staticmethod
+    def step_text(prompt, prefix=None):
+        """
+        The step description of a code prompt.
+
+        The scaffolding ("Write OpenROAD Python code to:" says "write" in
+        every prompt), few-shot examples and [/INST] are cut off, so only
+        the description decides the template.
+        """
+        if prefix and prompt.startswith(prefix):
+            text = prompt[len(prefix):]
+        else:
+            match = INSTRUCTION.search(prompt)
+            text = prompt[match.end():] if match else prompt
+        return FEW_SHOT.sub('', text).split('[/INST]')[0].strip()
+
+    def stats(self):
+        return {
+            'backend': type(self).__name__,
+            'matched': self.matched,
+            'unmatched': self.unmatched
+        }
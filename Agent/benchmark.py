@@ -0,0 +1,405 @@
+#!/usr/bin/env python3
+"""
+benchmark.py
+Benchmark Suite - Stage timings and parser/validator throughput
+
+The agent runs end to end with a tiny, randomly initialized causal LM that
+shares the fine-tuned model's tokenizer, and with the mock executor in place
+of OpenROAD, so every stage (planning, per-step generation, validation,
+correction, execution, parsing) is timed offline on a CPU in seconds. The
+timings measure our pipeline, not the quality of the model's output.
+Parser, validator and corrector throughput is measured on synthetic large
+reports and scripts.
+
+Results are written as JSON; given a baseline (an earlier results file) each
+benchmark is compared against it and slowdowns beyond the tolerance are
+reported as regressions, with exit status 1.
+
+    python benchmark.py --out bench.json
+    python benchmark.py --baseline bench.json --tolerance 0.25
+    python benchmark.py --model template     # no torch: template code instead of a model
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from backends import HFBackend, TemplateBackend
+from corrector import CodeCorrector
+from metrics_parser import MetricsParser
+from validator import CodeValidator
+
+DEFAULT_TOKENIZER_DIR = Path(__file__).resolve().parent.parent / "openroad_mistral_7b_finetuned"
+GOAL = "Complete RTL to GDS with timing closure"
+
+
+class TinyModelBackend(HFBackend):
+    """HFBackend around a small random Llama-architecture model with the repo tokenizer"""
+
+    def __init__(self, tokenizer_path=DEFAULT_TOKENIZER_DIR, hidden_size=64, num_layers=2, num_heads=4,
+                 seed=0, use_prefix_cache=True):
+        """
+        Args:
+            tokenizer_path: Directory holding tokenizer.model
+            hidden_size, num_layers, num_heads: Model shape
+            seed: Weight initialization seed
+            use_prefix_cache: Reuse KV cache of fixed prompt prefixes
+        """
+        super().__init__(None, use_prefix_cache=use_prefix_cache)
+        self.tokenizer_path = str(tokenizer_path)
+        self.hidden_size = hidden_size
+        self.num_layers = num_layers
+        self.num_heads = num_heads
+        self.seed = seed
+
+    def load(self):
+        """Build the model from a config; nothing is downloaded"""
+        if self._model is not None:
+            return
+
+        start = time.perf_counter()
+        import torch
+        from transformers import AutoTokenizer, LlamaConfig, LlamaForCausalLM
+        from prefix_cache import PrefixCache
+
+        tokenizer = AutoTokenizer.from_pretrained(self.tokenizer_path, local_files_only=True, use_fast=False)
+        torch.manual_seed(self.seed)
+        config = LlamaConfig(
+            vocab_size=len(tokenizer),
+            hidden_size=self.hidden_size,
+            intermediate_size=self.hidden_size * 2,
+            num_hidden_layers=self.num_layers,
+            num_attention_heads=self.num_heads,
+            num_key_value_heads=self.num_heads,
+            max_position_embeddings=4096,
+            bos_token_id=tokenizer.bos_token_id,
+            eos_token_id=tokenizer.eos_token_id
+        )
+        model = LlamaForCausalLM(config).eval()
+
+        tokenizer.pad_token = tokenizer.eos_token
+        tokenizer.padding_side = "left"
+
+        self._tokenizer = tokenizer
+        self._model = model
+        if self.use_prefix_cache:
+            self.prefix_cache = PrefixCache(model, tokenizer)
+        self.load_seconds = time.perf_counter() - start
+
+
+def make_backend(model):
+    """'tiny' (random model, needs torch/transformers/sentencepiece) or 'template'"""
+    if model == "tiny":
+        backend = TinyModelBackend()
+        backend.load()
+        return backend
+    if model == "template":
+        return TemplateBackend()
+    raise ValueError(f"Unknown model: {model}")
+
+
+def timed(function, repeat):
+    """Run function repeat times; returns (seconds of each run, last return value)"""
+    runs = []
+    value = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        value = function()
+        runs.append(time.perf_counter() - start)
+    return runs, value
+
+
+def entry(runs, items=None, unit=None):
+    """Benchmark record: median/min seconds, plus items per second when items is given"""
+    result = {'seconds': statistics.median(runs), 'min_seconds': min(runs), 'runs': len(runs)}
+    if items is not None:
+        result.update({'items': items, 'unit': unit, 'per_second': items / max(result['seconds'], 1e-12)})
+    return result
+
+
+@contextlib.contextmanager
+def quiet():
+    """Silence the agent's progress prints (from every thread) while timing"""
+    with open(os.devnull, 'w') as sink, contextlib.redirect_stdout(sink):
+        yield
+
+
+# Synthetic inputs
+
+def synthetic_timing_report(paths, seed=0):
+    """report_checks-style text with paths and a trailing summary"""
+    rng = random.Random(seed)
+    blocks = []
+    for i in range(paths):
+        depth = rng.randint(2, 8)
+        time_ns = 0.0
+        lines = [f"Startpoint: u{i % 997}/r{i}/Q (rising edge-triggered flip-flop clocked by clk{i % 4})",
+                 f"Endpoint: u{i % 991}/r{i + 1}/D (rising edge-triggered flip-flop clocked by clk{i % 4})",
+                 f"Path Group: clk{i % 4}",
+                 "Path Type: max", "",
+                 "  Delay    Time   Description",
+                 "---------------------------------------------------------",
+                 "   0.00    0.00   clock clk (rise edge)"]
+        for d in range(depth):
+            delay = rng.uniform(0.01, 0.2)
+            time_ns += delay
+            lines.append(f"   {delay:.2f}    {time_ns:.2f} {'^' if d % 2 else 'v'} u{i % 97}/g{d}/Z (NAND2_X1)")
+        required = rng.uniform(0.5, 1.5)
+        lines += [f"           {time_ns:.2f}   data arrival time", "",
+                  f"           {required:.2f}   data required time",
+                  "---------------------------------------------------------",
+                  f"           {required - time_ns:.2f}   slack ({'MET' if required >= time_ns else 'VIOLATED'})", ""]
+        blocks.append("\n".join(lines))
+    blocks.append("WNS: -0.12\nTNS: -3.40\nViolations: 17\n")
+    return "\n".join(blocks)
+
+
+def synthetic_congestion_grid(size, layers=6, seed=0):
+    """x y layer usage capacity dump of a size x size grid"""
+    rng = np.random.default_rng(seed)
+    xs, ys, zs = np.meshgrid(np.arange(size), np.arange(size), np.arange(1, layers + 1), indexing='ij')
+    usage = rng.integers(0, 24, xs.size)
+    rows = np.column_stack([xs.ravel(), ys.ravel(), zs.ravel(), usage, np.full(xs.size, 20)])
+    return "x y layer usage capacity\n" + "\n".join(" ".join(map(str, row)) for row in rows.tolist()) + "\n"
+
+
+SCRIPT_PARTS = [
+    "tech = Tech()\ntech.readLef('{lef}')\n",
+    "design = Design(tech)\ndesign.readVerilog('{v}')\ndesign.link('top')\n",
+    "design.parseVerilogFile('{v}')\n",
+    "block = design.getBlock()\nfor inst in block.getInsts():\n    print(inst.getName())\n",
+    "for inst in block.getInsts():\n    print(inst.getNmae())\n",
+    "design.evalTclString('global_placement -density 0.{n}')\n",
+    "design.evalTclString('detailed_route; report_checks')\n",
+    "flow = ord.Flow()\nflow.run()\n",
+    "design.globalPlacement(density=0.{n})\n",
+    "design.evalTclString('write_def out_{n}.def')\n",
+]
+
+
+def synthetic_scripts(count, seed=0):
+    """Generated-looking scripts, a mix of valid, API-misusing and unparsable ones"""
+    rng = random.Random(seed)
+    scripts = []
+    for i in range(count):
+        body = "".join(rng.choice(SCRIPT_PARTS).format(lef=f"cells_{i}.lef", v=f"top_{i}.v", n=rng.randint(1, 9))
+                       for _ in range(rng.randint(2, 6)))
+        header = "from openroad import Tech, Design\nimport odb\n\n" if i % 5 else ""
+        script = header + body
+        if i % 17 == 0:
+            script += "design.evalTclString('report_wns'\n"
+        scripts.append(script)
+    return scripts
+
+
+# Benchmarks
+
+def bench_throughput(repeat=3, scale=1.0, workdir=None):
+    """Parser, validator and corrector throughput on synthetic inputs"""
+    results = {}
+    parser = MetricsParser()
+    workdir = Path(workdir or tempfile.mkdtemp())
+
+    timing = synthetic_timing_report(int(20000 * scale))
+    timing_path = workdir / "timing.rpt"
+    timing_path.write_text(timing)
+    megabytes = timing_path.stat().st_size / 1e6
+
+    runs, _ = timed(lambda: parser.parse_file(timing_path, 'timing'), repeat)
+    results['parse_timing_summary'] = entry(runs, megabytes, 'MB')
+    runs, paths = timed(lambda: parser.parse_timing_paths(timing_path), repeat)
+    results['parse_timing_paths'] = entry(runs, len(paths), 'paths')
+
+    size = max(int(300 * scale ** 0.5), 8)
+    grid_path = workdir / "congestion.grid"
+    grid_path.write_text(synthetic_congestion_grid(size))
+    runs, grid = timed(lambda: parser.parse_congestion_grid(grid_path), repeat)
+    results['parse_congestion_grid'] = entry(runs, int(np.prod(grid.shape)), 'gcells')
+    runs, _ = timed(grid.summary, repeat)
+    results['congestion_hotspots'] = entry(runs, int(np.prod(grid.shape)), 'gcells')
+
+    scripts = synthetic_scripts(int(2000 * scale))
+    validator = CodeValidator()
+    runs, _ = timed(lambda: [validator.diagnose(script) for script in scripts], repeat)
+    results['validate_scripts'] = entry(runs, len(scripts), 'scripts')
+
+    corrector = CodeCorrector()
+    runs, _ = timed(lambda: [corrector.auto_correct(script) for script in scripts], repeat)
+    results['correct_scripts'] = entry(runs, len(scripts), 'scripts')
+    return results
+
+
+def bench_pipeline(backend, repeat=3):
+    """
+    Time each agent stage, then one whole mock iteration.
+
+    The agent keeps nothing on disk: no generation cache, memory directory,
+    checkpoints or retrieval index, so every run does the same work.
+    """
+    from autonomous_agent import AutonomousFlowAgent
+    from simple_agent import SimpleAgent
+
+    results = {}
+    agent = AutonomousFlowAgent(backend=backend, cache_dir=None, checkpoint_dir=None, memory_dir=None,
+                                retrieval_dir=None)
+    try:
+        with quiet():
+            runs, plan = timed(lambda: agent.planner.create_plan(GOAL, agent.state_summary), repeat)
+        results['plan'] = entry(runs)
+        steps = plan.get('steps', [])
+        descriptions = [step['description'] for step in steps]
+
+        codes, step_runs, tokens = [], [], 0
+        with quiet():
+            for description in descriptions:
+                runs, code = timed(lambda: agent._generate_code(description), repeat)
+                step_runs.append(statistics.median(runs))
+                codes.append(code)
+                tokens += sum((getattr(backend, 'last_generation', None) or {}).get('generated_tokens', []))
+        # Median over steps of each step's median
+        results['generate_step'] = dict(entry(step_runs, len(step_runs), 'steps'), runs=repeat)
+        results['generate_step']['per_step'] = dict(zip((step['action'] for step in steps), step_runs))
+        if tokens:
+            results['generate_step']['tokens_per_second'] = tokens / max(sum(step_runs), 1e-12)
+        with quiet():
+            runs, _ = timed(lambda: agent._generate_code_batch(descriptions), repeat)
+        results['generate_batch'] = entry(runs, len(descriptions), 'steps')
+
+        runs, verdicts = timed(lambda: [agent.validator.validate(code) for code in codes], repeat)
+        results['validate'] = entry(runs, len(codes), 'steps')
+        runs, _ = timed(lambda: [agent.corrector.auto_correct(code) for code in codes], repeat)
+        results['correct'] = entry(runs, len(codes), 'steps')
+
+        with quiet():
+            runs, executions = timed(lambda: [agent.executor.mock_execute(step['action']) for step in steps], repeat)
+        results['execute'] = entry(runs, len(steps), 'steps')
+
+        reports = {}
+        for execution in executions:
+            reports.update(execution['reports'])
+        runs, _ = timed(lambda: agent.parser.parse_all(reports), repeat)
+        results['parse'] = entry(runs)
+
+        with quiet():
+            runs, _ = timed(lambda: agent.run_autonomous_flow(GOAL, max_iterations=1, use_mock=True), repeat)
+        results['flow_iteration'] = entry(runs)
+    finally:
+        agent.executor.close()
+
+    simple = SimpleAgent(backend=backend, cache_dir=None)
+    runs, _ = timed(lambda: simple.ask("How do I run global placement?", max_length=64, do_sample=False), repeat)
+    results['simple_ask'] = entry(runs)
+    return results
+
+
+def run(model="tiny", repeat=3, scale=1.0, pipeline=True):
+    """
+    Run the suite.
+
+    Returns:
+        dict: {'meta': environment and settings, 'benchmarks': name -> record}
+    """
+    meta = {
+        'model': model,
+        'repeat': repeat,
+        'scale': scale,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'numpy': np.__version__,
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S')
+    }
+    benchmarks = {}
+    # flow_log.json and worker scratch files land in the working directory
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        try:
+            benchmarks.update(bench_throughput(repeat, scale, workdir))
+            if pipeline:
+                backend = make_backend(model)
+                if getattr(backend, 'load_seconds', None):
+                    meta['model_load_seconds'] = backend.load_seconds
+                benchmarks.update(bench_pipeline(backend, repeat))
+        finally:
+            os.chdir(cwd)
+    return {'meta': meta, 'benchmarks': benchmarks}
+
+
+def compare(results, baseline, tolerance=0.2):
+    """
+    Benchmarks slower than the baseline by more than tolerance.
+
+    Throughput benchmarks compare items per second, the others median
+    seconds. Benchmarks missing from either side are not compared.
+
+    Returns:
+        list: dicts with name, baseline, current and change (fraction slower)
+    """
+    regressions = []
+    for name, current in results['benchmarks'].items():
+        before = baseline.get('benchmarks', {}).get(name)
+        if before is None:
+            continue
+        if 'per_second' in current and 'per_second' in before:
+            change = before['per_second'] / max(current['per_second'], 1e-12) - 1
+            old, new = before['per_second'], current['per_second']
+        else:
+            change = current['seconds'] / max(before['seconds'], 1e-12) - 1
+            old, new = before['seconds'], current['seconds']
+        if change > tolerance:
+            regressions.append({'name': name, 'baseline': old, 'current': new, 'change': change})
+    return regressions
+
+
+def format_results(results):
+    lines = [f"{'benchmark':<24}{'median':>12}{'min':>12}  throughput"]
+    for name, record in results['benchmarks'].items():
+        rate = f"{record['per_second']:,.1f} {record['unit']}/s" if 'per_second' in record else ""
+        lines.append(f"{name:<24}{record['seconds'] * 1e3:>10.2f}ms{record['min_seconds'] * 1e3:>10.2f}ms  {rate}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Agent stage timings and parser/validator throughput")
+    arg_parser.add_argument("--model", choices=["tiny", "template"], default="tiny")
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    arg_parser.add_argument("--scale", type=float, default=1.0, help="Size of the synthetic reports and script sets")
+    arg_parser.add_argument("--throughput-only", action="store_true", help="Skip the agent stages")
+    arg_parser.add_argument("--out", default="benchmark_results.json")
+    arg_parser.add_argument("--baseline", default=None, help="Earlier results file to compare against")
+    arg_parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed slowdown, as a fraction")
+    args = arg_parser.parse_args()
+
+    try:
+        results = run(args.model, args.repeat, args.scale, not args.throughput_only)
+    except ImportError as e:
+        print(f"The tiny model needs torch, transformers and sentencepiece ({e}); "
+              f"use --model template or --throughput-only")
+        sys.exit(2)
+
+    with open(args.out, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(format_results(results))
+    print(f"Wrote {args.out}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        for setting in ('model', 'scale'):
+            if baseline.get('meta', {}).get(setting) != results['meta'][setting]:
+                print(f"Note: baseline was run with --{setting} {baseline.get('meta', {}).get(setting)}")
+        regressions = compare(results, baseline, args.tolerance)
+        for r in regressions:
+            print(f"REGRESSION {r['name']}: {r['baseline']:.4g} -> {r['current']:.4g} ({r['change']:+.0%} slower)")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions beyond {args.tolerance:.0%} against {args.baseline}")
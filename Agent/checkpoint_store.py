@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+checkpoint_store.py
+Checkpoint Store - Content-addressed snapshots of flow stage outputs
+
+A stage's key hashes its action, description, parameters and script
+together with the keys of the stages it depends on. A changed stage
+therefore changes the key of everything downstream of it, while an
+unchanged prefix of the flow keeps its keys. Such a prefix is restored from
+its checkpoint (result plus design DB/DEF files) instead of being rerun.
+
+Real runs keep the design in a warm worker's memory, which copying files
+back does not rebuild. After each real stage the worker's design is
+therefore written to a state DB under STATE_DIR and checkpointed with the
+stage; restoring reads it back into the worker before the next stage runs.
+"""
+import hashlib
+import json
+import os
+import shutil
+import threading
+from datetime import datetime
+from pathlib import Path
+
+from scheduler import step_dependencies
+
+DEFAULT_ARTIFACT_PATTERNS = ("*.odb", "*.def", "*.v", "*.sdc", "*.spef", "*.gds")
+# Per-stage design snapshots; not matched by the (non-recursive) artifact patterns
+STATE_DIR = ".stage_db"
+
+
+def _file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class CheckpointStore:
+    """Stage checkpoints with deduplicated artifact blobs"""
+
+    def __init__(self, root=".checkpoints", working_dir=".", artifact_patterns=DEFAULT_ARTIFACT_PATTERNS):
+        """
+        Args:
+            root: Directory holding checkpoints and artifact blobs
+            working_dir: Directory the flow writes its design files to
+            artifact_patterns: Globs (relative to working_dir) of stage outputs to snapshot
+        """
+        self.root = Path(root)
+        self.working_dir = Path(working_dir)
+        self.artifact_patterns = artifact_patterns
+        (self.root / "stages").mkdir(parents=True, exist_ok=True)
+        (self.root / "blobs").mkdir(parents=True, exist_ok=True)
+
+        self.hits = 0
+        self.misses = 0
+        self.saved = 0
+        self.restored_files = 0
+
+    def stage_keys(self, steps, codes, salt=None):
+        """
+        Chained content keys for every step of a plan.
+
+        Args:
+            steps: Plan steps
+            codes: step id -> script that runs the step
+            salt: Extra key input, e.g. to keep mock and real runs apart
+
+        Returns:
+            dict: step id -> hex key
+        """
+        dependencies = step_dependencies(steps)
+        by_id = {step['step']: step for step in steps}
+        keys = {}
+
+        pending = list(by_id)
+        while pending:
+            for step_id in pending:
+                if all(dep in keys for dep in dependencies[step_id]):
+                    step = by_id[step_id]
+                    payload = json.dumps({
+                        'action': step.get('action'),
+                        'description': step.get('description'),
+                        'params': step.get('params'),
+                        'code': codes.get(step_id),
+                        'salt': salt,
+                        'parents': sorted(keys[dep] for dep in dependencies[step_id])
+                    }, sort_keys=True)
+                    keys[step_id] = hashlib.sha256(payload.encode()).hexdigest()
+            pending = [step_id for step_id in pending if step_id not in keys]
+        return keys
+
+    @staticmethod
+    def state_path(key):
+        """Working-directory-relative path of a stage's state DB"""
+        return f"{STATE_DIR}/{key[:16]}.odb"
+
+    @staticmethod
+    def save_state_script(path):
+        """Script that writes the worker's design to path"""
+        return (f"import os\nos.makedirs({os.path.dirname(path)!r}, exist_ok=True)\n"
+                f"design.writeDb({path!r})\n")
+
+    @staticmethod
+    def load_state_script(path):
+        """Script that replaces the worker's design with the one in path"""
+        return (f"from openroad import Tech, Design\ntech = Tech()\ndesign = Design(tech)\n"
+                f"design.readDb({path!r})\n")
+
+    def _stage_path(self, key):
+        return self.root / "stages" / f"{key}.json"
+
+    def _blob_path(self, digest):
+        return self.root / "blobs" / digest[:2] / digest
+
+    def artifact_state(self):
+        """(mtime, size) of every artifact file currently in the working directory"""
+        state = {}
+        for pattern in self.artifact_patterns:
+            for path in self.working_dir.glob(pattern):
+                if path.is_file():
+                    stat = path.stat()
+                    state[str(path.relative_to(self.working_dir))] = (stat.st_mtime_ns, stat.st_size)
+        return state
+
+    def load(self, key):
+        """
+        Checkpoint of a stage, or None.
+
+        Args:
+            key: Stage key from stage_keys
+
+        Returns:
+            dict: Stored checkpoint (result, artifacts, ...) or None
+        """
+        try:
+            with open(self._stage_path(key)) as f:
+                checkpoint = json.load(f)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+
+        if not all(self._blob_path(digest).exists() for digest in checkpoint['artifacts'].values()):
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return checkpoint
+
+    def restore(self, checkpoint):
+        """Copy a checkpoint's artifacts back into the working directory"""
+        for relative, digest in checkpoint['artifacts'].items():
+            target = self.working_dir / relative
+            target.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copy2(self._blob_path(digest), target)
+            self.restored_files += 1
+
+    def save(self, key, step, code, result, before=None, state=None):
+        """
+        Store a stage's result and the artifacts it wrote.
+
+        Args:
+            key: Stage key from stage_keys
+            step: Plan step
+            code: Script that ran
+            result: Execution result
+            before: artifact_state() taken before the stage ran; only files
+                    created or changed since are snapshot (None: all of them).
+                    Stages running at the same time must not share this
+                    window, or one is credited with the other's files.
+            state: Relative path of the stage's state DB, if one was written
+        """
+        changed = [relative for relative, stat in self.artifact_state().items()
+                   if before is None or before.get(relative) != stat]
+        if state and (self.working_dir / state).is_file():
+            changed.append(state)
+        else:
+            state = None
+
+        artifacts = {}
+        for relative in changed:
+            source = self.working_dir / relative
+            digest = _file_digest(source)
+            blob = self._blob_path(digest)
+            if not blob.exists():
+                blob.parent.mkdir(exist_ok=True)
+                # Per-thread temp name: parallel stages may write the same blob
+                tmp = blob.with_name(f"{digest}.{threading.get_ident()}.tmp")
+                shutil.copy2(source, tmp)
+                os.replace(tmp, blob)
+            artifacts[relative] = digest
+
+        checkpoint = {
+            'key': key,
+            'created_at': datetime.now().isoformat(),
+            'step': step,
+            'code': code,
+            'result': result,
+            'artifacts': artifacts,
+            'state': state
+        }
+        path = self._stage_path(key)
+        tmp = path.with_suffix(".tmp")
+        with open(tmp, 'w') as f:
+            json.dump(checkpoint, f, default=str)
+        os.replace(tmp, path)
+        self.saved += 1
+
+    def clear(self):
+        """Remove every checkpoint and blob"""
+        shutil.rmtree(self.root, ignore_errors=True)
+        (self.root / "stages").mkdir(parents=True, exist_ok=True)
+        (self.root / "blobs").mkdir(parents=True, exist_ok=True)
+
+    def stats(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'saved': self.saved,
+            'restored_files': self.restored_files
+        }
@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+"""
+congestion_map.py
+Congestion Map - Global-route congestion grids as NumPy arrays
+
+Parses per-gcell, per-layer usage/capacity dumps into (layer, y, x) arrays
+and finds hotspots (connected regions of over-utilized gcells) and region
+summaries with whole-array operations, so million-gcell grids never go
+through a per-cell Python loop.
+
+Input format: one gcell per line, whitespace or comma separated,
+    x  y  layer  usage  capacity
+where x/y are gcell indices or coordinates and layer is a name or number.
+Blank lines, '#' comments and a header line are skipped.
+"""
+import mmap
+import re
+from pathlib import Path
+
+import numpy as np
+
+FIELDS = 5
+
+COMMENT = re.compile(rb'#[^\n]*')
+# x and y at the start of a line, then a layer field that is a name rather than a number
+LAYER_NAME = re.compile(rb'^( *[^ \n]+ +[^ \n]+ +)([A-Za-z_][^ \n]*)', re.M)
+SEPARATORS = bytes.maketrans(b',\t\r', b'   ')
+
+
+class CongestionParseError(ValueError):
+    """A congestion dump line that is not 'x y layer usage capacity'"""
+
+    def __init__(self, line_number, line):
+        self.line_number = line_number
+        self.line = line
+        super().__init__(
+            f"Congestion grid line {line_number} is not {FIELDS} numeric fields "
+            f"(x y layer usage capacity): {line!r}"
+        )
+
+
+def _field_counts(text):
+    """Number of space separated fields on each line of text"""
+    chars = np.frombuffer(text, dtype=np.uint8)
+    filled = (chars != ord(' ')) & (chars != ord('\n'))
+    starts = filled.copy()
+    starts[1:] &= ~filled[:-1]
+    lines = np.cumsum(chars == ord('\n'))
+    return np.bincount(lines[starts], minlength=text.count(b'\n') + 1)
+
+
+def _parse_error(data, start, text):
+    """
+    The error for the first malformed line of text.
+
+    Only runs once parsing has failed, so it may look at the lines one by one.
+    text begins at data[start] and has the same lines as data from there on.
+    """
+    for index, line in enumerate(text.split(b'\n')):
+        fields = line.split()
+        if not fields:
+            continue
+        try:
+            numbers = [float(field) for field in fields]
+        except ValueError:
+            numbers = []
+        if len(numbers) != FIELDS:
+            original = data[start:].split(b'\n')[index].decode(errors='replace').strip()
+            return CongestionParseError(data[:start].count(b'\n') + index + 1, original)
+    return ValueError("Congestion grid could not be parsed")
+
+
+def _label_components(mask):
+    """
+    4-connected component labels of a boolean grid.
+
+    Uses scipy.ndimage when it is installed. Otherwise it runs a vectorized
+    union-find over all hot neighbour pairs at once: every round hooks the
+    larger root of each differing pair onto the smaller one, then
+    compresses all pointers. The number of rounds grows roughly with the
+    logarithm of the component size, not with the number of cells.
+
+    Returns:
+        tuple: (labels array, 0 for background and 1..n per component, n)
+    """
+    try:
+        from scipy import ndimage
+        return ndimage.label(mask)
+    except ImportError:
+        pass
+
+    height, width = mask.shape
+    cells = np.arange(height * width).reshape(height, width)
+    vertical = mask[1:, :] & mask[:-1, :]
+    horizontal = mask[:, 1:] & mask[:, :-1]
+    a = np.concatenate([cells[1:, :][vertical], cells[:, 1:][horizontal]])
+    b = np.concatenate([cells[:-1, :][vertical], cells[:, :-1][horizontal]])
+
+    # parent[i] <= i always holds, so the pointers form a forest
+    parent = np.arange(height * width)
+    while True:
+        root_a, root_b = parent[a], parent[b]
+        differ = root_a != root_b
+        if not differ.any():
+            break
+        np.minimum.at(parent, np.maximum(root_a[differ], root_b[differ]),
+                      np.minimum(root_a[differ], root_b[differ]))
+        while True:
+            grandparent = parent[parent]
+            if np.array_equal(grandparent, parent):
+                break
+            parent = grandparent
+
+    hot = mask.ravel()
+    roots, dense = np.unique(parent[hot], return_inverse=True)
+    labels = np.zeros(height * width, dtype=np.int32)
+    labels[hot] = dense.ravel() + 1
+    return labels.reshape(height, width), len(roots)
+
+
+class CongestionMap:
+    """Usage and capacity per layer and gcell"""
+
+    def __init__(self, usage, capacity, layers, xs, ys):
+        """
+        Args:
+            usage, capacity: float32 arrays shaped (layer, y, x)
+            layers: Layer names, in array order
+            xs, ys: gcell coordinates of the x and y indices
+        """
+        self.usage = usage
+        self.capacity = capacity
+        self.layers = layers
+        self.xs = xs
+        self.ys = ys
+
+    @classmethod
+    def from_text(cls, data):
+        """
+        Build the grid from dump text.
+
+        Args:
+            data: str, bytes or a buffer such as an mmap
+
+        Returns:
+            CongestionMap
+
+        Raises:
+            CongestionParseError: A line is not five fields with a numeric x, y, usage and capacity
+        """
+        if isinstance(data, str):
+            data = data.encode()
+
+        # Skip leading lines that do not start with a number (header, comments)
+        start = 0
+        while start < len(data):
+            end = data.find(b'\n', start)
+            end = len(data) if end < 0 else end + 1
+            if data[start:end].lstrip()[:1] in b'-+.0123456789' and data[start:end].strip():
+                break
+            start = end
+        # The one copy of the data; commas, tabs and carriage returns become spaces
+        text = data[start:].translate(SEPARATORS)
+        if b'#' in text:
+            text = COMMENT.sub(b'', text)
+
+        # Layer names become negative ids in one pass of the anchored layer field pattern
+        ids = {}
+
+        def layer_id(match):
+            name = match.group(2)
+            if name not in ids:
+                ids[name] = b'%d' % (-1 - len(ids))
+            return match.group(1) + ids[name]
+
+        if LAYER_NAME.search(text):
+            text = LAYER_NAME.sub(layer_id, text)
+        names = {float(number): name.decode() for name, number in ids.items()}
+
+        try:
+            values = np.fromstring(text, sep=' ')
+        except ValueError:
+            raise _parse_error(data, start, text) from None
+        counts = _field_counts(text)
+        if ((counts != 0) & (counts != FIELDS)).any():
+            raise _parse_error(data, start, text)
+        table = values.reshape(-1, FIELDS)
+
+        xs, x_index = np.unique(table[:, 0], return_inverse=True)
+        ys, y_index = np.unique(table[:, 1], return_inverse=True)
+        layer_ids, layer_index = np.unique(table[:, 2], return_inverse=True)
+
+        # Numbered layers sort numerically, named ones keep their name order
+        layers = [names[layer] if layer in names else f"{layer:g}" for layer in layer_ids.tolist()]
+        if names:
+            order = np.argsort(layers, kind='stable')
+            rank = np.empty_like(order)
+            rank[order] = np.arange(len(order))
+            layer_index = rank[layer_index.ravel()]
+            layers = [layers[i] for i in order]
+
+        shape = (len(layers), len(ys), len(xs))
+        usage = np.zeros(shape, dtype=np.float32)
+        capacity = np.zeros(shape, dtype=np.float32)
+        cell = (layer_index.ravel(), y_index.ravel(), x_index.ravel())
+        usage[cell] = table[:, 3].astype(np.float32)
+        capacity[cell] = table[:, 4].astype(np.float32)
+        return cls(usage, capacity, layers, xs, ys)
+
+    @classmethod
+    def from_file(cls, path):
+        """Build the grid from a dump file"""
+        with open(Path(path), 'rb') as f:
+            if f.seek(0, 2) == 0:
+                raise ValueError(f"Empty congestion grid: {path}")
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                return cls.from_text(mapped)
+
+    @property
+    def shape(self):
+        return self.usage.shape
+
+    def utilization(self, layer=None):
+        """
+        usage / capacity per gcell, all layers combined unless layer is given.
+
+        Gcells without capacity but with usage count as fully overflowed (inf).
+        """
+        if layer is None:
+            usage, capacity = self.usage.sum(axis=0), self.capacity.sum(axis=0)
+        else:
+            index = self.layers.index(layer) if isinstance(layer, str) else layer
+            usage, capacity = self.usage[index], self.capacity[index]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(capacity > 0, usage / capacity, np.where(usage > 0, np.inf, 0.0))
+
+    def overflow(self):
+        """Per layer and gcell usage above capacity"""
+        return np.maximum(self.usage - self.capacity, 0)
+
+    def overflow_by_layer(self):
+        return {layer: float(total) for layer, total in zip(self.layers, self.overflow().sum(axis=(1, 2)))}
+
+    def hotspots(self, threshold=0.9, top=10):
+        """
+        Connected regions of gcells above a utilization threshold.
+
+        Args:
+            threshold: Combined-layer utilization that makes a gcell hot
+            top: Regions returned, most overflowed first
+
+        Returns:
+            list: dicts with cells, bounding box (gcell coordinates),
+                  centroid, peak utilization and total overflow
+        """
+        utilization = self.utilization()
+        labels, count = _label_components(utilization > threshold)
+        if count == 0:
+            return []
+
+        flat = labels.ravel()
+        hot = flat > 0
+        ids = flat[hot] - 1
+        y_index, x_index = np.divmod(np.flatnonzero(hot), labels.shape[1])
+
+        cells = np.bincount(ids, minlength=count)
+        overflow = np.bincount(ids, weights=self.overflow().sum(axis=0).ravel()[hot], minlength=count)
+        peak = np.full(count, -np.inf)
+        np.maximum.at(peak, ids, utilization.ravel()[hot])
+
+        bounds = {}
+        for name, index, reduce, start in (('x_min', x_index, np.minimum, np.iinfo(np.int64).max),
+                                           ('x_max', x_index, np.maximum, -1),
+                                           ('y_min', y_index, np.minimum, np.iinfo(np.int64).max),
+                                           ('y_max', y_index, np.maximum, -1)):
+            bounds[name] = np.full(count, start, dtype=np.int64)
+            reduce.at(bounds[name], ids, index)
+        centroid_x = np.bincount(ids, weights=x_index, minlength=count) / cells
+        centroid_y = np.bincount(ids, weights=y_index, minlength=count) / cells
+
+        order = np.lexsort((-peak, -overflow))[:top]
+        return [{
+            'cells': int(cells[i]),
+            'bbox': (float(self.xs[bounds['x_min'][i]]), float(self.ys[bounds['y_min'][i]]),
+                     float(self.xs[bounds['x_max'][i]]), float(self.ys[bounds['y_max'][i]])),
+            'centroid': (float(np.interp(centroid_x[i], np.arange(len(self.xs)), self.xs)),
+                         float(np.interp(centroid_y[i], np.arange(len(self.ys)), self.ys))),
+            'peak_utilization': round(float(peak[i]), 3),
+            'overflow': float(overflow[i])
+        } for i in order]
+
+    def region_summary(self, rows=4, cols=4):
+        """
+        Utilization and overflow of a coarse rows x cols partition of the die.
+
+        Returns:
+            list: One dict per region, row-major from the lower-left corner
+        """
+        usage = self.usage.sum(axis=0)
+        capacity = self.capacity.sum(axis=0)
+        overflow = self.overflow().sum(axis=0)
+        height, width = usage.shape
+        y_edges = np.linspace(0, height, rows + 1).astype(int)
+        x_edges = np.linspace(0, width, cols + 1).astype(int)
+
+        def block_sums(grid):
+            # Sum over row bands, then column bands, via reduceat on the band starts
+            valid_y = y_edges[:-1][y_edges[:-1] < height]
+            valid_x = x_edges[:-1][x_edges[:-1] < width]
+            return np.add.reduceat(np.add.reduceat(grid, valid_y, axis=0), valid_x, axis=1)
+
+        usage_sums, capacity_sums, overflow_sums = block_sums(usage), block_sums(capacity), block_sums(overflow)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            utilization = np.where(capacity_sums > 0, usage_sums / capacity_sums, 0.0)
+
+        regions = []
+        for r in range(usage_sums.shape[0]):
+            for c in range(usage_sums.shape[1]):
+                regions.append({
+                    'region': (r, c),
+                    'utilization': round(float(utilization[r, c]), 3),
+                    'overflow': float(overflow_sums[r, c])
+                })
+        return regions
+
+    def summary(self, threshold=0.9, top=5):
+        """Metrics in the MetricsParser format, plus hotspots for the planner"""
+        utilization = self.utilization()
+        finite = utilization[np.isfinite(utilization)]
+        peak = float(utilization.max()) if utilization.size else 0.0
+        return {
+            'max_congestion': int(round(100 * min(peak, 10.0))),
+            'avg_congestion': int(round(100 * float(finite.mean()))) if finite.size else 0,
+            'total_overflow': float(self.overflow().sum()),
+            'overflow_by_layer': self.overflow_by_layer(),
+            'congestion_hotspots': self.hotspots(threshold, top)
+        }
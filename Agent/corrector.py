@@ -1,33 +1,342 @@
+import ast
+import bisect
+import re
+from collections import Counter, deque
+from difflib import SequenceMatcher
+
+# kind, wrong, right. rename: attribute/function names; keyword: call keyword
+# arguments; remove: calls whose statement is commented out (right is the note);
+# text: literal rewrites outside strings and comments
+DEFAULT_RULES=[
+    # Method name fixes
+    ('rename','parseVerilogFile','readVerilog'),
+    ('rename','loadVerilog','readVerilog'),
+    ('rename','linK_design','link'),
+    ('remove','design.compile','Remove - not OpenROAD API'),
+
+    # Non-existent APIs
+    ('remove','ord.Flow','Use individual commands'),
+    ('remove','runRTL2PDN','Use step-by-step commands'),
+    ('remove','design.synthesize','Synthesis done seperately'),
+
+    # Parameter name fixes
+    ('keyword','density','utilization'),
+]
+
+# What may separate a statement from the next one on the same line
+STATEMENT_SEPARATOR=re.compile(r'[ \t]*;?[ \t]*')
+
+def _is_ident(char):
+    return char.isalnum() or char=='_'
+
+def _skipped_spans(code):
+    # (start, end) of every string literal and comment, in one left-to-right scan
+    spans=[]
+    i,n=0,len(code)
+    while i<n:
+        char=code[i]
+        if char=='#':
+            end=code.find('\n',i)
+            end=n if end<0 else end
+            spans.append((i,end))
+            i=end
+        elif char in '\'"':
+            quote=code[i:i+3] if code[i:i+3] in ('"""',"'''") else char
+            j=i+len(quote)
+            while j<n and not code.startswith(quote,j):
+                if code[j]=='\\':
+                    j+=1
+                elif code[j]=='\n' and len(quote)==1:
+                    break
+                j+=1
+            end=min(j+len(quote),n)
+            spans.append((i,end))
+            i=end
+        else:
+            i+=1
+    return spans
+
+class _Automaton:
+    # Aho-Corasick: every pattern is found in one pass over the text
+
+    def __init__(self,patterns):
+        self.goto=[{}]
+        self.fail=[0]
+        self.out=[[]]
+        for index,pattern in enumerate(patterns):
+            state=0
+            for char in pattern:
+                if char not in self.goto[state]:
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.out.append([])
+                    self.goto[state][char]=len(self.goto)-1
+                state=self.goto[state][char]
+            self.out[state].append(index)
+
+        queue=deque(self.goto[0].values())
+        while queue:
+            state=queue.popleft()
+            for char,child in self.goto[state].items():
+                queue.append(child)
+                fallback=self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback=self.fail[fallback]
+                self.fail[child]=self.goto[fallback].get(char,0)
+                self.out[child]=self.out[child]+self.out[self.fail[child]]
+
+    def matches(self,text):
+        """Yield (end offset, pattern index) of every occurrence"""
+        state=0
+        goto,fail,out=self.goto,self.fail,self.out
+        for position,char in enumerate(text):
+            while state and char not in goto[state]:
+                state=fail[state]
+            state=goto[state].get(char,0)
+            for index in out[state]:
+                yield position+1,index
+
 class CodeCorrector:
-    def __init__(self):
-        self.corrections={
-            # Method name fixes
-            'parseVerilogFile':'readVerilog',
-            'loadVerilog':'readVerilog',
-            'design.linK_design':'design.link',
-            'design.compile':'# Remove - not OpenROAD API ',
-            
-            # Non-existent APIs
-            'ord.Flow()':'# Use individual commands',
-            'runRTL2PDN':'# Use step-by-step commands',
-            'design.synthesize': '#Synthesis done seperately',
-            
-            # Parameter name fixes
-            'density=':'utilization=',
-            'aspect_ratio=':'aspect_ratio=',
-        }
-    
+    def __init__(self,rules=None):
+        self.rules={}
+        self.hits=Counter()
+        self._automata={}
+        # learn_from_memory state: entries already read, last failing code per stage, evidence per rule
+        self._memory_seen=0
+        self._failed_code={}
+        self._evidence=Counter()
+        for kind,wrong,right in (DEFAULT_RULES if rules is None else rules):
+            self.add_rule(kind,wrong,right)
+
+    def add_rule(self,kind,wrong,right,source='builtin'):
+        if kind not in ('rename','keyword','remove','text'):
+            raise ValueError(f"Unknown correction kind: {kind}")
+        rule_id=f"{kind}:{wrong}"
+        self.rules[rule_id]={'kind':kind,'wrong':wrong,'right':right,'source':source}
+        self._automata={}
+        return rule_id
+
+    def _index(self,kind):
+        return {rule['wrong']:(rule_id,rule) for rule_id,rule in self.rules.items() if rule['kind']==kind}
+
+    def _automaton(self,kinds):
+        # One automaton per rule mix, rebuilt only after add_rule
+        if kinds not in self._automata:
+            entries=[]
+            for rule_id,rule in self.rules.items():
+                if rule['kind']=='text':
+                    entries.append((rule['wrong'],rule_id,rule['right']))
+                elif rule['kind'] in kinds:
+                    # Fallback text forms of the AST rules, for scripts that do not parse
+                    if rule['kind']=='keyword':
+                        entries.append((rule['wrong']+'=',rule_id,rule['right']+'='))
+                    elif rule['kind']=='rename':
+                        entries.append((rule['wrong'],rule_id,rule['right']))
+                    else:
+                        entries.append((rule['wrong']+'(',rule_id,None))
+            self._automata[kinds]=(_Automaton([pattern for pattern,_,_ in entries]),entries)
+        return self._automata[kinds]
+
+    def _text_edits(self,code,kinds):
+        automaton,entries=self._automaton(kinds)
+        if not entries:
+            return []
+        skipped=_skipped_spans(code)
+        starts=[start for start,_ in skipped]
+        edits=[]
+        for end,index in automaton.matches(code):
+            pattern,rule_id,right=entries[index]
+            start=end-len(pattern)
+            # Whole identifiers only, never inside strings or comments
+            if _is_ident(pattern[0]) and start>0 and _is_ident(code[start-1]):
+                continue
+            if _is_ident(pattern[-1]) and end<len(code) and _is_ident(code[end]):
+                continue
+            span=bisect.bisect_right(starts,start)-1
+            if span>=0 and skipped[span][1]>start:
+                continue
+            if right is None:
+                # Unparseable script: comment out the rest of the line
+                line_end=code.find('\n',end)
+                line_end=len(code) if line_end<0 else line_end
+                line_start=code.rfind('\n',0,start)+1
+                indent=len(code[line_start:])-len(code[line_start:].lstrip(' \t'))
+                edits.append((line_start+indent,line_end,f"# {self.rules[rule_id]['right']}: {code[line_start+indent:line_end]}",rule_id))
+            else:
+                edits.append((start,end,right,rule_id))
+        return edits
+
+    def _ast_edits(self,code,tree):
+        lines=code.split('\n')
+        line_starts=[0]
+        for line in lines:
+            line_starts.append(line_starts[-1]+len(line)+1)
+
+        def offset(lineno,col):
+            # ast columns count UTF-8 bytes
+            line=lines[lineno-1] if lineno-1<len(lines) else ''
+            if not line.isascii():
+                col=len(line.encode()[:col].decode(errors='ignore'))
+            return line_starts[lineno-1]+col
+
+        renames,keywords,removals=self._index('rename'),self._index('keyword'),self._index('remove')
+        edits=[]
+        removed=[]
+
+        def removal_for(node):
+            for child in ast.walk(node):
+                if isinstance(child,ast.Call):
+                    name=ast.unparse(child.func)
+                    found=removals.get(name) or removals.get(name.rsplit('.',1)[-1])
+                    if found:
+                        return found,name
+            return None
+
+        for node in ast.walk(tree):
+            for field in ('body','orelse','finalbody'):
+                body=getattr(node,field,None)
+                if not isinstance(body,list):
+                    continue
+                found=[(stmt,removal_for(stmt)) for stmt in body
+                       if isinstance(stmt,(ast.Expr,ast.Assign,ast.AugAssign,ast.AnnAssign,ast.Return))]
+                found=[(stmt,match) for stmt,match in found if match]
+                for i,(stmt,((rule_id,rule),name)) in enumerate(found):
+                    start=offset(stmt.lineno,stmt.col_offset)
+                    end=offset(stmt.end_lineno,stmt.end_col_offset)
+                    # A block must keep a statement: when every one is commented out, the first becomes pass
+                    keep='pass  ' if i==0 and len(found)==len(body) else ''
+                    right=f"{keep}# {rule['right']}: {name}()"
+                    line=lines[stmt.end_lineno-1]
+                    after=STATEMENT_SEPARATOR.match(line,end-line_starts[stmt.end_lineno-1])
+                    if after.end()<len(line) and line[after.end()]!='#':
+                        # Code follows on the same line ("x(); y=1"); the comment must not swallow it
+                        before=lines[stmt.lineno-1][:start-line_starts[stmt.lineno-1]]
+                        if before.rstrip().endswith(':'):
+                            # One-line block ("if a: x(); y=1"): no line break possible
+                            right='pass'
+                        else:
+                            right+='\n'+before[:len(before)-len(before.lstrip(' \t'))]
+                            end=line_starts[stmt.end_lineno-1]+after.end()
+                    edits.append((start,end,right,rule_id))
+                    removed.append((start,end))
+
+            if isinstance(node,ast.Attribute) and node.attr in renames:
+                end=offset(node.end_lineno,node.end_col_offset)
+                rule_id,rule=renames[node.attr]
+                edits.append((end-len(node.attr),end,rule['right'],rule_id))
+            elif isinstance(node,ast.Name) and node.id in renames:
+                rule_id,rule=renames[node.id]
+                start=offset(node.lineno,node.col_offset)
+                edits.append((start,start+len(node.id),rule['right'],rule_id))
+            elif isinstance(node,ast.keyword) and node.arg in keywords:
+                rule_id,rule=keywords[node.arg]
+                start=offset(node.lineno,node.col_offset)
+                edits.append((start,start+len(node.arg),rule['right'],rule_id))
+
+        # Edits inside a removed statement are moot; removed statements never overlap
+        removed.sort()
+        removed_starts=[start for start,_ in removed]
+
+        def inside_removed(edit):
+            i=bisect.bisect_right(removed_starts,edit[0])-1
+            return i>=0 and edit[1]<=removed[i][1] and (edit[0],edit[1])!=removed[i]
+
+        return [edit for edit in edits if edit[1]>edit[0] and not inside_removed(edit)]
+
     def auto_correct(self,code):
-        corrected=code
+        try:
+            tree=ast.parse(code)
+        except SyntaxError:
+            tree=None
+
+        if tree is not None:
+            edits=self._ast_edits(code,tree)+self._text_edits(code,())
+        else:
+            edits=self._text_edits(code,('rename','keyword','remove'))
+
+        # Splice all edits in one pass; on overlap the earlier (then longer) edit wins
+        edits.sort(key=lambda edit:(edit[0],-(edit[1]-edit[0])))
+        pieces=[]
         fixes=[]
+        position=0
+        for start,end,right,rule_id in edits:
+            if start<position:
+                continue
+            pieces.append(code[position:start])
+            pieces.append(right)
+            position=end
+            self.hits[rule_id]+=1
+            fixes.append(f"{self.rules[rule_id]['wrong']}->{self.rules[rule_id]['right']}")
+        pieces.append(code[position:])
+        return ''.join(pieces),fixes
+
+    def hit_counts(self):
+        return {rule_id:self.hits[rule_id] for rule_id in self.rules}
+
+    def _identifiers(self,code):
+        # (kind, name) of called attributes/names and keywords, in source order
+        try:
+            tree=ast.parse(code)
+        except SyntaxError:
+            return []
+        found=[]
+        for node in ast.walk(tree):
+            if isinstance(node,ast.Call):
+                func=node.func
+                if isinstance(func,ast.Attribute):
+                    found.append((func.end_lineno,func.end_col_offset,'rename',func.attr))
+                elif isinstance(func,ast.Name):
+                    found.append((func.lineno,func.col_offset,'rename',func.id))
+                for keyword in node.keywords:
+                    if keyword.arg:
+                        found.append((keyword.lineno,keyword.col_offset,'keyword',keyword.arg))
+        return [(kind,name) for _,_,kind,name in sorted(found)]
+
+    def learn_from_memory(self,memory,min_support=2):
+        """
+        Learn rename/keyword rules from executions recorded in a MemoryStore.
 
-        for wrong,right in self.corrections:
-            if wrong in corrected:
-                corrected=corrected.replace(wrong,right)
-                fixes.append(f"{wrong}->{right}")
+        When a step fails and the next attempt at the same action in the
+        same session succeeds, the called names and keywords of the failing
+        script and of the (validated, corrected) script that succeeded are
+        aligned; every one-for-one substitution counts as evidence for a
+        rule. Retries are matched by action rather than by step: a retry of
+        an unchanged step regenerates the same script, so only a replanned
+        step, with a new number or description, brings a fix to learn from.
+        A rule is added once it has min_support pieces of evidence. Only
+        entries not seen by an earlier call are read.
 
-        return corrected,fixes
-    
+        Returns:
+            list: Ids of the rules added
+        """
+        added=[]
+        for entry in memory.history('execution',start=self._memory_seen):
+            self._memory_seen+=1
+            code,result=entry.get('code') or '',entry.get('result') or {}
+            # Steps skipped because of a failed dependency never ran their code
+            if entry.get('session') is None or entry.get('action') is None or result.get('skipped'):
+                continue
+            stage=(entry['session'],entry['action'])
+            # Only a failure and the next attempt at its action are paired
+            failed=self._failed_code.pop(stage,None)
+            if not result.get('success'):
+                self._failed_code[stage]=code
+                continue
+            if failed is None or failed==code:
+                continue
+
+            before,after=self._identifiers(failed),self._identifiers(code)
+            matcher=SequenceMatcher(None,before,after,autojunk=False)
+            for tag,i1,i2,j1,j2 in matcher.get_opcodes():
+                if tag!='replace' or i2-i1!=j2-j1:
+                    continue
+                for (kind,wrong),(other_kind,right) in zip(before[i1:i2],after[j1:j2]):
+                    if kind!=other_kind or wrong==right or f"{kind}:{wrong}" in self.rules:
+                        continue
+                    self._evidence[(kind,wrong,right)]+=1
+                    if self._evidence[(kind,wrong,right)]>=min_support:
+                        added.append(self.add_rule(kind,wrong,right,source='learned'))
+        return added
 
     def clean_code(self,code):
         lines=code.split('\n')
@@ -37,6 +346,5 @@ class CodeCorrector:
             if line.strip() in ['#','# Remove']:
                 continue
             cleaned.append(line)
-        
+
         return '\n'.join(cleaned)
-    
@@ -20,75 +20,113 @@ class DecisionEngine:
             'drc_violations': 0
         }
     
-    def evaluate(self, metrics):
+    def evaluate(self, metrics, verbose=True):
         """
         Evaluate if metrics meet constraints.
         
         Args:
             metrics: Dict of parsed metrics
+            verbose: Print the metrics and decision
             
         Returns:
             dict: Decision with status and issues
         """
-        print(f"\n{'='*70}")
-        print("DECISION ENGINE")
-        print(f"{'='*70}")
-        print(f"Metrics: {metrics}")
-        print(f"Constraints: {self.constraints}")
+        decision = self.check(metrics)
+        if verbose:
+            self.report(decision, metrics)
+        return decision
+    
+    def check(self, metrics, constraints=None):
+        """
+        Evaluate one metrics dict without printing.
         
+        Args:
+            metrics: Dict of parsed metrics
+            constraints: Thresholds to use instead of self.constraints
+            
+        Returns:
+            dict: Decision with status and issues
+        """
+        constraints = constraints or self.constraints
         issues = []
         
         # Check timing
         wns = metrics.get('wns')
-        if wns is not None and wns < self.constraints['wns_min']:
+        if wns is not None and wns < constraints['wns_min']:
             issues.append({
                 'type': 'timing',
                 'metric': 'wns',
                 'value': wns,
-                'threshold': self.constraints['wns_min'],
-                'message': f"Timing violation: WNS={wns}ns (need >={self.constraints['wns_min']})"
+                'threshold': constraints['wns_min'],
+                'message': f"Timing violation: WNS={wns}ns (need >={constraints['wns_min']})"
             })
         
         # Check congestion
         cong = metrics.get('max_congestion')
-        if cong is not None and cong > self.constraints['max_congestion']:
+        if cong is not None and cong > constraints['max_congestion']:
             issues.append({
                 'type': 'congestion',
                 'metric': 'max_congestion',
                 'value': cong,
-                'threshold': self.constraints['max_congestion'],
-                'message': f"High congestion: {cong}% (limit: {self.constraints['max_congestion']}%)"
+                'threshold': constraints['max_congestion'],
+                'message': f"High congestion: {cong}% (limit: {constraints['max_congestion']}%)"
             })
         
         # Check DRC
         drc = metrics.get('drc_violations', 0)
-        if drc > self.constraints['drc_violations']:
+        if drc > constraints['drc_violations']:
             issues.append({
                 'type': 'drc',
                 'metric': 'drc_violations',
                 'value': drc,
-                'threshold': self.constraints['drc_violations'],
+                'threshold': constraints['drc_violations'],
                 'message': f"DRC violations: {drc} (need: 0)"
             })
         
         # Make decision
         if not issues:
-            decision = {
+            return {
                 'status': 'success',
                 'next_action': 'complete',
                 'message': 'All constraints satisfied'
             }
+        return {
+            'status': 'retry',
+            'next_action': 'replan',
+            'issues': issues,
+            'message': f'{len(issues)} constraint(s) violated'
+        }
+    
+    def report(self, decision, metrics):
+        """Print metrics, constraints and a decision from check()"""
+        print(f"\n{'='*70}")
+        print("DECISION ENGINE")
+        print(f"{'='*70}")
+        print(f"Metrics: {metrics}")
+        print(f"Constraints: {self.constraints}")
+        
+        if decision['status'] == 'success':
             print("\n✓ Decision: SUCCESS")
         else:
-            decision = {
-                'status': 'retry',
-                'next_action': 'replan',
-                'issues': issues,
-                'message': f'{len(issues)} constraint(s) violated'
-            }
-            print(f"\n✗ Decision: RETRY ({len(issues)} issues)")
-            for issue in issues:
+            print(f"\n✗ Decision: RETRY ({len(decision['issues'])} issues)")
+            for issue in decision['issues']:
                 print(f"  - {issue['message']}")
+    
+    def evaluate_batch(self, table, corner_constraints=None, weights=None):
+        """
+        Evaluate many runs x corners x modes at once.
         
-        return decision
-
+        Args:
+            table: List of row dicts, or dict of equal-length columns. Rows
+                   carry 'run', 'corner' and 'mode' (all optional) next to
+                   the metrics.
+            corner_constraints: corner -> thresholds overriding
+                                self.constraints for that corner's rows
+            weights: metric -> weight of its margin in the score (default 1)
+            
+        Returns:
+            VerdictTable: Per-row verdicts, per-run sign-off and Pareto ranks
+        """
+        from verdicts import VerdictTable
+        
+        return VerdictTable.evaluate(table, self.constraints, corner_constraints, weights)
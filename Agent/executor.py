@@ -1,14 +1,41 @@
-import subprocess
+import asyncio
 from pathlib import Path
-import tempfile
 import re
 
+from async_executor import AsyncExecutor
+from worker_pool import WorkerPool
+
+
+# Canned reports returned by mock_execute, by plan action
+MOCK_REPORTS={
+    'placement':{
+        'congestion':"Global placement congestion\nMax: 65%\nAvg: 38%\n"
+    },
+    'cts':{
+        'timing':"Clock tree synthesis timing\nWNS: 0.12\nTNS: 0.0\nViolations: 0\n"
+    },
+    'routing':{
+        'timing':"Post-route timing\nWNS: 0.08\nTNS: 0.0\nViolations: 0\n",
+        'congestion':"Global route congestion\nMax: 72%\nAvg: 45%\n",
+        'drc':"Detailed route DRC\nViolations: 0\n"
+    },
+}
+MOCK_REPORTS['write_gds']=MOCK_REPORTS['routing']
+
 
 class Executor:
     """ To Execute the OpenROAD code"""
-    def __init__(self,working_dir="."):
+    def __init__(self,working_dir=".",pool_size=1,max_jobs_per_worker=50):
+        """
+        pool_size>0 runs scripts on warm WorkerPool processes that keep
+        OpenROAD imported and the loaded design between steps; pool_size=0
+        starts a fresh interpreter per script through AsyncExecutor, which
+        keeps only the tail of its output.
+        """
         self.working_dir=Path(working_dir)
         self.working_dir.mkdir(parents=True,exist_ok=True)
+        self.pool=WorkerPool(self.working_dir,pool_size,max_jobs_per_worker) if pool_size else None
+        self.async_executor=AsyncExecutor(self.working_dir)
 
     
     def extract_code(self,text):
@@ -37,58 +64,61 @@ class Executor:
 
         return None    
     
+    def mock_execute(self,action):
+        """Pretend to run a step, without OpenROAD, for pipeline testing"""
+        print(f"Mock executing: {action}")
+        return{
+            'success':True,
+            'stdout':f"[mock] {action} completed",
+            'stderr':'',
+            'exitcode':0,
+            'reports':dict(MOCK_REPORTS.get(action,{}))
+        }
+
     def execute(self,code,timeout=30):
         print(f"Executing code...")
         print(f"Code preview:{code[:100]}...")
 
-        with tempfile.NamedTemporaryFile(
-            mode='w',
-            suffix='.py',
-            dir=self.working_dir,
-            delete=False
-        ) as f:
-            f.write(code)
-            temp_file=Path.f.name
-        
-        try:
-            result=subprocess.run(
-                ['python',str(temp_file)],
-                cwd=self.working_dir,
-                capture_output=True,
-                text=True,
-                timeout=timeout
-            )
-
-            temp_file.unlink()
-            success=result.returncode==0
-            print(f"Execution:{'Success' if success else 'Failed'}")
-
-            return{
-                'success':success,
-                'stdout':result.stdout,
-                'stderr':result.stderr,
-                'exitcode':result.returncode
-            }
-        
+        if self.pool is not None:
+            result=self.pool.run(code,timeout)
+            if 'error' in result:
+                print(f"Execution: X {result['error']}")
+            else:
+                print(f"Execution:{'Success' if result['success'] else 'Failed'}")
+            return result
 
-        except subprocess.TimeoutExpired:
-            if temp_file.exists():
-                temp_file.unlink()
-            print(f"Execution: X Timeout-{timeout}s")
-            return{
-                'success':False,
-                'error':f'Execution timeout after {timeout}s'
-            }
-        
+        return self._execute_subprocess(code,timeout)
+
+    def _execute_subprocess(self,code,timeout):
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            pass
+        else:
+            # Waiting here would block the caller's loop for the whole script
+            raise RuntimeError("Executor.execute() cannot run inside a running event loop; await execute_async() instead")
+        try:
+            result=asyncio.run(self.async_executor.execute(code,timeout))
         except Exception as e:
-            if temp_file.exists():
-                temp_file.unlink()
-            
-            print(f"Execution: X Error-{e}")
-            return {
-                'success':False,
-                'error':str(e)
-            }
-            
-
-            
\ No newline at end of file
+            result={'success':False,'error':f"Execution failed: {type(e).__name__}: {e}"}
+        if 'error' in result:
+            print(f"Execution: X {result['error']}")
+        else:
+            print(f"Execution:{'Success' if result['success'] else 'Failed'}")
+        return result
+
+    async def execute_async(self,code,timeout=30,on_stdout=None,on_stderr=None,cancel_event=None):
+        """Run code in its own interpreter from an event loop, streaming output lines to the callbacks"""
+        return await self.async_executor.execute(code,timeout,on_stdout,on_stderr,cancel_event)
+
+    def reset(self):
+        """Forget designs and variables kept by the warm workers"""
+        if self.pool is not None:
+            self.pool.reset()
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.close()
+
+    def stats(self):
+        return self.pool.stats() if self.pool is not None else {}
@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+"""
+explorer.py
+Design-Space Explorer - Runs candidate flows with different knobs in parallel
+
+Every candidate is one process executing the whole plan with its own knob
+values (utilization, aspect ratio, placement density, clock uncertainty) in
+its own directory, on one warm worker that keeps the design between stages.
+After each stage it sends the metrics parsed from the report files the
+stage wrote to the parent. The parent checks them with the DecisionEngine and terminates
+candidates that are clearly out of range, or that another candidate beats
+on every metric at the same stage. Candidates finish as a ranked table.
+"""
+import itertools
+import multiprocessing
+import os
+import queue
+import random
+import re
+import signal
+import sys
+import time
+from pathlib import Path
+
+from decision_engine import DecisionEngine
+from executor import Executor, MOCK_REPORTS
+from metrics_parser import MetricsParser
+
+DEFAULT_SPACE = {
+    'utilization': [0.5, 0.6, 0.7],
+    'aspect_ratio': [0.8, 1.0, 1.25],
+    'place_density': [0.6, 0.7, 0.8],
+    'clock_uncertainty': [0.05, 0.1],
+}
+
+# Knobs that matter to each plan action, named in that step's code prompt
+ACTION_KNOBS = {
+    'floorplan': ('utilization', 'aspect_ratio'),
+    'placement': ('place_density',),
+    'global_placement': ('place_density',),
+    'cts': ('clock_uncertainty',),
+}
+
+# Report files a real stage writes in its candidate directory, by MetricsParser report kind
+REPORT_FILES = {
+    'timing': 'timing.rpt',
+    'timing_paths': 'timing_paths.rpt',
+    'congestion': 'congestion.rpt',
+    'congestion_grid': 'congestion_grid.rpt',
+    'drc': 'drc.rpt',
+}
+
+# Metric -> True when larger is better
+OBJECTIVES = {
+    'wns': True,
+    'max_congestion': False,
+    'drc_violations': False,
+}
+
+
+def sample_candidates(space=None, count=8, seed=0):
+    """
+    Pick knob combinations from a space.
+
+    Args:
+        space: knob -> list of values (default DEFAULT_SPACE)
+        count: Number of candidates; the full grid when it is smaller
+        seed: Sampling seed, so explorations are repeatable
+
+    Returns:
+        list: Candidate dicts with 'id' and 'knobs'
+    """
+    space = space or DEFAULT_SPACE
+    names = sorted(space)
+    grid = [dict(zip(names, values)) for values in itertools.product(*(space[name] for name in names))]
+    if count < len(grid):
+        grid = random.Random(seed).sample(grid, count)
+    return [{'id': f"c{index}", 'knobs': knobs} for index, knobs in enumerate(grid)]
+
+
+def knob_description(description, action, knobs):
+    """Step description with the knobs relevant to its action spelled out"""
+    relevant = [f"{name.replace('_', ' ')} {knobs[name]}" for name in ACTION_KNOBS.get(action, ()) if name in knobs]
+    return f"{description} ({', '.join(relevant)})" if relevant else description
+
+
+def knob_prelude(knobs):
+    """Python assignments that make the knobs available to a generated script"""
+    return "".join(f"{name.upper()} = {value!r}\n" for name, value in sorted(knobs.items()))
+
+
+def _mock_reports(action, knobs):
+    """
+    Canned reports scaled by the knobs, so mock explorations differ per candidate.
+
+    Denser designs congest more; more clock uncertainty eats slack.
+    """
+    density = (knobs.get('utilization', 0.7) + knobs.get('place_density', 0.7)) / 1.4
+    congestion_scale = density * (1 + abs(1 - knobs.get('aspect_ratio', 1.0)) / 2)
+    slack_penalty = knobs.get('clock_uncertainty', 0.05) - 0.05 + 0.3 * max(0.0, density - 0.9)
+
+    def scale(match, factor):
+        return str(round(float(match.group(1)) * factor))
+
+    reports = {}
+    for kind, text in MOCK_REPORTS.get(action, {}).items():
+        if kind == 'congestion':
+            text = re.sub(r'(\d+)%', lambda m: scale(m, congestion_scale) + "%", text)
+        elif kind == 'timing':
+            text = re.sub(r'WNS: ([-\d.]+)', lambda m: f"WNS: {float(m.group(1)) - slack_penalty:.3f}", text)
+        reports[kind] = text
+    return reports
+
+
+def _report_times(working_dir):
+    times = {}
+    for kind, name in REPORT_FILES.items():
+        try:
+            times[kind] = (Path(working_dir) / name).stat().st_mtime_ns
+        except FileNotFoundError:
+            pass
+    return times
+
+
+def _stage_reports(working_dir, before):
+    """Report files written since the _report_times snapshot before, as paths MetricsParser reads"""
+    return {kind: Path(working_dir) / REPORT_FILES[kind]
+            for kind, written in _report_times(working_dir).items() if before.get(kind) != written}
+
+
+def _run_candidate(candidate, steps, codes, use_mock, working_dir, events):
+    """Candidate process: run the plan's steps in order, reporting metrics after each"""
+    def terminate(*args):
+        # Exit through SystemExit so a running script is stopped too, without
+        # waiting to flush events the parent no longer reads
+        events.cancel_join_thread()
+        sys.exit(1)
+
+    signal.signal(signal.SIGTERM, terminate)
+
+    # One worker, never recycled: every stage must see the design earlier stages loaded
+    executor = None if use_mock else Executor(working_dir, pool_size=1, max_jobs_per_worker=None)
+    parser = MetricsParser()
+    knobs = candidate['knobs']
+    metrics = {}
+
+    try:
+        for index, step in enumerate(steps):
+            start = time.perf_counter()
+            if use_mock:
+                result = {'success': True, 'reports': _mock_reports(step['action'], knobs)}
+            else:
+                before = _report_times(working_dir)
+                result = executor.execute(knob_prelude(knobs) + codes[index])
+                result['reports'] = _stage_reports(working_dir, before)
+
+            metrics.update(parser.parse_all(result.get('reports', {})))
+            events.put({
+                'candidate': candidate['id'],
+                'stage': index,
+                'action': step['action'],
+                'success': bool(result.get('success')),
+                'metrics': dict(metrics),
+                'seconds': time.perf_counter() - start
+            })
+            if not result.get('success'):
+                return
+    finally:
+        if executor is not None:
+            executor.close()
+
+
+class Explorer:
+    """Runs candidates on a bounded set of processes and prunes losing ones"""
+
+    def __init__(self, decision_engine=None, max_workers=None, prune_margin=0.1, min_survivors=1):
+        """
+        Args:
+            decision_engine: Judges intermediate metrics (default DecisionEngine())
+            max_workers: Candidates running at once (default: CPU count)
+            prune_margin: Relative margin by which a metric must miss its
+                          constraint, or lose to another candidate, to prune
+            min_survivors: Never prune below this many live candidates
+        """
+        self.decision_engine = decision_engine or DecisionEngine()
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.prune_margin = prune_margin
+        self.min_survivors = min_survivors
+        self._context = multiprocessing.get_context("spawn")
+
+    def run(self, candidates, steps, codes_by_candidate, use_mock=True, working_dir="explore"):
+        """
+        Explore candidates.
+
+        Args:
+            candidates: From sample_candidates
+            steps: Plan steps, run in order by every candidate
+            codes_by_candidate: candidate id -> list of scripts, one per step
+            use_mock: Knob-scaled mock reports instead of running scripts
+            working_dir: Parent of the per-candidate directories
+
+        Returns:
+            list: Candidate records, best first
+        """
+        events = self._context.Queue()
+        pending = list(candidates)
+        running = {}
+        records = {c['id']: {'id': c['id'], 'knobs': c['knobs'], 'status': 'pending', 'stage': None,
+                             'metrics': {}, 'reason': None, 'seconds': 0.0} for c in candidates}
+        stage_metrics = {}
+        start = time.perf_counter()
+
+        try:
+            while pending or running:
+                while pending and len(running) < self.max_workers:
+                    candidate = pending.pop(0)
+                    # Not daemonic: a real candidate starts its own executor worker
+                    process = self._context.Process(
+                        target=_run_candidate,
+                        args=(candidate, steps, codes_by_candidate.get(candidate['id'], []), use_mock,
+                              str(Path(working_dir) / candidate['id']), events)
+                    )
+                    process.start()
+                    running[candidate['id']] = process
+                    records[candidate['id']].update(status='running', started=time.perf_counter() - start)
+
+                try:
+                    event = events.get(timeout=0.1)
+                except queue.Empty:
+                    self._reap(running, records, events, start)
+                    continue
+
+                cid = event['candidate']
+                record = records[cid]
+                if record['status'] != 'running':
+                    continue
+                record.update(stage=event['stage'], metrics=event['metrics'])
+                stage_metrics.setdefault(event['stage'], {})[cid] = event['metrics']
+
+                if not event['success']:
+                    self._finish(running, records, cid, 'failed', f"{event['action']} failed", start)
+                elif event['stage'] == len(steps) - 1:
+                    self._finish(running, records, cid, 'complete', None, start)
+                else:
+                    reason = self._prune_reason(cid, event['metrics'], stage_metrics[event['stage']], records)
+                    if reason:
+                        self._finish(running, records, cid, 'pruned', reason, start)
+        finally:
+            # Nothing reaps non-daemonic candidates if the loop is left early
+            for cid in list(running):
+                self._finish(running, records, cid, 'failed', "exploration stopped", start)
+
+        return self.rank(list(records.values()))
+
+    def _reap(self, running, records, events, start):
+        """Mark candidates whose process exited without finishing as failed"""
+        for cid, process in list(running.items()):
+            # A finished process may still have events in flight
+            if not process.is_alive() and events.empty():
+                self._finish(running, records, cid, 'failed', f"process exited with code {process.exitcode}", start)
+
+    def _finish(self, running, records, cid, status, reason, start):
+        process = running.pop(cid)
+        if process.is_alive():
+            process.terminate()
+        process.join(5)
+        if process.is_alive():
+            process.kill()
+            process.join()
+        record = records[cid]
+        record.update(status=status, reason=reason, seconds=time.perf_counter() - start - record['started'])
+
+    def _prune_reason(self, cid, metrics, peers, records):
+        """Why a live candidate should stop now, or None"""
+        alive = sum(1 for record in records.values() if record['status'] in ('running', 'pending', 'complete'))
+        if alive <= self.min_survivors:
+            return None
+
+        decision = self.decision_engine.evaluate(metrics, verbose=False)
+        for issue in decision.get('issues', []):
+            threshold = issue['threshold']
+            slack = self.prune_margin * max(abs(threshold), 1.0)
+            if abs(issue['value'] - threshold) > slack:
+                return f"stage metrics far out of range: {issue['message']}"
+
+        for other, other_metrics in peers.items():
+            if other != cid and records[other]['status'] in ('running', 'complete') \
+                    and self._dominates(other_metrics, metrics):
+                return f"dominated by {other} at the same stage"
+        return None
+
+    def _dominates(self, a, b):
+        """True when a beats b by the margin on every objective both report"""
+        shared = [name for name in OBJECTIVES if name in a and name in b]
+        if not shared:
+            return False
+        for name in shared:
+            margin = self.prune_margin * max(abs(b[name]), 1.0)
+            better = a[name] - b[name] if OBJECTIVES[name] else b[name] - a[name]
+            if better <= margin:
+                return False
+        return True
+
+    def rank(self, records):
+        """Completed candidates that meet the constraints first, then by WNS, congestion and DRC"""
+        status_order = {'complete': 0, 'running': 1, 'pruned': 2, 'failed': 3, 'pending': 4}
+        verdicts = self.decision_engine.evaluate_batch(
+            [{'run': record['id'], **record['metrics']} for record in records]
+        ).by_run()
+        passed = {verdict['run']: verdict['passed'] for verdict in verdicts}
+
+        def key(record):
+            metrics = record['metrics']
+            feasible = record['status'] == 'complete' and passed[record['id']]
+            return (
+                not feasible,
+                status_order[record['status']],
+                -metrics.get('wns', float('-inf')),
+                metrics.get('max_congestion', float('inf')),
+                metrics.get('drc_violations', float('inf'))
+            )
+
+        ranked = sorted(records, key=key)
+        for rank, record in enumerate(ranked, 1):
+            record['rank'] = rank
+        return ranked
+
+
+def format_table(ranked):
+    """Ranked candidates as a fixed-width text table"""
+    knob_names = sorted({name for record in ranked for name in record['knobs']})
+    headers = ['rank', 'id'] + knob_names + ['status', 'wns', 'max_cong', 'drc', 'seconds']
+    rows = []
+    for record in ranked:
+        metrics = record['metrics']
+        rows.append([str(record['rank']), record['id']]
+                    + [str(record['knobs'].get(name, '')) for name in knob_names]
+                    + [record['status'], str(metrics.get('wns', '-')), str(metrics.get('max_congestion', '-')),
+                       str(metrics.get('drc_violations', '-')), f"{record['seconds']:.2f}"])
+
+    widths = [max(len(header), *(len(row[i]) for row in rows)) if rows else len(header)
+              for i, header in enumerate(headers)]
+    lines = ["  ".join(header.ljust(width) for header, width in zip(headers, widths))]
+    lines.append("  ".join("-" * width for width in widths))
+    lines += ["  ".join(cell.ljust(width) for cell, width in zip(row, widths)) for row in rows]
+    for record in ranked:
+        if record['reason']:
+            lines.append(f"{record['id']}: {record['reason']}")
+    return "\n".join(lines)
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+generation_cache.py
+Generation Cache - Persistent content-addressed store of LLM completions
+"""
+import hashlib
+import json
+import os
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+
+
+def adapter_config_hash(adapter_path):
+    """
+    Hash an adapter by its path and adapter_config.json contents.
+
+    Merged artifacts (merge_model.py) are hashed by their merge_info.json,
+    so merged and quantized variants never share cache entries.
+
+    Args:
+        adapter_path: Directory of the LoRA adapter or merged model
+                      (or None for the base model)
+
+    Returns:
+        str: Hex digest identifying the adapter
+    """
+    digest = hashlib.sha256(str(adapter_path).encode())
+
+    for name in ("adapter_config.json", "merge_info.json"):
+        config_file = Path(adapter_path or "") / name
+        if adapter_path and config_file.exists():
+            with open(config_file) as f:
+                config = json.load(f)
+            digest.update(json.dumps(config, sort_keys=True).encode())
+
+    return digest.hexdigest()
+
+
+class GenerationCache:
+    """On-disk completion cache with size-bounded LRU eviction"""
+
+    def __init__(self, cache_dir=".generation_cache", adapter_path=None, max_bytes=64 * 1024 * 1024,
+                 backend_id=None):
+        """
+        Initialize cache.
+
+        Args:
+            cache_dir: Directory holding one JSON file per completion
+            adapter_path: Adapter whose config is part of every key
+            max_bytes: Evict least recently used entries above this total size
+            backend_id: What generates the completions (GeneratorBackend.cache_identity);
+                        part of every key, so e.g. template code is never served to a model run
+        """
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.adapter_hash = adapter_config_hash(adapter_path)
+        self.backend_id = backend_id
+        self.max_bytes = max_bytes
+
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.evictions = 0
+
+        # key -> size in bytes, least recently used first
+        self._index = OrderedDict()
+        self._total_bytes = 0
+        self._load_index()
+
+    def _load_index(self):
+        """Rebuild the LRU order from file modification times"""
+        entries = []
+        for path in self.cache_dir.glob("*/*.json"):
+            stat = path.stat()
+            entries.append((stat.st_mtime, path.stem, stat.st_size))
+
+        for _, key, size in sorted(entries):
+            self._index[key] = size
+            self._total_bytes += size
+
+    def _path(self, key):
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    def make_key(self, prompt, params):
+        """
+        Content address of a completion.
+
+        Args:
+            prompt: Full prompt text
+            params: Generation parameters (max_new_tokens, temperature, ...)
+
+        Returns:
+            str: Hex digest
+        """
+        payload = json.dumps({
+            'prompt': prompt,
+            'adapter': self.adapter_hash,
+            'backend': self.backend_id,
+            'params': params
+        }, sort_keys=True)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def _should_bypass(self, params, bypass):
+        # Sampled completions are meant to vary, so they skip the cache by default
+        if bypass is None:
+            bypass = bool(params.get('do_sample'))
+        return bypass
+
+    def get(self, prompt, params, bypass=None):
+        """
+        Look up a stored completion.
+
+        Args:
+            prompt: Full prompt text
+            params: Generation parameters
+            bypass: Skip the cache; None bypasses only sampled calls
+
+        Returns:
+            str: Cached completion, or None on miss/bypass
+        """
+        if self._should_bypass(params, bypass):
+            self.bypassed += 1
+            return None
+
+        key = self.make_key(prompt, params)
+        path = self._path(key)
+        if key not in self._index or not path.exists():
+            self.misses += 1
+            return None
+
+        try:
+            with open(path) as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            self._remove(key)
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self._index.move_to_end(key)
+        os.utime(path)
+        return entry['completion']
+
+    def put(self, prompt, params, completion, bypass=None):
+        """
+        Store a completion.
+
+        Args:
+            prompt: Full prompt text
+            params: Generation parameters
+            completion: Generated text
+            bypass: Skip the cache; None bypasses only sampled calls
+        """
+        if self._should_bypass(params, bypass):
+            return
+
+        key = self.make_key(prompt, params)
+        path = self._path(key)
+        path.parent.mkdir(exist_ok=True)
+
+        data = json.dumps({
+            'created_at': datetime.now().isoformat(),
+            'prompt': prompt,
+            'params': params,
+            'completion': completion
+        })
+
+        # Write then rename so a crash never leaves a truncated entry
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, 'w') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+        if key in self._index:
+            self._total_bytes -= self._index.pop(key)
+        size = path.stat().st_size
+        self._index[key] = size
+        self._total_bytes += size
+
+        self._evict()
+
+    def _remove(self, key):
+        size = self._index.pop(key, 0)
+        self._total_bytes -= size
+        try:
+            self._path(key).unlink()
+        except FileNotFoundError:
+            pass
+
+    def _evict(self):
+        while self._total_bytes > self.max_bytes and len(self._index) > 1:
+            oldest = next(iter(self._index))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def clear(self):
+        """Remove every entry"""
+        for key in list(self._index):
+            self._remove(key)
+
+    def stats(self):
+        """Hit-rate and size statistics"""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'bypassed': self.bypassed,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'entries': len(self._index),
+            'bytes': self._total_bytes,
+            'evictions': self.evictions
+        }
@@ -0,0 +1,353 @@
+#!/usr/bin/env python3
+"""
+json_grammar.py
+JSON Grammar - Constrained decoding so the planner can only emit a valid plan
+
+The plan schema is compiled into a character-level automaton. Walking the
+tokenizer vocabulary (as a trie) through it gives, for every automaton
+state, the tokens that keep the output valid and the state each one leads
+to. Decoding then only needs a dict lookup and a precomputed mask per token.
+
+Near the end of the token budget, tokens are also masked when the plan
+could no longer be closed after them: every token adds at least one
+character, so a state whose shortest completion is n characters needs at
+most n more tokens plus EOS.
+"""
+import torch
+from transformers import LogitsProcessor
+
+from planner import PLAN_ACTIONS
+
+WHITESPACE = " \n\t"
+# Longest whitespace run between JSON tokens, so the model cannot stall on indentation
+MAX_WHITESPACE = 12
+MAX_INT_DIGITS = 3
+
+
+def _plan_ops(actions):
+    """Flat op list for {"goal": str, "steps": [{"step": int, "action": enum, "description": str}, ...]}"""
+    ops = [('ws',), ('lit', '{'), ('ws',), ('lit', '"goal"'), ('ws',), ('lit', ':'), ('ws',), ('str',),
+           ('ws',), ('lit', ','), ('ws',), ('lit', '"steps"'), ('ws',), ('lit', ':'), ('ws',), ('lit', '[')]
+    step_start = len(ops)
+    ops += [('ws',), ('lit', '{'),
+            ('ws',), ('lit', '"step"'), ('ws',), ('lit', ':'), ('ws',), ('int',), ('ws',), ('lit', ','),
+            ('ws',), ('lit', '"action"'), ('ws',), ('lit', ':'), ('ws',), ('lit', '"'), ('enum', tuple(actions)),
+            ('lit', '"'), ('ws',), ('lit', ','),
+            ('ws',), ('lit', '"description"'), ('ws',), ('lit', ':'), ('ws',), ('str',), ('ws',), ('lit', '}'),
+            ('ws',), ('loop', step_start)]
+    ops += [('lit', ']'), ('ws',), ('lit', '}'), ('ws',)]
+    return ops
+
+
+class PlanGrammar:
+    """
+    Character automaton for the planner's JSON schema.
+
+    States are (op index, sub-state) tuples; step() returns the next state
+    or None when a character is not allowed.
+    """
+
+    def __init__(self, actions=PLAN_ACTIONS):
+        self.ops = _plan_ops(actions)
+        self.start = (0, 0)
+        self._steps = {}
+
+    def step(self, state, ch):
+        key = (state, ch)
+        if key not in self._steps:
+            self._steps[key] = self._step(state, ch)
+        return self._steps[key]
+
+    def _step(self, state, ch):
+        pc, sub = state
+        while pc < len(self.ops):
+            op = self.ops[pc]
+            kind = op[0]
+
+            if kind == 'lit':
+                if op[1][sub] != ch:
+                    return None
+                return (pc, sub + 1) if sub + 1 < len(op[1]) else (pc + 1, 0)
+
+            if kind == 'ws':
+                if ch in WHITESPACE and sub < MAX_WHITESPACE:
+                    return (pc, sub + 1)
+
+            elif kind == 'str':
+                if sub == 0:
+                    return (pc, 1) if ch == '"' else None
+                if ch == '"':
+                    return (pc + 1, 0)
+                if ch == '\\' or ord(ch) < 0x20:
+                    return None
+                return (pc, 1)
+
+            elif kind == 'int':
+                if ch in "0123456789" and sub < MAX_INT_DIGITS and not (sub == 0 and ch == "0"):
+                    return (pc, sub + 1)
+                if sub == 0:
+                    return None
+
+            elif kind == 'enum':
+                prefix = sub or ""
+                candidate = prefix + ch
+                if any(word.startswith(candidate) for word in op[1]):
+                    return (pc, candidate)
+                if prefix not in op[1]:
+                    return None
+
+            elif kind == 'loop':
+                if ch == ',':
+                    return (op[1], 0)
+
+            # Op is complete or optional here: try the character on the next op
+            pc, sub = pc + 1, 0
+
+        return None
+
+    def completion(self, state):
+        """Shortest text that takes state to the end of the plan"""
+        pc, sub = state
+        parts = []
+        while pc < len(self.ops):
+            op = self.ops[pc]
+            if op[0] == 'lit':
+                parts.append(op[1][sub:])
+            elif op[0] == 'str':
+                parts.append('""' if sub == 0 else '"')
+            elif op[0] == 'int' and sub == 0:
+                parts.append("1")
+            elif op[0] == 'enum':
+                prefix = sub or ""
+                word = min((w for w in op[1] if w.startswith(prefix)), key=len)
+                parts.append(word[len(prefix):])
+            pc, sub = pc + 1, 0
+        return "".join(parts)
+
+    def accepts(self, state):
+        """True when the plan is complete in this state"""
+        return self.completion(state) == ""
+
+
+def _token_texts(tokenizer):
+    """Text of every non-special token, SentencePiece-aware"""
+    special = set(tokenizer.all_special_ids)
+    vocab = tokenizer.get_vocab()
+    sentencepiece = any(token.startswith("▁") for token in vocab)
+
+    texts = {}
+    for token, token_id in vocab.items():
+        if token_id in special:
+            continue
+        if token.startswith("<0x") and token.endswith(">") and len(token) == 6:
+            # Byte fallback tokens; multi-byte UTF-8 pieces are never valid alone
+            byte = int(token[3:5], 16)
+            if byte < 0x80:
+                texts[token_id] = chr(byte)
+            continue
+        if sentencepiece:
+            text = token.replace("▁", " ")
+        else:
+            text = tokenizer.convert_tokens_to_string([token])
+        if text:
+            texts[token_id] = text
+    return texts
+
+
+class _TrieNode:
+    __slots__ = ('children', 'token_ids')
+
+    def __init__(self):
+        self.children = {}
+        self.token_ids = []
+
+
+class TokenAutomaton:
+    """Lifts a PlanGrammar from characters to tokenizer tokens"""
+
+    _instances = {}
+
+    def __init__(self, grammar, tokenizer):
+        self.grammar = grammar
+        self.eos_token_id = tokenizer.eos_token_id
+        self.vocab_size = len(tokenizer)
+        self.texts = _token_texts(tokenizer)
+
+        self.trie = _TrieNode()
+        for token_id, text in self.texts.items():
+            node = self.trie
+            for ch in text:
+                node = node.children.setdefault(ch, _TrieNode())
+            node.token_ids.append(token_id)
+
+        self._transitions = {}
+        self._masks = {}
+        self._completion_lengths = {}
+        self._budgets = {}
+
+    @classmethod
+    def for_tokenizer(cls, tokenizer):
+        """Shared automaton per tokenizer; building it walks the whole vocabulary"""
+        key = id(tokenizer)
+        if key not in cls._instances:
+            cls._instances[key] = cls(PlanGrammar(), tokenizer)
+        return cls._instances[key]
+
+    def transitions(self, state):
+        """Dict of allowed token id -> next state"""
+        if state not in self._transitions:
+            allowed = {}
+            stack = [(self.trie, state)]
+            while stack:
+                node, current = stack.pop()
+                for ch, child in node.children.items():
+                    following = self.grammar.step(current, ch)
+                    if following is None:
+                        continue
+                    for token_id in child.token_ids:
+                        allowed[token_id] = following
+                    stack.append((child, following))
+            self._transitions[state] = allowed
+        return self._transitions[state]
+
+    def mask(self, state, size, device):
+        """Bool tensor of allowed token ids (EOS only once the plan is complete)"""
+        key = (state, size, str(device))
+        if key not in self._masks:
+            mask = torch.zeros(size, dtype=torch.bool)
+            ids = [token_id for token_id in self.transitions(state) if token_id < size]
+            mask[ids] = True
+            if self.grammar.accepts(state):
+                mask[self.eos_token_id] = True
+            self._masks[key] = mask.to(device)
+        return self._masks[key]
+
+    def completion_length(self, state):
+        if state not in self._completion_lengths:
+            self._completion_lengths[state] = len(self.grammar.completion(state))
+        return self._completion_lengths[state]
+
+    def budget(self, state):
+        """(token ids, shortest completion length after each, longest of those) for a state"""
+        if state not in self._budgets:
+            transitions = self.transitions(state)
+            ids = torch.tensor(list(transitions), dtype=torch.long)
+            lengths = torch.tensor([self.completion_length(following) for following in transitions.values()],
+                                   dtype=torch.long)
+            self._budgets[state] = (ids, lengths, int(lengths.max()) if len(lengths) else 0)
+        return self._budgets[state]
+
+    def budget_mask(self, state, size, device, remaining):
+        """
+        Allowed tokens after which the plan still closes within remaining tokens.
+
+        Falls back to the tokens spelling the shortest completion, then to
+        EOS, so the row is never all -inf.
+        """
+        ids, lengths, _ = self.budget(state)
+        mask = torch.zeros(size, dtype=torch.bool)
+        # After the token: remaining - 1 tokens left, one of them for EOS
+        keep = ids[(lengths <= remaining - 2) & (ids < size)]
+        mask[keep] = True
+        if self.grammar.accepts(state):
+            mask[self.eos_token_id] = True
+        if not mask.any():
+            forced = [t for t in self.forced_tokens(self.grammar.completion(state)) if t < size]
+            mask[forced or [self.eos_token_id]] = True
+        return mask.to(device)
+
+    def forced_tokens(self, text):
+        """Token ids whose text is a non-empty prefix of text"""
+        ids = []
+        node = self.trie
+        for ch in text:
+            node = node.children.get(ch)
+            if node is None:
+                break
+            ids.extend(node.token_ids)
+        return ids
+
+    def precompute(self):
+        """Build transitions and masks for every state reachable from the start"""
+        pending = [self.grammar.start]
+        seen = set(pending)
+        while pending:
+            state = pending.pop()
+            for following in self.transitions(state).values():
+                if following not in seen:
+                    seen.add(following)
+                    pending.append(following)
+        return len(seen)
+
+    def advance(self, state, token_id):
+        following = self.transitions(state).get(token_id)
+        if following is None:
+            # Forced-completion tokens are always valid, so step their characters
+            following = state
+            for ch in self.texts.get(token_id, ""):
+                following = self.grammar.step(following, ch)
+        return following
+
+
+class PlanConstraint:
+    """Grammar state of one generated sequence"""
+
+    def __init__(self, automaton, max_new_tokens):
+        self.automaton = automaton
+        self.max_new_tokens = max_new_tokens
+        self.state = automaton.grammar.start
+        self.generated = 0
+        self.finished = False
+
+    def advance(self, token_id):
+        self.generated += 1
+        if token_id == self.automaton.eos_token_id or self.state is None:
+            self.finished = True
+            return
+        self.state = self.automaton.advance(self.state, token_id)
+
+    def apply(self, scores):
+        """Mask one row of logits in place"""
+        if self.finished or self.state is None:
+            return scores
+
+        remaining = self.max_new_tokens - self.generated
+        _, _, longest = self.automaton.budget(self.state)
+
+        if longest <= remaining - 2:
+            mask = self.automaton.mask(self.state, scores.shape[-1], scores.device)
+        else:
+            # Near the budget: e.g. a ',' in the steps loop grows the completion from ']}' to a whole step
+            mask = self.automaton.budget_mask(self.state, scores.shape[-1], scores.device, remaining)
+
+        return scores.masked_fill_(~mask, float('-inf'))
+
+
+class PlanLogitsProcessor(LogitsProcessor):
+    """Restricts model.generate to tokens that keep the plan JSON valid"""
+
+    def __init__(self, tokenizer, max_new_tokens):
+        """
+        Args:
+            tokenizer: Tokenizer of the model being decoded
+            max_new_tokens: Generation budget; the plan is closed before it runs out
+        """
+        self.automaton = TokenAutomaton.for_tokenizer(tokenizer)
+        self.max_new_tokens = max_new_tokens
+        self.constraints = None
+
+    def __call__(self, input_ids, scores):
+        if self.constraints is None:
+            self.constraints = [PlanConstraint(self.automaton, self.max_new_tokens) for _ in range(scores.shape[0])]
+        else:
+            for row, constraint in enumerate(self.constraints):
+                constraint.advance(int(input_ids[row, -1]))
+
+        for row, constraint in enumerate(self.constraints):
+            constraint.apply(scores[row])
+        return scores
+
+
+GRAMMARS = {
+    'plan': PlanLogitsProcessor,
+}
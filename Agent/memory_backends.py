@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+memory_backends.py
+Memory Backends - Append-only, crash-safe storage for MemoryStore records
+
+Every record is written as soon as it is logged. Large strings (generated
+code, stdout, stderr) are stored once per content hash and referenced from
+the record, so retries that regenerate the same script or print the same
+log cost one reference. Reading is a lazy scan in log order, so history
+never has to be in memory as a whole.
+
+Records written through one backend object form a session; scan() can
+be limited to it, so a store reopened on an existing log sees only what it
+logged itself unless it asks for more.
+
+Two backends share one interface:
+    JsonlBackend   directory of append-only JSONL segments + payload blobs
+    SqliteBackend  one SQLite file (WAL) with records and payloads tables
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from pathlib import Path
+
+PAYLOAD_REF = "$payload"
+
+
+def payload_digest(text):
+    return hashlib.sha256(text.encode(errors='surrogatepass')).hexdigest()
+
+
+class JsonlBackend:
+    """Append-only JSONL segments; one segment per session, rolled by size"""
+
+    def __init__(self, root, segment_bytes=64 * 1024 * 1024, durable=False):
+        """
+        Args:
+            root: Directory holding segments/ and payloads/
+            segment_bytes: Start a new segment once the current one is this big
+            durable: fsync after every record (survives power loss, not just crashes)
+        """
+        self.root = Path(root)
+        self.segment_bytes = segment_bytes
+        self.durable = durable
+        (self.root / "segments").mkdir(parents=True, exist_ok=True)
+        (self.root / "payloads").mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._file = None
+        # Segments this session opened; older ones belong to earlier sessions
+        self._session_segments = []
+
+    def _segments(self):
+        return sorted((self.root / "segments").glob("*.jsonl"))
+
+    def _open_segment(self):
+        # Never append to an older segment: its last line may be torn by a crash.
+        # Create exclusively, so stores sharing the directory never share a segment.
+        while True:
+            segments = self._segments()
+            number = int(segments[-1].stem) + 1 if segments else 1
+            path = self.root / "segments" / f"{number:06d}.jsonl"
+            try:
+                self._file = open(path, 'x')
+                break
+            except FileExistsError:
+                continue
+        self._session_segments.append(path)
+
+    def _payload_path(self, digest):
+        return self.root / "payloads" / digest[:2] / digest
+
+    def put_payload(self, digest, text):
+        path = self._payload_path(digest)
+        if path.exists():
+            return
+        path.parent.mkdir(exist_ok=True)
+        tmp = path.with_name(f"{digest}.{threading.get_ident()}.tmp")
+        with open(tmp, 'w', errors='surrogatepass') as f:
+            f.write(text)
+        os.replace(tmp, path)
+
+    def get_payload(self, digest):
+        with open(self._payload_path(digest), errors='surrogatepass') as f:
+            return f.read()
+
+    def append(self, record):
+        # One write per line: a crash can only tear the last line, which scan() skips
+        line = json.dumps(record, default=str) + "\n"
+        with self._lock:
+            if self._file is None or self._file.tell() >= self.segment_bytes:
+                if self._file is not None:
+                    self._file.close()
+                self._open_segment()
+            self._file.write(line)
+            self._file.flush()
+            if self.durable:
+                os.fsync(self._file.fileno())
+
+    def scan(self, kind=None, start=0, session_only=False):
+        """
+        Records in log order.
+
+        Args:
+            kind: Only records of this kind ('execution', 'conversation', 'state', 'span')
+            start: Skip this many matching records
+            session_only: Only records appended through this backend object
+
+        Yields:
+            dict: Stored records, payload references unresolved
+        """
+        with self._lock:
+            segments = list(self._session_segments) if session_only else self._segments()
+        for segment in segments:
+            with open(segment) as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    if kind is not None and record.get('kind') != kind:
+                        continue
+                    if start:
+                        start -= 1
+                        continue
+                    yield record
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+class SqliteBackend:
+    """Records and payloads in one SQLite database"""
+
+    def __init__(self, path, durable=False):
+        """
+        Args:
+            path: Database file
+            durable: synchronous=FULL instead of NORMAL
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        # Records are logged from the scheduler's worker threads; the lock serializes them
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(f"PRAGMA synchronous={'FULL' if durable else 'NORMAL'}")
+        self._db.execute("CREATE TABLE IF NOT EXISTS records "
+                         "(seq INTEGER PRIMARY KEY AUTOINCREMENT, kind TEXT, body TEXT)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS records_kind ON records (kind, seq)")
+        self._db.execute("CREATE TABLE IF NOT EXISTS payloads (digest TEXT PRIMARY KEY, data TEXT)")
+        # Records after this seq were appended by this session
+        self._session_start = self._db.execute("SELECT COALESCE(MAX(seq), 0) FROM records").fetchone()[0]
+
+    def put_payload(self, digest, text):
+        with self._lock:
+            self._db.execute("INSERT OR IGNORE INTO payloads VALUES (?, ?)", (digest, text))
+
+    def get_payload(self, digest):
+        with self._lock:
+            row = self._db.execute("SELECT data FROM payloads WHERE digest = ?", (digest,)).fetchone()
+        if row is None:
+            raise KeyError(digest)
+        return row[0]
+
+    def append(self, record):
+        body = json.dumps(record, default=str)
+        with self._lock:
+            self._db.execute("INSERT INTO records (kind, body) VALUES (?, ?)", (record.get('kind'), body))
+
+    def scan(self, kind=None, start=0, session_only=False, page_size=500):
+        """Records in log order, fetched page_size rows at a time (see JsonlBackend.scan)"""
+        last = self._session_start if session_only else 0
+        while True:
+            query = "SELECT seq, body FROM records WHERE seq > ?"
+            params = [last]
+            if kind is not None:
+                query += " AND kind = ?"
+                params.append(kind)
+            query += " ORDER BY seq LIMIT ? OFFSET ?"
+            params += [page_size, start]
+            with self._lock:
+                rows = self._db.execute(query, params).fetchall()
+            if not rows:
+                return
+            start = 0
+            last = rows[-1][0]
+            for _, body in rows:
+                yield json.loads(body)
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+def open_backend(path, backend=None, **options):
+    """
+    Open a backend at path.
+
+    Args:
+        path: Directory (JSONL) or .db/.sqlite/.sqlite3 file (SQLite)
+        backend: 'jsonl' or 'sqlite'; guessed from path when None
+
+    Returns:
+        JsonlBackend or SqliteBackend
+    """
+    if backend is None:
+        backend = 'sqlite' if Path(path).suffix in ('.db', '.sqlite', '.sqlite3') else 'jsonl'
+    if backend == 'sqlite':
+        return SqliteBackend(path, **options)
+    if backend == 'jsonl':
+        return JsonlBackend(path, **options)
+    raise ValueError(f"Unknown memory backend: {backend}")
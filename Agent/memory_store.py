@@ -1,56 +1,183 @@
 import json
+import threading
+import uuid
+from collections import deque
 from pathlib import Path
 from datetime import datetime
 
+from memory_backends import PAYLOAD_REF, open_backend, payload_digest
+
 class MemoryStore:
-    def __init__(self):
+    def __init__(self,path=None,backend=None,window=200,payload_min_bytes=256,durable=False):
+        # Without a path nothing is persisted, so the whole history stays in memory
+        self.backend=open_backend(path,backend,durable=durable) if path else None
+        self.window_size=window
+        self.window=window if self.backend else None
+        self.payload_min_bytes=payload_min_bytes
         self.state={}
-        self.conversation_history=[]
-        self.execution_log=[]
+        self.conversation_history=deque(maxlen=self.window)
+        self.execution_log=deque(maxlen=self.window)
+        self.span_log=deque(maxlen=self.window)
+        self.conversation_count=0
+        self.execution_count=0
+        self.span_count=0
         self.created_at=datetime.now().isoformat()
-    
+        self.session=uuid.uuid4().hex[:12]
+        # A store opened on an existing log starts a new session; load() takes in the earlier ones
+        self._session_only=True
+        self._lock=threading.Lock()
+
     def store(self,key,value):
         self.state[key]=value
-    
+        self._append('state',{'key':key,'value':value})
+
     def get(self,key,default=None):
         return self.state.get(key,default)
-    
+
     def add_conversation(self,user_msg,agent_msg):
-        self.conversation_history.append({
+        entry={
             'timestamp':datetime.now().isoformat(),
+            'session':self.session,
             'user':user_msg,
             'agent':agent_msg
-        })
-    
-    def log_execution(self,step,code,result):
-        self.execution_log.append(
-            {
-                'timestamp':datetime.now().isoformat(),
-                "step":step,
-                'code':code,
-                'result':result
-            }
-        )
-    
-    def save(self,file_path):
-        data={
-            'created_at':self.created_at,
-            'state':self.state,
-            'conversations':self.conversation_history,
-            'executions':self.execution_log
         }
+        with self._lock:
+            self.conversation_history.append(entry)
+            self.conversation_count+=1
+        self._append('conversation',entry)
+
+    def log_execution(self,step,code,result,action=None,description=None):
+        entry={
+            'timestamp':datetime.now().isoformat(),
+            'session':self.session,
+            "step":step,
+            'action':action,
+            'description':description,
+            'code':code,
+            'result':result
+        }
+        with self._lock:
+            self.execution_log.append(entry)
+            self.execution_count+=1
+        self._append('execution',entry)
+
+    def log_span(self,record):
+        # Sink of a tracing.Tracer; records are small, so nothing is externalized
+        with self._lock:
+            self.span_log.append(record)
+            self.span_count+=1
+        if self.backend:
+            self.backend.append({'kind':'span',**record})
+
+    def _logs(self):
+        return {'execution':self.execution_log,'conversation':self.conversation_history,'span':self.span_log}
+
+    def _append(self,kind,entry):
+        if self.backend:
+            self.backend.append({'kind':kind,**self._externalize(entry)})
+
+    def _externalize(self,value):
+        # Large strings go to the payload store once per content hash
+        if isinstance(value,str) and len(value)>=self.payload_min_bytes:
+            digest=payload_digest(value)
+            self.backend.put_payload(digest,value)
+            return {PAYLOAD_REF:digest}
+        if isinstance(value,dict):
+            return {k:self._externalize(v) for k,v in value.items()}
+        if isinstance(value,(list,tuple)):
+            return [self._externalize(v) for v in value]
+        return value
+
+    def _resolve(self,value):
+        if isinstance(value,dict):
+            if len(value)==1 and PAYLOAD_REF in value:
+                return self.backend.get_payload(value[PAYLOAD_REF])
+            return {k:self._resolve(v) for k,v in value.items()}
+        if isinstance(value,list):
+            return [self._resolve(v) for v in value]
+        return value
 
+    def _entry(self,record):
+        entry=self._resolve(record)
+        del entry['kind']
+        return entry
+
+    def history(self,kind='execution',start=0):
+        """
+        Lazily page through logged entries, oldest first.
+
+        Only this session's entries, unless earlier ones were taken in with
+        load(), so history agrees with the counts and state.
+
+        Args:
+            kind: 'execution', 'conversation' or 'span'
+            start: Index of the first entry to yield
+
+        Yields:
+            dict: Entries with their code/output payloads restored
+        """
+        if not self.backend:
+            yield from list(self._logs()[kind])[start:]
+            return
+        for record in self.backend.scan(kind,start,session_only=self._session_only):
+            yield self._entry(record)
+
+    def save(self,file_path):
+        # Streams the full history, so the snapshot never has to fit in memory
         with open(file_path,'w') as f:
-            json.dump(data,f,indent=2)
-        
-        print(f"Memory saved at{file_path}")
-    
+            f.write('{\n  "created_at": '+json.dumps(self.created_at))
+            f.write(',\n  "state": '+json.dumps(self.state,default=str))
+            for key,kind in (('conversations','conversation'),('executions','execution'),('spans','span')):
+                f.write(f',\n  "{key}": [')
+                for i,entry in enumerate(self.history(kind)):
+                    f.write((',' if i else '')+'\n    '+json.dumps(entry,default=str))
+                f.write('\n  ]')
+            f.write('\n}\n')
+
+        print(f"Memory saved at {file_path}")
+
     def load(self,file_path):
+        path=Path(file_path)
+        if path.is_dir() or path.suffix in ('.db','.sqlite','.sqlite3'):
+            return self._load_backend(path)
+
+        # JSON snapshot written by save()
         with open(file_path) as f:
             data=json.load(f)
-        
+
         self.created_at=data.get('created_at')
         self.state=data.get('state')
-        self.conversation_history=data.get('conversations')
-        self.execution_log=data.get('executions',[])
+        self.conversation_history=deque(data.get('conversations',[]),maxlen=self.window)
+        self.execution_log=deque(data.get('executions',[]),maxlen=self.window)
+        self.span_log=deque(data.get('spans',[]),maxlen=self.window)
+        self.conversation_count=len(data.get('conversations',[]))
+        self.execution_count=len(data.get('executions',[]))
+        self.span_count=len(data.get('spans',[]))
+
+    def _load_backend(self,path):
+        # One pass over the records: state is replayed, only the last window of entries is kept
+        if self.backend:
+            self.backend.close()
+        self.backend=open_backend(path)
+        self._session_only=False
+        self.window=self.window_size
+        recent={kind:deque(maxlen=self.window) for kind in ('execution','conversation','span')}
+        counts={kind:0 for kind in recent}
+        self.state={}
+        for record in self.backend.scan():
+            kind=record.get('kind')
+            if kind=='state':
+                self.state[record['key']]=self._resolve(record['value'])
+            elif kind in recent:
+                recent[kind].append(record)
+                counts[kind]+=1
+        self.execution_log=deque((self._entry(r) for r in recent['execution']),maxlen=self.window)
+        self.conversation_history=deque((self._entry(r) for r in recent['conversation']),maxlen=self.window)
+        self.span_log=deque((self._entry(r) for r in recent['span']),maxlen=self.window)
+        self.execution_count=counts['execution']
+        self.conversation_count=counts['conversation']
+        self.span_count=counts['span']
 
+    def close(self):
+        if self.backend:
+            self.backend.close()
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+merge_model.py
+Merged Model - Folds the LoRA adapter into the base weights for CPU inference
+
+Merging removes the per-forward adapter overhead on the q/k/v/o projections;
+dynamic int8 quantization of the Linear layers then cuts CPU latency and
+resident memory further. The artifact is saved once and loaded directly by
+later runs (HFBackend(merged_path=...)).
+
+Usage:
+    python merge_model.py merge --adapter ../openroad_mistral_7b_finetuned \
+        --out ../merged_int8 --quantize int8
+    python merge_model.py check --adapter ../openroad_mistral_7b_finetuned \
+        --merged ../merged_int8
+"""
+import argparse
+import json
+import time
+from pathlib import Path
+
+import torch
+from transformers import AutoConfig, AutoModelForCausalLM, AutoTokenizer
+
+from generation_cache import adapter_config_hash
+
+DEFAULT_BASE = "mistralai/Mistral-7B-Instruct-v0.2"
+MERGE_INFO = "merge_info.json"
+QUANTIZED_WEIGHTS = "quantized_state_dict.pt"
+
+CHECK_PROMPTS = [
+    "<s>[INST] Write OpenROAD Python code to: Read Verilog, LEF, LIB files [/INST]",
+    "<s>[INST] Write OpenROAD Python code to: Clock tree synthesis [/INST]",
+    "<s>[INST] You are an openroad expert openroad assistant. What is floorplanning in OpenROAD?[/INST]",
+]
+
+
+def _quantize(model):
+    """Dynamic int8 quantization of every Linear layer"""
+    return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def _empty_quantized(model):
+    """Swap every Linear of a model built without weights for an int8 one for load_state_dict to fill"""
+    from torch.ao.nn.quantized.dynamic import Linear as QuantizedLinear
+
+    for module in list(model.modules()):
+        for name, child in list(module.named_children()):
+            if type(child) is torch.nn.Linear:
+                setattr(module, name, QuantizedLinear(child.in_features, child.out_features,
+                                                      bias_=child.bias is not None, dtype=torch.qint8))
+    return model
+
+
+def _load_unmerged(base_model_path, adapter_path):
+    from peft import PeftModel
+
+    base = AutoModelForCausalLM.from_pretrained(base_model_path, torch_dtype=torch.float32)
+    model = PeftModel.from_pretrained(base, adapter_path, is_trainable=False)
+    return model.eval()
+
+
+def merge_adapter(base_model_path, adapter_path, output_dir, quantize=None):
+    """
+    Merge a LoRA adapter into its base model and save the result.
+
+    Args:
+        base_model_path: Base model name or path
+        adapter_path: LoRA adapter directory
+        output_dir: Where to write the merged artifact
+        quantize: None, or 'int8' for dynamic int8 Linear layers
+
+    Returns:
+        Path: output_dir
+    """
+    if quantize not in (None, 'int8'):
+        raise ValueError(f"Unsupported quantization: {quantize}")
+
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    print(f"Merging {adapter_path} into {base_model_path}")
+    # CPU matmuls are poorly supported in fp16, so merge and run in fp32
+    model = _load_unmerged(base_model_path, adapter_path).merge_and_unload()
+    tokenizer = AutoTokenizer.from_pretrained(base_model_path, use_fast=False)
+    tokenizer.save_pretrained(output_dir)
+
+    if quantize == 'int8':
+        model.config.save_pretrained(output_dir)
+        model = _quantize(model)
+        torch.save(model.state_dict(), output_dir / QUANTIZED_WEIGHTS)
+    else:
+        model.save_pretrained(output_dir)
+
+    with open(output_dir / MERGE_INFO, 'w') as f:
+        json.dump({
+            'base_model': str(base_model_path),
+            'adapter': str(adapter_path),
+            'adapter_hash': adapter_config_hash(adapter_path),
+            'quantize': quantize,
+            'torch_version': torch.__version__
+        }, f, indent=2)
+
+    print(f"Merged model saved at {output_dir}")
+    return output_dir
+
+
+def load_merged(merged_path):
+    """
+    Load a merged (optionally quantized) artifact for CPU inference.
+
+    Args:
+        merged_path: Directory written by merge_adapter
+
+    Returns:
+        tuple: (model, tokenizer)
+    """
+    merged_path = Path(merged_path)
+    with open(merged_path / MERGE_INFO) as f:
+        info = json.load(f)
+
+    tokenizer = AutoTokenizer.from_pretrained(merged_path, use_fast=False)
+
+    if info['quantize'] == 'int8':
+        from accelerate import init_empty_weights
+
+        # Rebuild the quantized module structure on the meta device, so the
+        # fp32 weights are never allocated, then assign the saved weights
+        config = AutoConfig.from_pretrained(merged_path)
+        with init_empty_weights():
+            model = AutoModelForCausalLM.from_config(config, torch_dtype=torch.float32)
+        model = _empty_quantized(model)
+        model.load_state_dict(torch.load(merged_path / QUANTIZED_WEIGHTS, weights_only=False), assign=True)
+        model.tie_weights()
+    else:
+        model = AutoModelForCausalLM.from_pretrained(merged_path, torch_dtype=torch.float32)
+
+    return model.eval(), tokenizer
+
+
+def _teacher_forced_logprobs(model, input_ids, prompt_len):
+    """Log-probs and argmax of every generated position of input_ids"""
+    with torch.no_grad():
+        logits = model(input_ids=input_ids).logits[0, prompt_len - 1:-1].float()
+    logprobs = torch.log_softmax(logits, dim=-1)
+    targets = input_ids[0, prompt_len:]
+    return logprobs.gather(1, targets.unsqueeze(1)).squeeze(1), logits.argmax(dim=-1)
+
+
+def quality_check(base_model_path, adapter_path, merged_path, prompts=None, max_new_tokens=64):
+    """
+    Compare a merged artifact against the unmerged base + adapter.
+
+    The unmerged model greedily generates a reference answer per prompt.
+    Both models then score that reference with teacher forcing, giving
+    top-1 agreement (share of positions where both pick the same token) and
+    the mean absolute log-prob difference, plus per-token decode latency.
+
+    Returns:
+        dict: Aggregate and per-prompt results
+    """
+    prompts = prompts or CHECK_PROMPTS
+    reference = _load_unmerged(base_model_path, adapter_path)
+    merged, tokenizer = load_merged(merged_path)
+
+    results = []
+    for prompt in prompts:
+        input_ids = tokenizer(prompt, return_tensors="pt").input_ids
+        prompt_len = input_ids.shape[1]
+
+        timings = {}
+        outputs = {}
+        for name, model in (('unmerged', reference), ('merged', merged)):
+            start = time.perf_counter()
+            with torch.no_grad():
+                outputs[name] = model.generate(
+                    input_ids=input_ids,
+                    max_new_tokens=max_new_tokens,
+                    do_sample=False,
+                    pad_token_id=tokenizer.eos_token_id
+                )
+            generated = max(outputs[name].shape[1] - prompt_len, 1)
+            timings[name] = (time.perf_counter() - start) / generated
+
+        sequence = outputs['unmerged']
+        if sequence.shape[1] == prompt_len:
+            continue
+        ref_logprobs, ref_top1 = _teacher_forced_logprobs(reference, sequence, prompt_len)
+        new_logprobs, new_top1 = _teacher_forced_logprobs(merged, sequence, prompt_len)
+
+        results.append({
+            'prompt': prompt,
+            'top1_agreement': float((ref_top1 == new_top1).float().mean()),
+            'mean_abs_logprob_diff': float((ref_logprobs - new_logprobs).abs().mean()),
+            'greedy_output_identical': bool(torch.equal(outputs['unmerged'], outputs['merged'])),
+            'seconds_per_token_unmerged': round(timings['unmerged'], 4),
+            'seconds_per_token_merged': round(timings['merged'], 4)
+        })
+
+    count = len(results) or 1
+    return {
+        'merged_path': str(merged_path),
+        'top1_agreement': sum(r['top1_agreement'] for r in results) / count,
+        'mean_abs_logprob_diff': sum(r['mean_abs_logprob_diff'] for r in results) / count,
+        'identical_outputs': sum(r['greedy_output_identical'] for r in results),
+        'prompts': results
+    }
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Merge and quantize the LoRA adapter for CPU inference")
+    subparsers = arg_parser.add_subparsers(dest="command", required=True)
+
+    merge_cmd = subparsers.add_parser("merge", help="Write a merged artifact")
+    merge_cmd.add_argument("--base", default=DEFAULT_BASE)
+    merge_cmd.add_argument("--adapter", required=True)
+    merge_cmd.add_argument("--out", required=True)
+    merge_cmd.add_argument("--quantize", choices=["int8"], default=None)
+
+    check_cmd = subparsers.add_parser("check", help="Compare a merged artifact with base + adapter")
+    check_cmd.add_argument("--base", default=DEFAULT_BASE)
+    check_cmd.add_argument("--adapter", required=True)
+    check_cmd.add_argument("--merged", required=True)
+    check_cmd.add_argument("--max-new-tokens", type=int, default=64)
+
+    args = arg_parser.parse_args()
+    if args.command == "merge":
+        merge_adapter(args.base, args.adapter, args.out, args.quantize)
+    else:
+        print(json.dumps(quality_check(args.base, args.adapter, args.merged,
+                                       max_new_tokens=args.max_new_tokens), indent=2))
@@ -2,108 +2,267 @@
 """
 metrics_parser.py
 Metrics Parser - Extracts metrics from OpenROAD reports
+
+Each report kind has one combined pattern, so a report is scanned once for
+all of its fields. Report files are memory-mapped (or read in chunks when
+they cannot be mapped), and the scan stops as soon as every summary field
+has been found.
 """
 
+import mmap
+import os
 import re
 import json
 
 
+def _any_case(word):
+    """Character classes matching word in any letter case"""
+    return b"".join(b"[%s%s]" % (bytes([c]).lower(), bytes([c]).upper()) for c in word)
+
+
+def _colon_anchored(*fields):
+    """
+    One pattern for several "Keyword: value" fields.
+
+    The pattern starts with the literal colon and checks the keyword with a
+    lookbehind, so the regex engine can skip between colons with a fast
+    literal search instead of trying every alternative at every byte.
+
+    Args:
+        *fields: (metric name, keyword regex, value regex) tuples
+    """
+    return re.compile(b":(?:" + b"|".join(
+        b"(?<=%s:)\\s*(?P<%s>%s)" % (keyword, name.encode(), value)
+        for name, keyword, value in fields
+    ) + b")")
+
+
+# Report kind -> one combined pattern with a named group per metric.
+# The first occurrence of each metric wins.
+REPORT_PATTERNS = {
+    'timing': _colon_anchored(
+        ('wns', b'WNS', rb'[-\d.]+'),
+        ('tns', b'TNS', rb'[-\d.]+'),
+        ('timing_violations', _any_case(b'violations'), rb'\d+'),
+    ),
+    'congestion': _colon_anchored(
+        ('max_congestion', b'Max', rb'\d+(?=%)'),
+        ('avg_congestion', b'Avg', rb'\d+(?=%)'),
+    ),
+    'drc': _colon_anchored(
+        ('drc_violations', _any_case(b'violations'), rb'\d+'),
+    ),
+}
+
+METRIC_TYPES = {
+    'wns': float,
+    'tns': float,
+    'timing_violations': int,
+    'max_congestion': int,
+    'avg_congestion': int,
+    'drc_violations': int,
+}
+
+CHUNK_SIZE = 8 * 1024 * 1024
+# Longest match (keyword included) we expect; chunks overlap so no match is split
+MAX_MATCH_BYTES = 256
+
+
 class MetricsParser:
     """Parses OpenROAD report files"""
-    
+
+    def _collect(self, pattern, matches, metrics):
+        """
+        Record the first value of every field from an iterator of matches.
+
+        Returns:
+            bool: True once every field of the pattern has a value
+        """
+        fields = pattern.groupindex.keys()
+        for match in matches:
+            name = match.lastgroup
+            if name not in metrics:
+                metrics[name] = METRIC_TYPES[name](match.group(name))
+                if len(metrics) == len(fields):
+                    return True
+        return False
+
+    def parse_text(self, report_text, kind):
+        """
+        Parse one report held in memory.
+
+        Args:
+            report_text: Report content (str or bytes)
+            kind: 'timing', 'congestion' or 'drc'
+
+        Returns:
+            dict: Metrics found in the report
+        """
+        if isinstance(report_text, str):
+            report_text = report_text.encode(errors='replace')
+        pattern = REPORT_PATTERNS[kind]
+        metrics = {}
+        self._collect(pattern, pattern.finditer(report_text), metrics)
+        return metrics
+
+    def parse_file(self, path, kind):
+        """
+        Parse a report file without reading it into memory.
+
+        The file is memory-mapped and scanned once; scanning stops at the
+        point where the last missing summary field is found.
+
+        Args:
+            path: Report file path
+            kind: 'timing', 'congestion' or 'drc'
+
+        Returns:
+            dict: Metrics found in the report
+        """
+        pattern = REPORT_PATTERNS[kind]
+        metrics = {}
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return metrics
+            try:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except (OSError, ValueError):
+                # Not mappable (pipe, special file): fall back to chunked reads
+                return self.parse_stream(f, kind)
+            with mapped:
+                self._collect(pattern, pattern.finditer(mapped), metrics)
+        return metrics
+
+    def parse_stream(self, stream, kind, chunk_size=CHUNK_SIZE):
+        """
+        Parse a binary stream in fixed-size chunks.
+
+        Consecutive chunks overlap by MAX_MATCH_BYTES; a match is only
+        accepted once it ends before the overlap (or at end of stream), so a
+        value split across two chunks is never read half-way.
+
+        Args:
+            stream: Binary file-like object
+            kind: 'timing', 'congestion' or 'drc'
+            chunk_size: Bytes read per chunk
+
+        Returns:
+            dict: Metrics found in the stream
+        """
+        pattern = REPORT_PATTERNS[kind]
+        metrics = {}
+        carry = b""
+        while True:
+            chunk = stream.read(chunk_size)
+            at_end = not chunk
+            buffer = carry + chunk
+            limit = len(buffer) if at_end else len(buffer) - MAX_MATCH_BYTES
+
+            complete = (match for match in pattern.finditer(buffer) if match.end() <= limit)
+            if self._collect(pattern, complete, metrics) or at_end:
+                return metrics
+            # Keep enough to re-scan any match that ended past the limit, keyword included
+            carry = buffer[max(limit - 2 * MAX_MATCH_BYTES, 0):]
+
     def parse_timing(self, report_text):
         """
         Parse timing report.
-        
+
         Args:
             report_text: Timing report content
-            
+
         Returns:
             dict: Timing metrics
         """
-        metrics = {}
-        
-        # WNS (Worst Negative Slack)
-        wns_match = re.search(r'WNS:\s*([-\d.]+)', report_text)
-        if wns_match:
-            metrics['wns'] = float(wns_match.group(1))
-        
-        # TNS (Total Negative Slack)
-        tns_match = re.search(r'TNS:\s*([-\d.]+)', report_text)
-        if tns_match:
-            metrics['tns'] = float(tns_match.group(1))
-        
-        # Violations
-        viol_match = re.search(r'violations:\s*(\d+)', report_text, re.IGNORECASE)
-        if viol_match:
-            metrics['timing_violations'] = int(viol_match.group(1))
-        
-        return metrics
-    
+        return self.parse_text(report_text, 'timing')
+
     def parse_congestion(self, report_text):
         """
         Parse congestion report.
-        
+
         Args:
             report_text: Congestion report
-            
+
         Returns:
             dict: Congestion metrics
         """
-        metrics = {}
-        
-        # Max congestion
-        max_match = re.search(r'Max:\s*(\d+)%', report_text)
-        if max_match:
-            metrics['max_congestion'] = int(max_match.group(1))
-        
-        # Average
-        avg_match = re.search(r'Avg:\s*(\d+)%', report_text)
-        if avg_match:
-            metrics['avg_congestion'] = int(avg_match.group(1))
-        
-        return metrics
-    
+        return self.parse_text(report_text, 'congestion')
+
     def parse_drc(self, report_text):
         """
         Parse DRC report.
-        
+
         Args:
             report_text: DRC report
-            
+
         Returns:
             dict: DRC metrics
         """
-        metrics = {}
-        
-        # Total violations
-        viol_match = re.search(r'Violations:\s*(\d+)', report_text, re.IGNORECASE)
-        if viol_match:
-            metrics['drc_violations'] = int(viol_match.group(1))
-        
-        return metrics
-    
+        return self.parse_text(report_text, 'drc')
+
+    def parse_timing_paths(self, report):
+        """
+        Parse a full report_checks path report into columns.
+
+        Args:
+            report: Report text, or a pathlib.Path / os.PathLike to the file
+
+        Returns:
+            TimingPaths: One row per path, with vectorized queries
+        """
+        from timing_paths import TimingPaths
+
+        if isinstance(report, os.PathLike):
+            return TimingPaths.from_file(report)
+        return TimingPaths.from_text(report)
+
+    def parse_congestion_grid(self, report):
+        """
+        Parse a per-gcell usage/capacity dump into a congestion grid.
+
+        Args:
+            report: Dump text, or a pathlib.Path / os.PathLike to the file
+
+        Returns:
+            CongestionMap: (layer, y, x) arrays with hotspot and region queries
+        """
+        from congestion_map import CongestionMap
+
+        if isinstance(report, os.PathLike):
+            return CongestionMap.from_file(report)
+        return CongestionMap.from_text(report)
+
     def parse_all(self, reports):
         """
         Parse all report types.
-        
+
         Args:
-            reports: Dict of {report_type: content}
-            
+            reports: Dict of {report_type: content}; a pathlib.Path or
+                     os.PathLike value is parsed from the file. A
+                     'timing_paths' report adds path-level metrics
+                     (worst endpoints, TNS per clock group), a
+                     'congestion_grid' dump adds overflow per layer and
+                     congestion hotspots.
+
         Returns:
             dict: All parsed metrics
         """
         all_metrics = {}
-        
-        if 'timing' in reports:
-            all_metrics.update(self.parse_timing(reports['timing']))
-        
-        if 'congestion' in reports:
-            all_metrics.update(self.parse_congestion(reports['congestion']))
-        
-        if 'drc' in reports:
-            all_metrics.update(self.parse_drc(reports['drc']))
-        
-        return all_metrics
 
+        # Summary lines of 'timing' and 'congestion' reports take precedence
+        # over totals computed from paths and grids
+        if 'timing_paths' in reports:
+            all_metrics.update(self.parse_timing_paths(reports['timing_paths']).summary())
+        if 'congestion_grid' in reports:
+            all_metrics.update(self.parse_congestion_grid(reports['congestion_grid']).summary())
 
+        for kind in ('timing', 'congestion', 'drc'):
+            if kind not in reports:
+                continue
+            report = reports[kind]
+            if isinstance(report, os.PathLike):
+                all_metrics.update(self.parse_file(report, kind))
+            else:
+                all_metrics.update(self.parse_text(report, kind))
+
+        return all_metrics
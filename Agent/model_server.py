@@ -0,0 +1,383 @@
+#!/usr/bin/env python3
+"""
+model_server.py
+Model Server - One shared model instance serving many agents over localhost HTTP
+
+Requests are scheduled with continuous batching: every decode step runs one
+forward pass over all active sequences, finished sequences leave the batch
+and queued requests join it between steps, each with its own sampling
+parameters.
+
+Usage:
+    python model_server.py --base mistralai/Mistral-7B-Instruct-v0.2 \
+        --adapter ../openroad_mistral_7b_finetuned --port 8765
+
+Agents connect with backends.RemoteBackend("http://127.0.0.1:8765").
+"""
+import argparse
+import json
+import queue
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import torch
+import torch.nn.functional as F
+
+from backends import HFBackend
+from stopping import make_scanner
+
+
+def _to_legacy(past_key_values):
+    """Cache object -> tuple of (key, value) per layer, each (batch, heads, len, dim)"""
+    if hasattr(past_key_values, 'to_legacy_cache'):
+        return past_key_values.to_legacy_cache()
+    return past_key_values
+
+
+def _from_legacy(past):
+    from transformers import DynamicCache
+    return DynamicCache.from_legacy_cache(past)
+
+
+def _left_pad(past, pad):
+    """Prepend pad empty positions to every layer of a legacy cache"""
+    return tuple(
+        (F.pad(key, (0, 0, pad, 0)), F.pad(value, (0, 0, pad, 0)))
+        for key, value in past
+    )
+
+
+class GenerationRequest:
+    """One prompt waiting for, or being decoded in, the batch"""
+
+    def __init__(self, prompt, params):
+        self.prompt = prompt
+        self.params = params
+        self.max_new_tokens = params.get('max_new_tokens', 256)
+        self.scanner = make_scanner(params.get('stop'))
+        self.constraint = None
+        self.generated = []
+
+        self.completion = None
+        self.error = None
+        self.done = threading.Event()
+        self.submitted_at = time.perf_counter()
+        self.first_token_at = None
+
+    def wait(self, timeout=None):
+        if not self.done.wait(timeout):
+            raise TimeoutError("Generation request timed out")
+        if self.error:
+            raise RuntimeError(self.error)
+        return self.completion
+
+
+class ContinuousBatcher:
+    """Decodes all active requests together, admitting new ones every step"""
+
+    def __init__(self, backend, max_batch_size=8):
+        """
+        Args:
+            backend: HFBackend holding the shared model
+            max_batch_size: Maximum sequences decoded together
+        """
+        self.backend = backend
+        self.max_batch_size = max_batch_size
+
+        self._queue = queue.Queue()
+        self._active = []
+        self._tokens = []
+        self._past = None
+        self._mask = None
+
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+
+        self.requests_completed = 0
+        self.tokens_generated = 0
+        self.steps = 0
+        self.batch_rows = 0
+        self.max_batch_seen = 0
+        self.busy_seconds = 0.0
+
+    def start(self):
+        self.backend.load()
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._thread.join()
+
+    def submit(self, prompt, params):
+        """Queue a prompt; returns a GenerationRequest to wait on"""
+        request = GenerationRequest(prompt, params)
+        self._queue.put(request)
+        return request
+
+    def _loop(self):
+        while not self._stopped.is_set():
+            self._admit()
+            if not self._active:
+                continue
+
+            start = time.perf_counter()
+            try:
+                self._step()
+            except Exception as e:
+                self._fail_active(f"Decode step failed: {e}")
+            self.busy_seconds += time.perf_counter() - start
+
+    def _admit(self):
+        """Prefill queued requests into free batch slots"""
+        while len(self._active) < self.max_batch_size:
+            try:
+                # Block briefly only when idle, otherwise keep decoding
+                request = self._queue.get(timeout=0.05) if not self._active else self._queue.get_nowait()
+            except queue.Empty:
+                return
+
+            start = time.perf_counter()
+            try:
+                self._prefill(request)
+            except Exception as e:
+                request.error = f"Prefill failed: {e}"
+                request.done.set()
+            self.busy_seconds += time.perf_counter() - start
+
+    def _prefill(self, request):
+        model = self.backend.model
+        tokenizer = self.backend.tokenizer
+
+        if request.params.get('grammar'):
+            from json_grammar import PlanConstraint, TokenAutomaton
+            request.constraint = PlanConstraint(TokenAutomaton.for_tokenizer(tokenizer), request.max_new_tokens)
+
+        input_ids = tokenizer(request.prompt, return_tensors="pt").input_ids.to(model.device)
+        with torch.no_grad():
+            outputs = model(input_ids=input_ids, use_cache=True)
+
+        token = self._sample(outputs.logits[0, -1], request)
+        request.first_token_at = time.perf_counter()
+        if self._append(request, token):
+            return
+
+        self._merge(_to_legacy(outputs.past_key_values), torch.ones_like(input_ids), request, token)
+
+    def _merge(self, past, mask, request, token):
+        """Add one prefilled sequence to the batch, left padding the shorter side"""
+        if self._past is None:
+            self._past, self._mask = past, mask
+        else:
+            batch_len, new_len = self._mask.shape[1], mask.shape[1]
+            if new_len < batch_len:
+                past = _left_pad(past, batch_len - new_len)
+                mask = F.pad(mask, (batch_len - new_len, 0))
+            elif new_len > batch_len:
+                self._past = _left_pad(self._past, new_len - batch_len)
+                self._mask = F.pad(self._mask, (new_len - batch_len, 0))
+
+            self._past = tuple(
+                (torch.cat([key, new_key]), torch.cat([value, new_value]))
+                for (key, value), (new_key, new_value) in zip(self._past, past)
+            )
+            self._mask = torch.cat([self._mask, mask])
+
+        self._active.append(request)
+        self._tokens.append(token)
+
+    def _step(self):
+        """One forward pass over every active sequence"""
+        model = self.backend.model
+        batch_size = len(self._active)
+
+        input_ids = torch.tensor(self._tokens, device=model.device).unsqueeze(1)
+        # Left padding: a token's position is the number of real tokens before it
+        position_ids = self._mask.sum(dim=1, keepdim=True)
+        attention_mask = F.pad(self._mask, (0, 1), value=1)
+
+        with torch.no_grad():
+            outputs = model(
+                input_ids=input_ids,
+                attention_mask=attention_mask,
+                position_ids=position_ids,
+                past_key_values=_from_legacy(self._past),
+                use_cache=True
+            )
+
+        self._past = _to_legacy(outputs.past_key_values)
+        self._mask = attention_mask
+        self.steps += 1
+        self.batch_rows += batch_size
+        self.max_batch_seen = max(self.max_batch_seen, batch_size)
+
+        finished = []
+        for row, request in enumerate(self._active):
+            token = self._sample(outputs.logits[row, -1], request)
+            self._tokens[row] = token
+            if self._append(request, token):
+                finished.append(row)
+
+        if finished:
+            self._drop(finished)
+
+    def _sample(self, logits, request):
+        """Pick the next token with this request's own sampling parameters and grammar"""
+        params = request.params
+        if request.constraint is not None:
+            logits = request.constraint.apply(logits.clone())
+
+        token = self._choose(logits, params)
+        if request.constraint is not None:
+            request.constraint.advance(token)
+        return token
+
+    def _choose(self, logits, params):
+        if not params.get('do_sample'):
+            return int(torch.argmax(logits))
+
+        probs = torch.softmax(logits.float() / (params.get('temperature') or 1.0), dim=-1)
+        top_p = params.get('top_p', 1.0)
+        if top_p < 1.0:
+            sorted_probs, indices = torch.sort(probs, descending=True)
+            cumulative = torch.cumsum(sorted_probs, dim=-1)
+            sorted_probs[cumulative - sorted_probs > top_p] = 0
+            choice = torch.multinomial(sorted_probs / sorted_probs.sum(), 1)
+            return int(indices[choice])
+
+        return int(torch.multinomial(probs, 1))
+
+    def _append(self, request, token):
+        """Record a sampled token; returns True when the request is finished"""
+        tokenizer = self.backend.tokenizer
+        if token != tokenizer.eos_token_id:
+            request.generated.append(token)
+            self.tokens_generated += 1
+            structure_done = request.scanner is not None and request.scanner.feed(
+                tokenizer.decode(request.generated, skip_special_tokens=True)
+            )
+            if len(request.generated) < request.max_new_tokens and not structure_done:
+                return False
+
+        request.completion = tokenizer.decode(request.generated, skip_special_tokens=True).strip()
+        request.done.set()
+        self.requests_completed += 1
+        return True
+
+    def _drop(self, rows):
+        """Remove finished rows and trim padding no remaining row needs"""
+        keep = [row for row in range(len(self._active)) if row not in rows]
+        self._active = [self._active[row] for row in keep]
+        self._tokens = [self._tokens[row] for row in keep]
+
+        if not keep:
+            self._past, self._mask = None, None
+            return
+
+        index = torch.tensor(keep, device=self._mask.device)
+        mask = self._mask.index_select(0, index)
+        lead = int((mask.sum(dim=0) == 0).long().cumprod(dim=0).sum())
+
+        self._mask = mask[:, lead:]
+        self._past = tuple(
+            (key.index_select(0, index)[:, :, lead:], value.index_select(0, index)[:, :, lead:])
+            for key, value in self._past
+        )
+
+    def _fail_active(self, message):
+        for request in self._active:
+            request.error = message
+            request.done.set()
+        self._active, self._tokens = [], []
+        self._past, self._mask = None, None
+
+    def stats(self):
+        return {
+            'active': len(self._active),
+            'queued': self._queue.qsize(),
+            'requests_completed': self.requests_completed,
+            'tokens_generated': self.tokens_generated,
+            'decode_steps': self.steps,
+            'avg_batch_size': round(self.batch_rows / self.steps, 2) if self.steps else 0.0,
+            'max_batch_size': self.max_batch_seen,
+            'tokens_per_second': round(self.tokens_generated / self.busy_seconds, 2) if self.busy_seconds else 0.0
+        }
+
+
+class _Handler(BaseHTTPRequestHandler):
+
+    def _respond(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == '/stats':
+            self._respond(200, self.server.batcher.stats())
+        else:
+            self._respond(404, {'error': f'Unknown path {self.path}'})
+
+    def do_POST(self):
+        batcher = self.server.batcher
+        try:
+            body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+            params = body.get('params', {})
+
+            if self.path == '/generate':
+                request = batcher.submit(body['prompt'], params)
+                self._respond(200, {'completion': request.wait(self.server.request_timeout)})
+            elif self.path == '/generate_batch':
+                requests = [batcher.submit(prompt, params) for prompt in body['prompts']]
+                completions = [request.wait(self.server.request_timeout) for request in requests]
+                self._respond(200, {'completions': completions})
+            else:
+                self._respond(404, {'error': f'Unknown path {self.path}'})
+        except Exception as e:
+            self._respond(500, {'error': str(e)})
+
+    def log_message(self, format, *args):
+        pass
+
+
+class ModelServer:
+    """Localhost HTTP front end for a ContinuousBatcher"""
+
+    def __init__(self, backend, host="127.0.0.1", port=8765, max_batch_size=8, request_timeout=600):
+        """
+        Args:
+            backend: HFBackend holding the shared model
+            host: Bind address; keep it on localhost
+            port: TCP port
+            max_batch_size: Maximum sequences decoded together
+            request_timeout: Seconds a client request may wait
+        """
+        self.batcher = ContinuousBatcher(backend, max_batch_size)
+        self.httpd = ThreadingHTTPServer((host, port), _Handler)
+        self.httpd.batcher = self.batcher
+        self.httpd.request_timeout = request_timeout
+
+    def serve_forever(self):
+        self.batcher.start()
+        host, port = self.httpd.server_address
+        print(f"Model server listening on http://{host}:{port}")
+        try:
+            self.httpd.serve_forever()
+        finally:
+            self.httpd.server_close()
+            self.batcher.stop()
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Shared OpenROAD model server")
+    arg_parser.add_argument("--base", default="mistralai/Mistral-7B-Instruct-v0.2")
+    arg_parser.add_argument("--adapter", default=None)
+    arg_parser.add_argument("--host", default="127.0.0.1")
+    arg_parser.add_argument("--port", type=int, default=8765)
+    arg_parser.add_argument("--max-batch", type=int, default=8)
+    args = arg_parser.parse_args()
+
+    backend = HFBackend(args.base, args.adapter, use_prefix_cache=False)
+    ModelServer(backend, args.host, args.port, args.max_batch).serve_forever()
@@ -3,24 +3,65 @@
 planner.py
 Planner Agent - Creates execution plans using LLM
 """
-import torch
 import json
 import re
 
+from state_summary import StateSummarizer
+
+
+# Actions a plan step may use; constrained decoding only allows these
+PLAN_ACTIONS = [
+    "read_design",
+    "floorplan",
+    "pdn",
+    "placement",
+    "global_placement",
+    "detailed_placement",
+    "cts",
+    "routing",
+    "global_route",
+    "detailed_route",
+    "timing_report",
+    "congestion_report",
+    "drc_check",
+    "write_def",
+    "write_gds",
+]
+
+PLAN_PROMPT_PREFIX = """<s>[INST] You are an OpenROAD execution planner. Create a JSON plan.
+
+        Output ONLY valid JSON:
+        {
+        "goal": "<goal>",
+        "steps": [
+            {"step": 1, "action": "read_design", "description": "Read Verilog and tech files", "depends_on": []},
+            {"step": 2, "action": "floorplan", "description": "Initialize floorplan", "depends_on": [1]},
+            ...
+        ]
+        }
+
+        "depends_on" lists the steps a step needs. Steps that do not depend
+        on each other (e.g. separate timing and congestion reports) run in parallel.
+
+        Goal:"""
+
 
 class PlannerAgent:
     """Creates multi-step execution plans"""
     
-    def __init__(self, model, tokenizer):
+    def __init__(self, backend, constrained=False, state_budget=256):
         """
         Initialize planner.
         
         Args:
-            model: LLM model
-            tokenizer: Tokenizer
+            backend: GeneratorBackend used to generate plans
+            constrained: Grammar-constrained decoding, so the output always
+                         parses as a plan using PLAN_ACTIONS
+            state_budget: Most prompt tokens a state dict is summarized into
         """
-        self.model = model
-        self.tokenizer = tokenizer
+        self.backend = backend
+        self.constrained = constrained
+        self.state_budget = state_budget
     
     def create_plan(self, user_goal, current_state=None):
         """
@@ -28,7 +69,9 @@ class PlannerAgent:
         
         Args:
             user_goal: High-level user goal
-            current_state: Optional current state
+            current_state: Optional current state: a StateSummarizer kept
+                           up to date by the caller, or a state dict that
+                           is summarized within state_budget
             
         Returns:
             dict: JSON plan with steps
@@ -37,42 +80,26 @@ class PlannerAgent:
         print("PLANNER: Creating execution plan")
         print(f"{'='*70}")
         
-        # Build prompt
+        # Build prompt: fixed scaffolding first so its KV cache can be reused
         state_info = ""
+        if isinstance(current_state, dict) and current_state:
+            current_state = StateSummarizer.from_state(current_state, self.state_budget, self.backend.count_tokens)
         if current_state:
-            state_info = f"\n\nCurrent state: {json.dumps(current_state, indent=2)}"
+            summary, tokens = current_state.render()
+            if summary:
+                print(f"State summary: {tokens} tokens")
+                state_info = f"\n\nCurrent state:\n{summary}"
         
-        prompt = f"""<s>[INST] You are an OpenROAD execution planner. Create a JSON plan.
-
-        Goal: {user_goal}{state_info}
-
-        Output ONLY valid JSON:
-        {{
-        "goal": "{user_goal}",
-        "steps": [
-            {{"step": 1, "action": "read_design", "description": "Read Verilog and tech files"}},
-            {{"step": 2, "action": "floorplan", "description": "Initialize floorplan"}},
-            ...
-        ]
-        }}
-        [/INST]"""
+        suffix = f"{user_goal}{state_info}\n        [/INST]"
         
         # Generate
-        inputs = self.tokenizer(prompt, return_tensors="pt").to(self.model.device)
-        
-        with torch.no_grad():
-            outputs = self.model.generate(
-                **inputs,
-                max_new_tokens=200,
-                temperature=0.3,
-                top_p=0.9,
-                pad_token_id=self.tokenizer.eos_token_id
-            )
-        
-        response = self.tokenizer.decode(outputs[0], skip_special_tokens=True)
-        
-        if "[/INST]" in response:
-            response = response.split("[/INST]")[-1].strip()
+        # 'stop': 'json' ends generation once the plan object is balanced and closed
+        params = {'max_new_tokens': 200, 'temperature': 0.3, 'top_p': 0.9, 'stop': 'json'}
+        if self.constrained:
+            # The grammar closes the plan before the budget runs out, so give it room
+            params.update({'max_new_tokens': 400, 'grammar': 'plan'})
+        prompt = f"{PLAN_PROMPT_PREFIX} {suffix}"
+        response = self.backend.generate(prompt, params, prefix=PLAN_PROMPT_PREFIX)
         
         # Parse JSON
         try:
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+prefix_cache.py
+Prefix Cache - Reuses KV cache of fixed prompt prefixes across generate calls
+"""
+import copy
+import time
+
+import torch
+
+
+class PrefixCache:
+    """Caches past_key_values for fixed prompt scaffolding"""
+
+    def __init__(self, model, tokenizer):
+        """
+        Initialize prefix cache.
+
+        Args:
+            model: LLM model (base or PeftModel)
+            tokenizer: Tokenizer
+        """
+        self.model = model
+        self.tokenizer = tokenizer
+        self._entries = {}
+        self._model_key = self._current_model_key()
+
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.prefill_tokens_saved = 0
+        self.prefill_seconds = 0.0
+
+    def _current_model_key(self):
+        """Identity of the loaded model and active adapter"""
+        adapter = getattr(self.model, 'active_adapter', None)
+        return (id(self.model), str(adapter))
+
+    def invalidate(self):
+        """Drop all cached prefixes, e.g. after the adapter weights changed"""
+        if self._entries:
+            self.invalidations += 1
+        self._entries.clear()
+        self._model_key = self._current_model_key()
+
+    def get(self, prefix, batch_size=1):
+        """
+        Get token ids and a private copy of the KV cache for a prefix.
+
+        Args:
+            prefix: Fixed prompt prefix text
+            batch_size: Rows the copy of the cache is repeated for
+
+        Returns:
+            tuple: (prefix input_ids, past_key_values)
+        """
+        if self._current_model_key() != self._model_key:
+            self.invalidate()
+
+        entry = self._entries.get(prefix)
+        if entry is None:
+            self.misses += 1
+            start = time.perf_counter()
+
+            prefix_ids = self.tokenizer(prefix, return_tensors="pt").input_ids.to(self.model.device)
+            with torch.no_grad():
+                outputs = self.model(input_ids=prefix_ids, use_cache=True)
+
+            self.prefill_seconds += time.perf_counter() - start
+            entry = (prefix_ids, outputs.past_key_values)
+            self._entries[prefix] = entry
+        else:
+            self.hits += 1
+            self.prefill_tokens_saved += entry[0].shape[1]
+
+        prefix_ids, past_key_values = entry
+        # generate() extends the cache in place, so every call gets its own copy
+        return prefix_ids, self._copy(past_key_values, batch_size)
+
+    @staticmethod
+    def _copy(past_key_values, batch_size):
+        if batch_size == 1:
+            return copy.deepcopy(past_key_values)
+        if hasattr(past_key_values, 'batch_repeat_interleave'):
+            # transformers Cache object
+            past_key_values = copy.deepcopy(past_key_values)
+            past_key_values.batch_repeat_interleave(batch_size)
+            return past_key_values
+        # Legacy tuple of (key, value) per layer; repeat_interleave allocates new tensors
+        return tuple(tuple(tensor.repeat_interleave(batch_size, dim=0) for tensor in layer)
+                     for layer in past_key_values)
+
+    def generate(self, prefix, suffix, **generate_kwargs):
+        """
+        Generate a completion for prefix + suffix, prefilling only the suffix.
+
+        The prefix is tokenized with special tokens and the suffix without, so
+        prefixes should end right before a word boundary (e.g. "...code to:").
+
+        Args:
+            prefix: Fixed prompt prefix text
+            suffix: Variable prompt text; must not be empty
+            **generate_kwargs: Passed to model.generate
+
+        Returns:
+            Tensor: Newly generated token ids
+        """
+        prefix_ids, past_key_values = self.get(prefix)
+        suffix_ids = self.tokenizer(
+            suffix,
+            add_special_tokens=False,
+            return_tensors="pt"
+        ).input_ids.to(self.model.device)
+
+        input_ids = torch.cat([prefix_ids, suffix_ids], dim=1)
+        attention_mask = torch.ones_like(input_ids)
+
+        with torch.no_grad():
+            outputs = self.model.generate(
+                input_ids=input_ids,
+                attention_mask=attention_mask,
+                past_key_values=past_key_values,
+                **generate_kwargs
+            )
+
+        return outputs[0, input_ids.shape[1]:]
+
+    def generate_batch(self, prefix, suffixes, **generate_kwargs):
+        """
+        Generate completions for prefix + each suffix in one call, prefilling only the suffixes.
+
+        The prefix's cache is repeated for every row and the suffixes are
+        left-padded after it. The attention mask hides the padding and
+        position ids follow the mask, so each row continues the prefix
+        exactly as generate() would. One lookup serves the whole batch.
+
+        Args:
+            prefix: Fixed prompt prefix text
+            suffixes: Variable prompt texts; none may be empty
+            **generate_kwargs: Passed to model.generate
+
+        Returns:
+            Tensor: Newly generated token ids, one row per suffix; rows
+                    that finished early are padded
+        """
+        batch_size = len(suffixes)
+        prefix_ids, past_key_values = self.get(prefix, batch_size)
+        suffix = self.tokenizer(
+            suffixes,
+            add_special_tokens=False,
+            padding=True,
+            return_tensors="pt"
+        ).to(self.model.device)
+
+        input_ids = torch.cat([prefix_ids.expand(batch_size, -1), suffix.input_ids], dim=1)
+        attention_mask = torch.cat([
+            torch.ones(batch_size, prefix_ids.shape[1], dtype=suffix.attention_mask.dtype, device=input_ids.device),
+            suffix.attention_mask
+        ], dim=1)
+
+        with torch.no_grad():
+            outputs = self.model.generate(
+                input_ids=input_ids,
+                attention_mask=attention_mask,
+                past_key_values=past_key_values,
+                **generate_kwargs
+            )
+
+        return outputs[:, input_ids.shape[1]:]
+
+    def stats(self):
+        """Hit/miss counters and prefill savings"""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'cached_prefixes': len(self._entries),
+            'invalidations': self.invalidations,
+            'prefill_tokens_saved': self.prefill_tokens_saved,
+            'prefill_seconds': round(self.prefill_seconds, 4)
+        }
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+retrieval.py
+Retrieval Index - BM25 search over the EDA Corpus prompt/script pairs
+
+The index is built once from flow.csv. The posting lists are stored as
+NumPy arrays with each posting's BM25 weight precomputed, and the pairs
+themselves go in one UTF-8 file with an offset table. Everything is
+memory-mapped at load time, so opening the index is instant. A lookup adds
+up the postings of the query terms with one bincount and reads only the
+top documents' text.
+
+    python retrieval.py build flow.csv [index_dir]
+    python retrieval.py search "place pins on the die boundary" [index_dir]
+"""
+import csv
+import json
+import mmap
+import re
+import sys
+from pathlib import Path
+
+import numpy as np
+
+DEFAULT_INDEX_DIR = ".retrieval"
+K1 = 1.2
+B = 0.75
+
+CAMEL = re.compile(r'([a-z0-9])([A-Z])')
+WORD = re.compile(r'[a-z0-9]+')
+
+# Header names the prompt and script columns go by in corpus exports
+PROMPT_COLUMNS = ('prompt', 'question', 'instruction', 'input')
+SCRIPT_COLUMNS = ('script', 'code', 'answer', 'output', 'response')
+
+
+def tokenize(text):
+    """Lowercase words, with camelCase and snake_case split apart"""
+    return WORD.findall(CAMEL.sub(r'\1 \2', text).lower())
+
+
+def _column(header, names):
+    for i, column in enumerate(header):
+        if column.strip().lower() in names:
+            return i
+    raise ValueError(f"No column named any of {names} in {header}")
+
+
+def read_pairs(csv_path):
+    """(prompt, script) rows of a corpus CSV"""
+    csv.field_size_limit(sys.maxsize)
+    with open(csv_path, newline='', encoding='utf-8', errors='replace') as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        prompt_col, script_col = _column(header, PROMPT_COLUMNS), _column(header, SCRIPT_COLUMNS)
+        for row in reader:
+            if len(row) > max(prompt_col, script_col) and row[prompt_col].strip() and row[script_col].strip():
+                yield row[prompt_col], row[script_col]
+
+
+def build_index(csv_path, index_dir=DEFAULT_INDEX_DIR):
+    """
+    Build the index for a corpus CSV.
+
+    Args:
+        csv_path: flow.csv (prompt and script columns)
+        index_dir: Output directory
+
+    Returns:
+        RetrievalIndex: The index, loaded from index_dir
+    """
+    index_dir = Path(index_dir)
+    index_dir.mkdir(parents=True, exist_ok=True)
+
+    vocab = {}
+    term_ids, doc_ids, lengths = [], [], []
+    offsets = [0]
+    with open(index_dir / "docs.bin", 'wb') as docs:
+        for doc, (prompt, script) in enumerate(read_pairs(csv_path)):
+            tokens = tokenize(prompt)
+            term_ids.extend(vocab.setdefault(token, len(vocab)) for token in tokens)
+            doc_ids.extend([doc] * len(tokens))
+            lengths.append(len(tokens))
+            record = json.dumps({'prompt': prompt, 'script': script}).encode() + b"\n"
+            docs.write(record)
+            offsets.append(offsets[-1] + len(record))
+
+    doc_count = len(lengths)
+    if doc_count == 0:
+        raise ValueError(f"No prompt/script pairs in {csv_path}")
+    lengths = np.array(lengths, dtype=np.float32)
+    avg_length = float(lengths.mean()) or 1.0
+
+    # (term, doc) pairs -> term frequencies, grouped by term
+    pairs, tf = np.unique(np.array(term_ids, dtype=np.int64) * doc_count + np.array(doc_ids, dtype=np.int64),
+                          return_counts=True)
+    terms, docs = np.divmod(pairs, doc_count)
+    df = np.bincount(terms, minlength=len(vocab))
+    idf = np.log1p((doc_count - df + 0.5) / (df + 0.5))
+    norm = K1 * (1 - B + B * lengths[docs] / avg_length)
+    weights = idf[terms] * tf * (K1 + 1) / (tf + norm)
+
+    np.save(index_dir / "term_offsets.npy", np.concatenate([[0], np.cumsum(df)]).astype(np.int64))
+    np.save(index_dir / "posting_docs.npy", docs.astype(np.int32))
+    np.save(index_dir / "posting_weights.npy", weights.astype(np.float32))
+    np.save(index_dir / "idf.npy", idf.astype(np.float32))
+    np.save(index_dir / "doc_offsets.npy", np.array(offsets, dtype=np.int64))
+    with open(index_dir / "vocab.json", 'w') as f:
+        json.dump(vocab, f)
+    with open(index_dir / "meta.json", 'w') as f:
+        json.dump({'source': str(csv_path), 'documents': doc_count, 'terms': len(vocab),
+                   'avg_length': avg_length, 'k1': K1, 'b': B}, f)
+    return RetrievalIndex(index_dir)
+
+
+class RetrievalIndex:
+    """Memory-mapped BM25 index built by build_index"""
+
+    def __init__(self, index_dir=DEFAULT_INDEX_DIR):
+        index_dir = Path(index_dir)
+        with open(index_dir / "meta.json") as f:
+            self.meta = json.load(f)
+        with open(index_dir / "vocab.json") as f:
+            self.vocab = json.load(f)
+        self.term_offsets = np.load(index_dir / "term_offsets.npy", mmap_mode='r')
+        self.posting_docs = np.load(index_dir / "posting_docs.npy", mmap_mode='r')
+        self.posting_weights = np.load(index_dir / "posting_weights.npy", mmap_mode='r')
+        self.idf = np.load(index_dir / "idf.npy", mmap_mode='r')
+        self.doc_offsets = np.load(index_dir / "doc_offsets.npy", mmap_mode='r')
+        with open(index_dir / "docs.bin", 'rb') as f:
+            self._docs = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __len__(self):
+        return self.meta['documents']
+
+    def document(self, doc):
+        start, end = int(self.doc_offsets[doc]), int(self.doc_offsets[doc + 1])
+        return json.loads(self._docs[start:end])
+
+    def _ideal_score(self, counts):
+        # Score of a document identical to the query, with the query tf weighting search() applies
+        norm = K1 * (1 - B + B * sum(counts.values()) / self.meta['avg_length'])
+        return sum(float(self.idf[term]) * tf * tf * (K1 + 1) / (tf + norm) for term, tf in counts.items())
+
+    def _matched(self, doc, terms):
+        # Posting lists are sorted by document within a term
+        matched = 0
+        for term in terms:
+            postings = self.posting_docs[self.term_offsets[term]:self.term_offsets[term + 1]]
+            i = np.searchsorted(postings, doc)
+            matched += bool(i < len(postings) and postings[i] == doc)
+        return matched
+
+    def search(self, query, k=3):
+        """
+        Best-matching pairs for a query.
+
+        Args:
+            query: Step description
+            k: Number of results
+
+        Returns:
+            list: dicts with doc, score, confidence (score relative to an
+                  exact match, 0..1), matched (distinct query terms in the
+                  document), prompt and script; best first
+        """
+        counts = {}
+        for token in tokenize(query):
+            term = self.vocab.get(token)
+            if term is not None:
+                counts[term] = counts.get(term, 0) + 1
+        if not counts:
+            return []
+
+        docs, weights = [], []
+        for term, tf in counts.items():
+            start, end = self.term_offsets[term], self.term_offsets[term + 1]
+            docs.append(self.posting_docs[start:end])
+            weights.append(self.posting_weights[start:end] * tf)
+        scores = np.bincount(np.concatenate(docs), weights=np.concatenate(weights), minlength=len(self))
+
+        k = min(k, int((scores > 0).sum()))
+        if k == 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        # Unknown query words count against confidence too
+        ideal = self._ideal_score(counts) * len(tokenize(query)) / sum(counts.values())
+        return [dict(self.document(int(doc)), doc=int(doc), score=float(scores[doc]),
+                     confidence=min(1.0, float(scores[doc]) / ideal), matched=self._matched(doc, counts))
+                for doc in top]
+
+    def close(self):
+        self._docs.close()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3 or sys.argv[1] not in ("build", "search"):
+        print(__doc__)
+        sys.exit(1)
+    target = sys.argv[3] if len(sys.argv) > 3 else DEFAULT_INDEX_DIR
+    if sys.argv[1] == "build":
+        index = build_index(sys.argv[2], target)
+        print(f"Indexed {len(index)} pairs, {index.meta['terms']} terms into {target}")
+    else:
+        for hit in RetrievalIndex(target).search(sys.argv[2]):
+            print(f"[{hit['confidence']:.2f}] {hit['prompt']}\n{hit['script']}\n")
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+scheduler.py
+Step Scheduler - Runs plan steps concurrently in dependency order
+
+A step may list the steps it needs in "depends_on"; a step without the key
+depends on the step before it, so plans written without dependencies still
+run serially. Ready steps run on a bounded thread pool, a failed step skips
+everything downstream of it, and the measured durations give the critical
+path of the run. Time a step reports as 'wait_seconds' (blocked on a
+shared worker or lock rather than working) is left out of its duration.
+"""
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+
+def unique_step_ids(steps):
+    """
+    Steps with usable ids.
+
+    Plans from the model sometimes repeat or omit "step" numbers. Such a
+    plan is renumbered by position and its "depends_on" lists, which can no
+    longer be resolved, are dropped, so it runs in order as written.
+
+    Returns:
+        list: steps unchanged when every id is present and unique, else renumbered copies
+    """
+    ids = [step.get('step') for step in steps]
+    if None not in ids and len(set(ids)) == len(ids):
+        return steps
+    return [dict({k: v for k, v in step.items() if k != 'depends_on'}, step=position)
+            for position, step in enumerate(steps, 1)]
+
+
+def step_dependencies(steps):
+    """
+    Resolve the dependencies of every step.
+
+    Args:
+        steps: Plan steps, each with a 'step' id and optional 'depends_on'
+
+    Returns:
+        dict: step id -> list of step ids it depends on
+
+    Raises:
+        ValueError: On duplicate ids, unknown dependencies or cycles
+    """
+    ids = [step['step'] for step in steps]
+    if len(set(ids)) != len(ids):
+        raise ValueError(f"Duplicate step ids in plan: {ids}")
+
+    dependencies = {}
+    previous = None
+    for step in steps:
+        depends_on = step.get('depends_on')
+        if depends_on is None:
+            depends_on = [] if previous is None else [previous]
+        elif not isinstance(depends_on, list):
+            depends_on = [depends_on]
+
+        unknown = [dep for dep in depends_on if dep not in ids]
+        if unknown:
+            raise ValueError(f"Step {step['step']} depends on unknown steps {unknown}")
+        dependencies[step['step']] = list(dict.fromkeys(depends_on))
+        previous = step['step']
+
+    # Kahn's algorithm; anything left over is on a cycle
+    remaining = {step_id: set(deps) for step_id, deps in dependencies.items()}
+    while remaining:
+        ready = [step_id for step_id, deps in remaining.items() if not deps]
+        if not ready:
+            raise ValueError(f"Dependency cycle between steps {sorted(remaining)}")
+        for step_id in ready:
+            del remaining[step_id]
+        for deps in remaining.values():
+            deps.difference_update(ready)
+
+    return dependencies
+
+
+class DagScheduler:
+    """Runs steps as soon as their dependencies have succeeded"""
+
+    def __init__(self, max_workers=4):
+        """
+        Args:
+            max_workers: Maximum steps running at the same time
+        """
+        self.max_workers = max_workers
+
+    def run(self, steps, run_step):
+        """
+        Run every step of a plan.
+
+        Args:
+            steps: Plan steps
+            run_step: Callable(step) -> result dict with 'success', and
+                      optionally 'wait_seconds' spent blocked on other steps
+
+        Returns:
+            dict: results (step id -> result), timings, critical_path,
+                  makespan_seconds, serial_seconds and skipped step ids
+        """
+        dependencies = step_dependencies(steps)
+        by_id = {step['step']: step for step in steps}
+        dependents = {step_id: [] for step_id in by_id}
+        for step_id, deps in dependencies.items():
+            for dep in deps:
+                dependents[dep].append(step_id)
+
+        waiting = {step_id: len(deps) for step_id, deps in dependencies.items()}
+        results = {}
+        timings = {}
+        skipped = []
+        start = time.perf_counter()
+
+        def timed(step):
+            began = time.perf_counter()
+            try:
+                result = run_step(step)
+            except Exception as e:
+                result = {'success': False, 'error': f"{type(e).__name__}: {e}"}
+            return result, began - start, time.perf_counter() - start
+
+        def skip(step_id, failed):
+            # Iterative so long chains don't hit the recursion limit
+            pending = [(step_id, failed)]
+            while pending:
+                step_id, failed = pending.pop()
+                if step_id in results:
+                    continue
+                results[step_id] = {
+                    'success': False,
+                    'skipped': True,
+                    'error': f"Skipped: dependency step {failed} did not succeed"
+                }
+                skipped.append(step_id)
+                pending.extend((child, failed) for child in dependents[step_id])
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            running = {}
+            for step_id, count in waiting.items():
+                if count == 0:
+                    running[pool.submit(timed, by_id[step_id])] = step_id
+
+            while running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    step_id = running.pop(future)
+                    result, began, ended = future.result()
+                    results[step_id] = result
+                    waited = min(result.get('wait_seconds', 0.0), ended - began)
+                    timings[step_id] = {'start': began, 'end': ended, 'seconds': ended - began - waited,
+                                        'wait_seconds': waited}
+
+                    for child in dependents[step_id]:
+                        if not result.get('success'):
+                            skip(child, step_id)
+                            continue
+                        waiting[child] -= 1
+                        if waiting[child] == 0 and child not in results:
+                            running[pool.submit(timed, by_id[child])] = child
+
+        makespan = time.perf_counter() - start
+        critical_path, critical_seconds = self._critical_path(steps, dependencies, timings)
+        serial_seconds = sum(timing['seconds'] for timing in timings.values())
+
+        return {
+            'results': results,
+            'timings': timings,
+            'skipped': skipped,
+            'critical_path': critical_path,
+            'critical_path_seconds': critical_seconds,
+            'makespan_seconds': makespan,
+            'serial_seconds': serial_seconds,
+            'parallelism': serial_seconds / makespan if makespan else 0.0
+        }
+
+    def _critical_path(self, steps, dependencies, timings):
+        """Longest chain of executed steps by measured duration"""
+        finish = {}
+        via = {}
+        for step_id in self._topological_order(steps, dependencies):
+            if step_id not in timings:
+                continue
+            best = max(
+                (dep for dep in dependencies[step_id] if dep in finish),
+                key=lambda dep: finish[dep],
+                default=None
+            )
+            finish[step_id] = timings[step_id]['seconds'] + (finish[best] if best is not None else 0.0)
+            via[step_id] = best
+
+        if not finish:
+            return [], 0.0
+
+        end = max(finish, key=finish.get)
+        path = [end]
+        while via[path[-1]] is not None:
+            path.append(via[path[-1]])
+        return path[::-1], finish[end]
+
+    @staticmethod
+    def _topological_order(steps, dependencies):
+        order = []
+        placed = set()
+        pending = [step['step'] for step in steps]
+        while pending:
+            for step_id in pending:
+                if all(dep in placed for dep in dependencies[step_id]):
+                    order.append(step_id)
+                    placed.add(step_id)
+            pending = [step_id for step_id in pending if step_id not in placed]
+        return order
@@ -1,56 +1,85 @@
-import torch
-import os
-import torch.nn as nn
-from transformers import AutoModelForCausalLM, AutoTokenizer
-from peft import PeftModel
+import threading
+import time
+
+from generation_cache import GenerationCache
+from backends import HFBackend, CachedBackend
 
 
 class SimpleAgent:
-    def __init__(self,base_model_path,adaptor_path):
-       
-        self.tokenizer=AutoTokenizer.from_pretrained(
-            base_model_path,
-            use_fast=False,
-            local_files_only=False
-        )
-        self.tokenizer.pad_token=self.tokenizer.eos_token
-
-        self.base_model=AutoModelForCausalLM.from_pretrained(
-            base_model_path,
-            torch_dtype=torch.float16,
-            local_files_only=False
-        ).to("mps" if torch.backends.mps.is_available() else "cpu")
-
-        self.model=peft.PeftModel.from_pretrained(
-            self.base_model,
-            adaptor_path,
-            is_trainable=False
-        )
-        self.model.eval()
+    def __init__(self,base_model_path=None,adaptor_path=None,cache_dir=".generation_cache",backend=None,
+                 merged_path=None):
+        # The model loads lazily on the first answer that misses the cache
+        if backend is None:
+            backend=HFBackend(base_model_path,adaptor_path,merged_path=merged_path)
+        if cache_dir:
+            backend=CachedBackend(backend,GenerationCache(cache_dir,merged_path or adaptor_path,
+                                                          backend_id=backend.cache_identity()))
+        self.backend=backend
+        self.answer_stats=[]
+        self._cancel=threading.Event()
     
-    def ask(self,question,max_length=256):
-        prompt=f"""<s>[INST] You are an openroad expert openroad assistant. {question}[/INST]"""
-        inputs=self.tokenizer(prompt,return_tensors="pt").to(self.model.device)
-
-        with torch.no_grad():
-            outputs=self.model.generate(
-                **inputs,
-                max_new_tokens=max_length,
-                temperature=0.7,
-                top_p=0.9,
-                do_sample=True,
-                pad_token_id=self.tokenizer.eos_token_id
-            )
-
-        response=self.tokenizer.decode(outputs[0],skip_special_tokens=True)
-        
-        if "[/INST]" in response:
-            response=response.strip("[/INST]")[-1].strip()
-        
-        return response
+    def _prompt(self,question):
+        return f"""<s>[INST] You are an openroad expert openroad assistant. {question}[/INST]"""
+
+    def ask(self,question,max_length=256,do_sample=True,bypass_cache=None):
+        """
+        Answer a question.
+
+        Sampled answers bypass the generation cache unless bypass_cache=False;
+        greedy answers (do_sample=False) are cached by default.
+        """
+        params={'max_new_tokens':max_length,'temperature':0.7,'top_p':0.9,'do_sample':do_sample}
+
+        return self.backend.generate(self._prompt(question),params,bypass_cache=bypass_cache)
+
+    def ask_stream(self,question,max_length=256,do_sample=True,bypass_cache=None):
+        """
+        Yield the answer incrementally as tokens are generated.
+
+        Call cancel() (or close the generator) to stop early. When the answer
+        ends, its time-to-first-token and tokens/sec are appended to
+        answer_stats.
+        """
+        params={'max_new_tokens':max_length,'temperature':0.7,'top_p':0.9,'do_sample':do_sample}
+        self._cancel=threading.Event()
+        backend_stats={}
+
+        start=time.perf_counter()
+        first_token_at=None
+        started=False
+        try:
+            for piece in self.backend.stream(self._prompt(question),params,cancel_event=self._cancel,
+                                             stats=backend_stats,bypass_cache=bypass_cache):
+                if not started:
+                    # Drop the whitespace the model emits right after [/INST]
+                    piece=piece.lstrip()
+                    if not piece:
+                        continue
+                    started=True
+                    first_token_at=time.perf_counter()
+                yield piece
+        except (KeyboardInterrupt,GeneratorExit):
+            self._cancel.set()
+            raise
+        finally:
+            total=time.perf_counter()-start
+            tokens=backend_stats.get('tokens')
+            decode_time=total-(first_token_at-start) if first_token_at else None
+            self.answer_stats.append({
+                'question':question,
+                'time_to_first_token':round(first_token_at-start,3) if first_token_at else None,
+                'total_seconds':round(total,3),
+                'tokens':tokens,
+                'tokens_per_second':round(tokens/decode_time,2) if tokens and decode_time else None,
+                'cancelled':self._cancel.is_set()
+            })
+
+    def cancel(self):
+        """Stop the answer currently being streamed"""
+        self._cancel.set()
     
 
-    def interactive_mode(self):
+    def interactive_mode(self,streaming=True):
         print("\n" + "="*70)
         print("Interactive Mode - Type 'quit' to exit")
         print("="*70 + "\n")
@@ -64,9 +93,24 @@ class SimpleAgent:
                 if question.lower() in ['quit','exit','q']:
                     print("/Goodbye")
                     break
-                print("\nAgent",end="",flush=True)
-                answer=self.ask(question)
-                print(answer+"\n")
+                print("\nAgent: ",end="",flush=True)
+                if not streaming:
+                    print(self.ask(question)+"\n")
+                    continue
+
+                answer=self.ask_stream(question)
+                try:
+                    for piece in answer:
+                        print(piece,end="",flush=True)
+                except KeyboardInterrupt:
+                    # Ctrl-C while answering cancels the answer, not the session
+                    self.cancel()
+                    print(" [cancelled]",end="")
+                finally:
+                    answer.close()
+
+                stats=self.answer_stats[-1]
+                print(f"\n  (first token {stats['time_to_first_token']}s, {stats['tokens_per_second']} tok/s)\n")
 
             except KeyboardInterrupt:
                 print("\nGoodbye")
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+state_summary.py
+State Summarizer - Compact, token-budgeted agent state for planner prompts
+
+Instead of the whole state as indented JSON, the planner gets a few short
+lines: the last decision and its issues, how often each metric has failed,
+the last metrics, the previous plan's actions and any other state, in that
+order of priority. Each line is rendered and token-counted once, when its
+source changes; building the prompt text only adds up cached counts, so it
+costs the same in every iteration. Lines that do not fit the budget are
+left out, lowest priority first.
+"""
+import json
+
+from backends import approximate_token_count
+
+# Sections in priority order; earlier ones are kept when the budget is tight
+SECTIONS = ('decision', 'issues', 'metrics', 'plan', 'exploration', 'other')
+
+# Longest rendering of a state value without a dedicated section
+MAX_VALUE_CHARS = 200
+
+
+def _compact(value, limit=MAX_VALUE_CHARS):
+    text = json.dumps(value, separators=(',', ':'), default=str)
+    return text if len(text) <= limit else text[:limit - 3] + "..."
+
+
+class StateSummarizer:
+    """Keeps a budgeted summary of agent state up to date"""
+
+    def __init__(self, budget=256, count_tokens=None):
+        """
+        Args:
+            budget: Most tokens the summary may take
+            count_tokens: text -> token count (default: approximate_token_count);
+                          pass the backend's count_tokens for exact counts
+        """
+        self.budget = budget
+        self.count_tokens = count_tokens or approximate_token_count
+        self.iterations = 0
+        # Section -> list of (line, tokens); only changed sections are re-rendered
+        self._lines = {section: [] for section in SECTIONS}
+        self._other = {}
+        self._issue_counts = {}
+        self._rendered = None
+
+    @classmethod
+    def from_state(cls, state, budget=256, count_tokens=None):
+        """Summarizer primed with a whole state dict, for one-off use"""
+        summarizer = cls(budget, count_tokens)
+        for key, value in state.items():
+            summarizer.update(key, value)
+        return summarizer
+
+    def _set(self, section, lines):
+        self._lines[section] = [(line, self.count_tokens(line)) for line in lines]
+        self._rendered = None
+
+    def update(self, key, value):
+        """
+        Record a changed state entry.
+
+        Args:
+            key: State key ('plan' and 'exploration' get dedicated lines)
+            value: New value
+        """
+        if key == 'plan':
+            steps = value.get('steps', []) if isinstance(value, dict) else []
+            actions = " > ".join(str(step.get('action', '?')) for step in steps)
+            self._set('plan', [f"Previous plan ({len(steps)} steps): {actions}"] if steps else [])
+        elif key == 'exploration':
+            best = [record for record in value or [] if record.get('status') == 'complete'][:3]
+            self._set('exploration', [
+                f"Explored candidate #{record['rank']}: knobs {_compact(record['knobs'])}, "
+                f"metrics {_compact(record['metrics'])}" for record in best
+            ])
+        elif key == 'last_decision':
+            self.record_decision(value)
+        else:
+            self._other[key] = value
+            self._set('other', [f"{name}: {_compact(item)}" for name, item in self._other.items()])
+
+    def record_decision(self, decision, metrics=None):
+        """
+        Record the decision of one iteration.
+
+        Args:
+            decision: DecisionEngine decision
+            metrics: Metrics it was made on
+        """
+        self.iterations += 1
+        issues = decision.get('issues', [])
+        header = f"Last decision (iteration {self.iterations}): {decision.get('status')}"
+        self._set('decision', [header] + [f"- {issue['message']}" for issue in issues])
+
+        for issue in issues:
+            count, _, _ = self._issue_counts.get(issue['metric'], (0, None, None))
+            self._issue_counts[issue['metric']] = (count + 1, issue['value'], issue['threshold'])
+        if self._issue_counts:
+            self._set('issues', ["Failed so far: " + "; ".join(
+                f"{metric} {count}x (last {value}, limit {threshold})"
+                for metric, (count, value, threshold) in self._issue_counts.items()
+            )])
+
+        if metrics:
+            scalars = {name: value for name, value in metrics.items() if isinstance(value, (int, float))}
+            self._set('metrics', [f"Last metrics: {_compact(scalars)}"] if scalars else [])
+
+    def render(self):
+        """
+        The summary within budget.
+
+        Returns:
+            tuple: (summary text, tokens it takes)
+        """
+        if self._rendered is None:
+            lines, used = [], 0
+            for section in SECTIONS:
+                for line, tokens in self._lines[section]:
+                    # +1 for the newline joining it to the previous line
+                    if used + tokens + 1 <= self.budget:
+                        lines.append(line)
+                        used += tokens + 1
+            self._rendered = ("\n".join(lines), used)
+        return self._rendered
+
+    def stats(self):
+        text, tokens = self.render()
+        total = sum(len(lines) for lines in self._lines.values())
+        kept = len(text.split("\n")) if text else 0
+        return {'budget': self.budget, 'tokens': tokens, 'lines': kept, 'dropped_lines': total - kept}
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+stopping.py
+Stopping Criteria - Custom conditions that end model.generate early
+"""
+import time
+
+import torch
+from transformers import StoppingCriteria
+
+
+class CancelCriteria(StoppingCriteria):
+    """Stops generation once any of some threading.Events is set, counting generated tokens"""
+
+    def __init__(self, prompt_len, *cancel_events):
+        """
+        Args:
+            prompt_len: Prompt length in tokens, to count generated tokens
+            *cancel_events: threading.Events; setting any of them cancels
+        """
+        self.prompt_len = prompt_len
+        self.cancel_events = [event for event in cancel_events if event is not None]
+        self.generated = 0
+
+    def __call__(self, input_ids, scores, **kwargs):
+        self.generated = input_ids.shape[1] - self.prompt_len
+        return torch.full(
+            (input_ids.shape[0],),
+            any(event.is_set() for event in self.cancel_events),
+            dtype=torch.bool,
+            device=input_ids.device
+        )
+
+
+class FirstTokenTimer(StoppingCriteria):
+    """Never stops generation; notes when the first new token was produced"""
+
+    def __init__(self):
+        self.first_token_at = None
+
+    def __call__(self, input_ids, scores, **kwargs):
+        # Called once per decoding step, right after the step's token
+        if self.first_token_at is None:
+            self.first_token_at = time.perf_counter()
+        return torch.zeros((input_ids.shape[0],), dtype=torch.bool, device=input_ids.device)
+
+
+class JsonObjectScanner:
+    """Detects when the first top-level JSON object in a text is closed"""
+
+    def __init__(self):
+        self.position = 0
+        self.depth = 0
+        self.started = False
+        self.in_string = False
+        self.escaped = False
+        self.done = False
+
+    def feed(self, text):
+        """
+        Scan the not yet seen part of text.
+
+        Args:
+            text: Everything generated so far
+
+        Returns:
+            bool: True once the object's closing brace has been generated
+        """
+        for ch in text[self.position:]:
+            if self.done:
+                break
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif ch == '\\':
+                    self.escaped = True
+                elif ch == '"':
+                    self.in_string = False
+            elif ch == '"' and self.started:
+                self.in_string = True
+            elif ch == '{':
+                self.started = True
+                self.depth += 1
+            elif ch == '}' and self.started:
+                self.depth -= 1
+                self.done = self.depth == 0
+
+        self.position = len(text)
+        return self.done
+
+
+class CodeBlockScanner:
+    """Detects the end of a generated script: a closed ``` fence or a new [INST] turn"""
+
+    FENCE = "```"
+    END_MARKERS = ("[INST]",)
+
+    def __init__(self):
+        self.done = False
+
+    def feed(self, text):
+        """
+        Args:
+            text: Everything generated so far
+
+        Returns:
+            bool: True once the script is complete
+        """
+        if not self.done:
+            opening = text.find(self.FENCE)
+            if opening != -1:
+                self.done = text.find(self.FENCE, opening + len(self.FENCE)) != -1
+            if any(marker in text for marker in self.END_MARKERS):
+                self.done = True
+        return self.done
+
+
+SCANNERS = {
+    'json': JsonObjectScanner,
+    'code': CodeBlockScanner,
+}
+
+
+def make_scanner(kind):
+    """Scanner for a 'stop' generation parameter, or None"""
+    if kind is None:
+        return None
+    if kind not in SCANNERS:
+        raise ValueError(f"Unknown stop kind: {kind}")
+    return SCANNERS[kind]()
+
+
+class StructureStoppingCriteria(StoppingCriteria):
+    """Ends each row as soon as its JSON object or code block is complete"""
+
+    def __init__(self, tokenizer, kind):
+        """
+        Args:
+            tokenizer: Tokenizer used to decode generated tokens
+            kind: 'json' or 'code'
+        """
+        self.tokenizer = tokenizer
+        self.kind = kind
+        self.scanners = None
+        self.prompt_len = None
+
+    def __call__(self, input_ids, scores, **kwargs):
+        if self.scanners is None:
+            # First call comes after the first new token; this also covers
+            # prefix-cached and left-padded prompts
+            self.prompt_len = input_ids.shape[1] - 1
+            self.scanners = [make_scanner(self.kind) for _ in range(input_ids.shape[0])]
+
+        done = []
+        for row, scanner in enumerate(self.scanners):
+            if not scanner.done:
+                text = self.tokenizer.decode(input_ids[row, self.prompt_len:], skip_special_tokens=True)
+                scanner.feed(text)
+            done.append(scanner.done)
+
+        return torch.tensor(done, dtype=torch.bool, device=input_ids.device)
@@ -0,0 +1,53 @@
+"""Correction rules learned from the execution log of a MemoryStore"""
+from corrector import CodeCorrector
+from memory_store import MemoryStore
+
+FAILING = "from openroad import Tech, Design\ndesign.globalPlace()\n"
+FIXED = "from openroad import Tech, Design\ndesign.globalPlacement()\n"
+
+
+def log(memory, step, code, success, action='placement', description='Place cells'):
+    memory.log_execution(step, code, {'success': success}, action, description)
+
+
+def test_replanned_fix_is_learned(tmp_path):
+    memory = MemoryStore(str(tmp_path / "memory"))
+    corrector = CodeCorrector()
+    # Two iterations in which a failed placement was replanned as a new step that succeeded
+    log(memory, 3, FAILING, False)
+    log(memory, 4, FIXED, True, description='Run global placement')
+    assert corrector.learn_from_memory(memory) == []
+    log(memory, 3, FAILING, False, description='Place the cells again')
+    log(memory, 5, FIXED, True, description='Global placement with timing')
+    assert corrector.learn_from_memory(memory) == ['rename:globalPlace']
+
+    fixed, fixes = corrector.auto_correct(FAILING)
+    assert fixed == FIXED
+    assert fixes == ['globalPlace->globalPlacement']
+
+
+def test_unrelated_or_unchanged_attempts_are_not_paired():
+    memory = MemoryStore()
+    corrector = CodeCorrector()
+    for _ in range(2):
+        # Identical retry: nothing was fixed
+        log(memory, 1, FAILING, False)
+        log(memory, 1, FAILING, True)
+        # A success of another action is not a fix of the placement
+        log(memory, 2, FAILING, False)
+        log(memory, 3, FIXED, True, action='routing')
+        # A step skipped after a failed dependency never ran
+        memory.log_execution(4, FIXED, {'success': False, 'skipped': True}, 'placement', 'Place cells')
+    assert corrector.learn_from_memory(memory) == []
+
+
+def test_earlier_sessions_are_not_paired(tmp_path):
+    path = str(tmp_path / "memory")
+    first = MemoryStore(path)
+    log(first, 1, FAILING, False)
+    log(first, 2, FAILING, False)
+    second = MemoryStore(path)
+    corrector = CodeCorrector()
+    log(second, 1, FIXED, True)
+    log(second, 2, FIXED, True)
+    assert corrector.learn_from_memory(second) == []
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+timing_paths.py
+Timing Paths - Columnar ingestion of report_checks path reports
+
+A path report is turned into NumPy columns (startpoint, endpoint, clock
+group, slack, arrival, required, depth), one row per path, with pin and
+clock group names interned into string tables. Every report keyword starts
+with a literal, so each is located with one fast regex pass over the whole
+(memory-mapped) report; rows are then assembled with searchsorted instead
+of a per-line Python loop.
+"""
+import mmap
+import re
+from pathlib import Path
+
+import numpy as np
+
+STARTPOINT = re.compile(rb'Startpoint: (\S+)')
+ENDPOINT = re.compile(rb'Endpoint: (\S+)')
+PATH_GROUP = re.compile(rb'Path Group: (\S+)')
+ARRIVAL = re.compile(rb'data arrival time')
+REQUIRED = re.compile(rb'data required time')
+SLACK = re.compile(rb'slack \(')
+# Pin lines of a path carry the transition (^ rise, v fall) between time and pin name
+EDGES = (b' ^ ', b' v ')
+
+
+class StringTable:
+    """Interns names to dense int32 codes"""
+
+    def __init__(self):
+        self.codes = {}
+        self.names = []
+
+    def encode(self, raw_names):
+        codes = self.codes
+        names = self.names
+        out = np.empty(len(raw_names), dtype=np.int32)
+        for i, raw in enumerate(raw_names):
+            code = codes.get(raw)
+            if code is None:
+                code = codes[raw] = len(names)
+                names.append(raw.decode(errors='replace'))
+            out[i] = code
+        return out
+
+    def __getitem__(self, code):
+        return self.names[code]
+
+    def __len__(self):
+        return len(self.names)
+
+
+def _first_after(starts, ends, positions):
+    """
+    Index into positions of the first one inside each [start, end) block, or -1.
+
+    Args:
+        starts: Sorted block start offsets
+        ends: Block end offsets (next block start)
+        positions: Sorted offsets of one keyword
+    """
+    index = np.searchsorted(positions, starts)
+    found = index < len(positions)
+    found[found] = positions[index[found]] < ends[found]
+    return np.where(found, index, -1)
+
+
+def _leading_numbers(data, positions, rows):
+    """Float at the start of the line holding each selected keyword (NaN when absent)"""
+    values = np.full(len(rows), np.nan, dtype=np.float32)
+    for i, row in enumerate(rows):
+        if row < 0:
+            continue
+        end = int(positions[row])
+        line_start = data.rfind(b'\n', 0, end) + 1
+        try:
+            values[i] = float(data[line_start:end])
+        except ValueError:
+            pass
+    return values
+
+
+class TimingPaths:
+    """Columnar table of timing paths"""
+
+    def __init__(self, startpoint, endpoint, clock_group, slack, arrival, required, depth, pins, groups):
+        """
+        Args:
+            startpoint, endpoint: int32 codes into pins
+            clock_group: int32 codes into groups
+            slack, arrival, required: float32 times (NaN when not reported)
+            depth: int32 pins on the data arrival path
+            pins, groups: StringTables
+        """
+        self.startpoint = startpoint
+        self.endpoint = endpoint
+        self.clock_group = clock_group
+        self.slack = slack
+        self.arrival = arrival
+        self.required = required
+        self.depth = depth
+        self.pins = pins
+        self.groups = groups
+
+    @classmethod
+    def from_text(cls, data):
+        """
+        Build the table from report text.
+
+        Args:
+            data: str, bytes or any buffer (e.g. an mmap)
+
+        Returns:
+            TimingPaths
+        """
+        if isinstance(data, str):
+            data = data.encode(errors='replace')
+
+        start_matches = [(m.start(), m.group(1)) for m in STARTPOINT.finditer(data)]
+        starts = np.fromiter((pos for pos, _ in start_matches), dtype=np.int64, count=len(start_matches))
+        ends = np.append(starts[1:], len(data)).astype(np.int64)
+
+        def locate(pattern):
+            return np.fromiter((m.start() for m in pattern.finditer(data)), dtype=np.int64)
+
+        def named(pattern):
+            matches = [(m.start(), m.group(1)) for m in pattern.finditer(data)]
+            positions = np.fromiter((pos for pos, _ in matches), dtype=np.int64, count=len(matches))
+            return positions, [name for _, name in matches]
+
+        pins = StringTable()
+        groups = StringTable()
+
+        startpoint = pins.encode([name for _, name in start_matches])
+
+        end_positions, end_names = named(ENDPOINT)
+        end_rows = _first_after(starts, ends, end_positions)
+        endpoint = pins.encode([end_names[row] if row >= 0 else b"" for row in end_rows])
+
+        group_positions, group_names = named(PATH_GROUP)
+        group_rows = _first_after(starts, ends, group_positions)
+        clock_group = groups.encode([group_names[row] if row >= 0 else b"" for row in group_rows])
+
+        arrival_positions = locate(ARRIVAL)
+        arrival_rows = _first_after(starts, ends, arrival_positions)
+        required_positions = locate(REQUIRED)
+        slack_positions = locate(SLACK)
+
+        # Pins between the startpoint and the first "data arrival time" line.
+        # bytes.count per path is far cheaper than a match object per pin line.
+        arrival_end = np.where(arrival_rows >= 0, arrival_positions[np.maximum(arrival_rows, 0)], starts)
+        depth = np.fromiter(
+            (sum(block.count(edge) for edge in EDGES)
+             for block in (data[start:end] for start, end in zip(starts.tolist(), arrival_end.tolist()))),
+            dtype=np.int32, count=len(starts)
+        )
+
+        return cls(
+            startpoint=startpoint,
+            endpoint=endpoint,
+            clock_group=clock_group,
+            slack=_leading_numbers(data, slack_positions, _first_after(starts, ends, slack_positions)),
+            arrival=_leading_numbers(data, arrival_positions, arrival_rows),
+            required=_leading_numbers(data, required_positions, _first_after(starts, ends, required_positions)),
+            depth=depth,
+            pins=pins,
+            groups=groups
+        )
+
+    @classmethod
+    def from_file(cls, path):
+        """Build the table from a report file without reading it into memory"""
+        with open(Path(path), 'rb') as f:
+            if f.seek(0, 2) == 0:
+                return cls.from_text(b"")
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                return cls.from_text(mapped)
+
+    def __len__(self):
+        return len(self.slack)
+
+    @property
+    def nbytes(self):
+        """Memory held by the columns (string tables excluded)"""
+        return sum(column.nbytes for column in (
+            self.startpoint, self.endpoint, self.clock_group, self.slack, self.arrival, self.required, self.depth
+        ))
+
+    def wns(self):
+        return float(np.nanmin(self.slack)) if len(self) else None
+
+    def tns(self):
+        return float(np.minimum(np.nan_to_num(self.slack), 0).sum(dtype=np.float64))
+
+    def violations(self):
+        return int((self.slack < 0).sum())
+
+    def worst_endpoints(self, k=10):
+        """
+        The k endpoints with the worst slack over all their paths.
+
+        Returns:
+            list: (endpoint name, slack) tuples, worst first
+        """
+        if not len(self):
+            return []
+        slack = np.nan_to_num(self.slack, nan=np.inf)
+        worst = np.full(len(self.pins), np.inf, dtype=np.float32)
+        np.minimum.at(worst, self.endpoint, slack)
+
+        k = min(k, int(np.isfinite(worst).sum()))
+        if k == 0:
+            return []
+        top = np.argpartition(worst, k - 1)[:k]
+        top = top[np.argsort(worst[top])]
+        return [(self.pins[code], float(worst[code])) for code in top]
+
+    def slack_histogram(self, bins=20, value_range=None):
+        """
+        Histogram of path slacks.
+
+        Returns:
+            tuple: (counts, bin edges) as from numpy.histogram
+        """
+        slack = self.slack[~np.isnan(self.slack)]
+        return np.histogram(slack, bins=bins, range=value_range)
+
+    def tns_by_group(self):
+        """Total negative slack of each clock group"""
+        negative = np.minimum(np.nan_to_num(self.slack), 0).astype(np.float64)
+        totals = np.bincount(self.clock_group, weights=negative, minlength=len(self.groups))
+        return {self.groups[code]: float(total) for code, total in enumerate(totals)}
+
+    def summary(self, k=5):
+        """Metrics in the MetricsParser format, plus the worst endpoints"""
+        if not len(self):
+            return {}
+        # Columns are float32; round so reports don't show representation noise
+        return {
+            'wns': round(self.wns(), 4),
+            'tns': round(self.tns(), 4),
+            'timing_violations': self.violations(),
+            'worst_endpoints': [(name, round(slack, 4)) for name, slack in self.worst_endpoints(k)],
+            'tns_by_group': {group: round(total, 4) for group, total in self.tns_by_group().items()}
+        }
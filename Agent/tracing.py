@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+tracing.py
+Tracing - Timed, nested spans around the agent's stages
+
+A span covers one stage (planning, generation, validation, ...) and nests
+under the span open on the same thread, or under an explicit parent when
+the work runs on another thread (plan steps run on scheduler threads).
+Finished spans are kept in a bounded buffer and handed to an optional sink
+such as MemoryStore.log_span. They export as Chrome trace-event JSON (open
+in chrome://tracing or https://ui.perfetto.dev) and as per-stage
+percentiles.
+
+A disabled tracer returns one shared no-op span, so instrumented code costs
+a method call per stage. No-op spans are falsy; attributes that are costly
+to compute (e.g. token counts) go behind `if span:`.
+"""
+import json
+import os
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+PERCENTILES = (50, 90, 99)
+
+
+class Span:
+    """One timed stage; use as a context manager"""
+
+    __slots__ = ('tracer', 'name', 'id', 'parent', 'attrs', 'thread', 'start', 'end')
+
+    def __init__(self, tracer, name, span_id, parent, attrs):
+        self.tracer = tracer
+        self.name = name
+        self.id = span_id
+        self.parent = parent
+        self.attrs = attrs
+        self.thread = threading.get_ident()
+        self.start = None
+        self.end = None
+
+    def set(self, **attrs):
+        """Add attributes, e.g. results only known at the end of the stage"""
+        self.attrs.update(attrs)
+
+    def __enter__(self):
+        self.tracer._push(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.end = time.perf_counter()
+        if exc_type is not None:
+            self.attrs['error'] = exc_type.__name__
+        self.tracer._finish(self)
+        return False
+
+    @property
+    def seconds(self):
+        return (self.end or time.perf_counter()) - self.start
+
+
+class _NoopSpan:
+    """What a disabled tracer hands out; does nothing and is falsy"""
+
+    __slots__ = ()
+
+    def set(self, **attrs):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def __bool__(self):
+        return False
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class Tracer:
+    """Creates spans and keeps the finished ones"""
+
+    def __init__(self, enabled=True, sink=None, keep=10000):
+        """
+        Args:
+            enabled: When False every span is NOOP_SPAN
+            sink: Optional callable receiving each finished span's record
+            keep: Most finished records kept in memory
+        """
+        self.enabled = enabled
+        self.sink = sink
+        self.records = deque(maxlen=keep)
+        self.origin = time.perf_counter()
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def span(self, name, parent=None, **attrs):
+        """
+        Open a span.
+
+        Args:
+            name: Stage name; percentiles are aggregated per name
+            parent: Span this one nests under (default: the span open on
+                    this thread)
+            **attrs: Attributes recorded with the span
+
+        Returns:
+            Span, or NOOP_SPAN when disabled
+        """
+        if not self.enabled:
+            return NOOP_SPAN
+        if parent is None:
+            parent = self.current()
+        with self._lock:
+            self._next_id += 1
+            span_id = self._next_id
+        return Span(self, name, span_id, parent.id if parent else None, attrs)
+
+    def current(self):
+        """Innermost open span of this thread, or None"""
+        stack = getattr(self._local, 'stack', None)
+        return stack[-1] if stack else None
+
+    def _push(self, span):
+        if not hasattr(self._local, 'stack'):
+            self._local.stack = []
+        self._local.stack.append(span)
+
+    def _finish(self, span):
+        stack = self._local.stack
+        if stack and stack[-1] is span:
+            stack.pop()
+        record = {
+            'name': span.name,
+            'id': span.id,
+            'parent': span.parent,
+            'thread': span.thread,
+            'start_us': round((span.start - self.origin) * 1e6, 1),
+            'duration_us': round((span.end - span.start) * 1e6, 1),
+            'attrs': span.attrs
+        }
+        self.records.append(record)
+        if self.sink is not None:
+            self.sink(record)
+
+    def chrome_trace(self):
+        return chrome_trace(self.records)
+
+    def write_chrome_trace(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.chrome_trace(), f)
+        return path
+
+    def percentiles(self, percentiles=PERCENTILES):
+        return aggregate(self.records, percentiles)
+
+
+def chrome_trace(records):
+    """
+    Chrome trace-event JSON of span records.
+
+    Every span is a complete ('X') event on its thread's track; span and
+    parent ids are kept in args so cross-thread nesting is not lost.
+
+    Returns:
+        dict: {'traceEvents': [...], 'displayTimeUnit': 'ms'}
+    """
+    pid = os.getpid()
+    threads = {}
+    events = []
+    for record in records:
+        tid = threads.setdefault(record['thread'], len(threads) + 1)
+        events.append({
+            'name': record['name'],
+            'cat': 'agent',
+            'ph': 'X',
+            'ts': record['start_us'],
+            'dur': record['duration_us'],
+            'pid': pid,
+            'tid': tid,
+            'args': dict(record['attrs'], span_id=record['id'], parent_id=record['parent'])
+        })
+    for thread, tid in threads.items():
+        name = 'main' if tid == 1 else f'worker {tid - 1}'
+        events.append({'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': name}})
+    return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+
+def aggregate(records, percentiles=PERCENTILES):
+    """
+    Duration percentiles per span name.
+
+    Returns:
+        dict: name -> {'count', 'total_ms', 'p50_ms', ..., 'max_ms'}, by total time
+    """
+    durations = {}
+    for record in records:
+        durations.setdefault(record['name'], []).append(record['duration_us'])
+
+    stats = {}
+    for name, values in durations.items():
+        values = np.asarray(values) / 1e3
+        stats[name] = {'count': len(values), 'total_ms': round(float(values.sum()), 3)}
+        for q, value in zip(percentiles, np.percentile(values, percentiles)):
+            stats[name][f'p{q}_ms'] = round(float(value), 3)
+        stats[name]['max_ms'] = round(float(values.max()), 3)
+    return dict(sorted(stats.items(), key=lambda item: -item[1]['total_ms']))
+
+
+def format_percentiles(stats):
+    """Fixed-width table of aggregate() output"""
+    columns = [key for key in next(iter(stats.values()), {}) if key.endswith('_ms')]
+    lines = [f"{'span':<18}{'count':>7}" + "".join(f"{c[:-3]:>11}" for c in columns) + "  (ms)"]
+    for name, row in stats.items():
+        lines.append(f"{name:<18}{row['count']:>7}" + "".join(f"{row[c]:>11.2f}" for c in columns))
+    return "\n".join(lines)
@@ -1,67 +1,198 @@
-import re
+import ast
+from difflib import get_close_matches
+
+from api_index import load_index
+
+class _CallChecker(ast.NodeVisitor):
+    # Walks a script in source order, following the OpenROAD type of each variable
+
+    def __init__(self,index):
+        self.index=index
+        self.types=dict(index.conventions)
+        self.modules={}
+        self.imported={}
+        self.has_import=False
+        self.diagnostics=[]
+
+    def report(self,node,severity,message,suggestion=None):
+        self.diagnostics.append({
+            'line':getattr(node,'lineno',1),
+            'col':getattr(node,'col_offset',0),
+            'severity':severity,
+            'message':message,
+            'suggestion':suggestion
+        })
+
+    def visit_Import(self,node):
+        for alias in node.names:
+            if alias.name in self.index.modules:
+                self.has_import=True
+                self.modules[alias.asname or alias.name]=alias.name
+
+    def visit_ImportFrom(self,node):
+        if node.module not in self.index.modules:
+            return
+        self.has_import=True
+        names=self.index.modules[node.module]
+        for alias in node.names:
+            if alias.name!='*' and alias.name not in names:
+                match=get_close_matches(alias.name,names,1)
+                self.report(node,'error',f"'{alias.name}' is not in module {node.module}",
+                            f"Did you mean {match[0]}?" if match else None)
+            self.imported[alias.asname or alias.name]=(node.module,alias.name)
+
+    def visit_Assign(self,node):
+        self.visit(node.value)
+        value_type=self.type_of(node.value)
+        for target in node.targets:
+            if isinstance(target,ast.Name):
+                if value_type:
+                    self.types[target.id]=value_type
+                else:
+                    self.types.pop(target.id,None)
+            else:
+                self.visit(target)
+
+    def visit_For(self,node):
+        self.visit(node.iter)
+        iter_type=self.type_of(node.iter)
+        if isinstance(node.target,ast.Name):
+            if iter_type and iter_type.startswith('list['):
+                self.types[node.target.id]=iter_type[5:-1]
+            else:
+                self.types.pop(node.target.id,None)
+        for child in node.body+node.orelse:
+            self.visit(child)
+
+    def _module_entry(self,node):
+        # (module, name, entry) for module.name or a name imported from a module
+        if isinstance(node,ast.Attribute) and isinstance(node.value,ast.Name) and node.value.id in self.modules:
+            module=self.modules[node.value.id]
+            return module,node.attr,self.index.modules[module].get(node.attr)
+        if isinstance(node,ast.Name) and node.id in self.imported:
+            module,name=self.imported[node.id]
+            return module,name,self.index.modules[module].get(name)
+        return None
+
+    def type_of(self,node):
+        """OpenROAD class of an expression's value ('list[X]' for lists), or None"""
+        found=self._module_entry(node)
+        if found:
+            return found[1] if found[2]=='class' else None
+        if isinstance(node,ast.Name):
+            return self.types.get(node.id)
+        if isinstance(node,ast.Call):
+            found=self._module_entry(node.func)
+            if found:
+                module,name,entry=found
+                return name if entry=='class' else (entry or {}).get('returns')
+            if isinstance(node.func,ast.Attribute):
+                method=self.index.method(self.type_of(node.func.value),node.func.attr)
+                return method.get('returns') if method else None
+        return None
+
+    def check_arity(self,node,name,bounds):
+        if bounds is None or any(isinstance(a,ast.Starred) for a in node.args) \
+                or any(k.arg is None for k in node.keywords):
+            return
+        low,high=bounds
+        count=len(node.args)+len(node.keywords)
+        if count<low or (high is not None and count>high):
+            expected=str(low) if low==high else f"{low}+" if high is None else f"{low}-{high}"
+            self.report(node,'error',f"{name}() takes {expected} argument(s), got {count}")
+
+    def visit_Call(self,node):
+        func=node.func
+        attr=func.attr if isinstance(func,ast.Attribute) else func.id if isinstance(func,ast.Name) else None
+
+        found=self._module_entry(func)
+        receiver=self.type_of(func.value) if isinstance(func,ast.Attribute) and not found else None
+        # Only on OpenROAD values and modules: re.compile() or a bare compile() are plain Python
+        if attr in self.index.invalid and ((found and not found[2]) or receiver):
+            self.report(node,'error',f"Invalid API call: {ast.unparse(func)}()",self.index.invalid[attr])
+        elif found:
+            module,name,entry=found
+            if entry is None:
+                match=get_close_matches(name,self.index.modules[module],1)
+                self.report(node,'error',f"{module} has no '{name}'",f"Did you mean {module}.{match[0]}?" if match else None)
+            elif entry=='class':
+                self.check_arity(node,name,self.index.constructor(name))
+            else:
+                self.check_arity(node,f"{module}.{name}",entry.get('args'))
+        elif isinstance(func,ast.Attribute):
+            if receiver and not receiver.startswith('list['):
+                method=self.index.method(receiver,func.attr)
+                if method is None:
+                    match=get_close_matches(func.attr,self.index.methods(receiver),1)
+                    self.report(node,'error',f"{receiver} has no method '{func.attr}'",
+                                f"Did you mean {match[0]}()?" if match else None)
+                else:
+                    self.check_arity(node,f"{receiver}.{func.attr}",method.get('args'))
+                    if func.attr=='evalTclString':
+                        self.check_tcl(node)
+        self.generic_visit(node)
+
+    def check_tcl(self,node):
+        if not node.args or not isinstance(node.args[0],ast.Constant) or not isinstance(node.args[0].value,str):
+            return
+        for command in node.args[0].value.replace(';','\n').splitlines():
+            words=command.split()
+            # A line opening with '}' closes an if/foreach/proc body
+            if words and not words[0].startswith(('#','}')) and words[0] not in self.index.tcl_commands:
+                match=get_close_matches(words[0],self.index.tcl_commands,1)
+                self.report(node,'warning',f"Unknown Tcl command '{words[0]}'",f"Did you mean {match[0]}?" if match else None)
 
 class CodeValidator:
 
-    def __init__(self):
-        self.valid_imports=[
-            'from openroad import',
-            'import openroad',
-            'import odb' 
-        ]
-
-        self.valid_methods=[
-            'readVerilog',
-            'readDef',
-            'readLef',
-            'readLib',
-            'link',
-            'initialize_floorplan',
-            'global_placement',
-            'detailed_placement',
-            'clock_tree_synthesis',
-            'global_route',
-            'detailed_route'
-        ]
-
-        self.invalid_patterns=[
-            'parseVerilogFile',
-            'ord.Flow()',
-            'runRTL2PDN',
-            'design.compile()',
-        ]
-    
-    def validate(self,code):
-        errors=[]
-        warnings=[]
+    def __init__(self,index_path=None):
+        # Loaded once per process and shared by every validator
+        self.index=load_index(index_path)
 
-        has_import=any(imp in code for imp in self.valid_imports)
-        if not has_import:
-            errors.append("Missing OpenROAD imports")
-        
+    def diagnose(self,code):
+        """
+        Check a script against the OpenROAD API index.
+
+        The script is parsed once; every call on a value of known OpenROAD
+        type (from constructors, return types, loops over returned lists
+        and conventional names such as design/tech/block) is checked for an
+        existing method and its arity.
+
+        Returns:
+            list: dicts with line, col, severity ('error'/'warning'), message and suggestion
+        """
         try:
-            compile(code,'<string>','exec')
+            tree=ast.parse(code)
         except SyntaxError as e:
-            errors.append(f"Syntax error:{e}")
-        
-        for invalid in self.invalid_patterns:
-            if invalid in code:
-                errors.append(f"Invalid API call: {invalid}")
+            return [{'line':e.lineno or 1,'col':(e.offset or 1)-1,'severity':'error',
+                     'message':f"Syntax error: {e.msg}",'suggestion':None}]
 
+        checker=_CallChecker(self.index)
+        checker.visit(tree)
+        diagnostics=checker.diagnostics
+        if not checker.has_import:
+            diagnostics.append({'line':1,'col':0,'severity':'error','message':"Missing OpenROAD imports",
+                                'suggestion':"Add: from openroad import Tech, Design"})
         if len(code)<20:
-            warnings.append("Code seems to be short")
+            diagnostics.append({'line':1,'col':0,'severity':'warning','message':"Code seems to be short",'suggestion':None})
         if len(code)>2000:
-            warnings.append("Code seems very long")
+            diagnostics.append({'line':1,'col':0,'severity':'warning','message':"Code seems very long",'suggestion':None})
+        return sorted(diagnostics,key=lambda d:(d['line'],d['col']))
+
+    def validate(self,code):
+        diagnostics=self.diagnose(code)
+        errors=[f"line {d['line']}: {d['message']}" for d in diagnostics if d['severity']=='error']
+        warnings=[f"line {d['line']}: {d['message']}" for d in diagnostics if d['severity']=='warning']
+        return len(errors)==0,errors,warnings
 
     def get_suggestions(self,errors):
 
         suggestions=[]
         for error in errors:
             if 'parseVerilogFile' in error:
-                suggestions.append("Use design.readVerilog() instead") 
+                suggestions.append("Use design.readVerilog() instead")
             elif 'Flow()' in error:
                 suggestions.append("Use individual OpenROAD commands")
             elif  'Missing OpenROAD imports' in error:
-                suggestions.append("Add: from openroad import Tech, Design")  
+                suggestions.append("Add: from openroad import Tech, Design")
 
         return suggestions
-   
\ No newline at end of file
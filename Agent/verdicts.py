@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+verdicts.py
+Verdict Table - Batch sign-off of runs across corners and modes
+
+Metrics of many runs x corners x modes are held as one (rows, metrics)
+array. Limits are built per row from the base constraints and any
+per-corner overrides. From these the table computes normalized margins,
+pass/fail flags, weighted scores, the worst-case corner of each run, and
+Pareto fronts over the runs, all with array operations. Nothing is printed;
+format_verdicts renders a table when one is wanted.
+"""
+import numpy as np
+
+# metric, constraint key, True when larger is better
+RULES = (
+    ('wns', 'wns_min', True),
+    ('max_congestion', 'max_congestion', False),
+    ('drc_violations', 'drc_violations', False),
+)
+LARGER_IS_BETTER = {metric: larger for metric, _, larger in RULES}
+
+KEY_DEFAULTS = {'corner': 'default', 'mode': 'default'}
+
+# Margins are capped here for scoring, so lots of headroom on one metric
+# cannot hide a violation on another
+SCORE_CAP = 1.0
+
+
+def _columns(table):
+    """Dict of columns from a list of row dicts or a dict of columns"""
+    if isinstance(table, dict):
+        return table
+    rows = list(table)
+    names = {name for row in rows for name in row}
+    return {name: [row.get(name) for row in rows] for name in names}
+
+
+def _encode(values):
+    """(names in first-appearance order, int codes) of a key column"""
+    names, first, codes = np.unique(np.array([str(value) for value in values]),
+                                    return_index=True, return_inverse=True)
+    order = np.argsort(first)
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+    return [str(names[i]) for i in order], rank[codes.ravel()]
+
+
+def _floats(values):
+    if isinstance(values, np.ndarray):
+        return values.astype(np.float64)
+    return np.array([np.nan if value is None else value for value in values], dtype=np.float64)
+
+
+def pareto_fronts(objectives):
+    """
+    Non-dominated sorting.
+
+    Args:
+        objectives: (items, objectives) array, larger is better
+
+    Returns:
+        ndarray: Front of every item, 0 for the non-dominated ones
+    """
+    count = len(objectives)
+    fronts = np.full(count, -1, dtype=np.int32)
+    if count == 0:
+        return fronts
+    at_least = (objectives[:, None, :] >= objectives[None, :, :]).all(axis=2)
+    better = (objectives[:, None, :] > objectives[None, :, :]).any(axis=2)
+    dominates = at_least & better  # dominates[i, j]: i dominates j
+
+    front = 0
+    remaining = np.ones(count, dtype=bool)
+    while remaining.any():
+        current = remaining & ~dominates[remaining].any(axis=0)
+        fronts[current] = front
+        remaining &= ~current
+        front += 1
+    return fronts
+
+
+class VerdictTable:
+    """Verdicts for every (run, corner, mode) row"""
+
+    def __init__(self, runs, corners, modes, run, corner, mode, metrics, values, limits, weights):
+        """
+        Args:
+            runs, corners, modes: Key names
+            run, corner, mode: int codes of each row into those names
+            metrics: Metric names, in column order
+            values: (rows, metrics) float array, NaN where not reported
+            limits: (rows, metrics) constraint of each value
+            weights: Score weight of each metric
+        """
+        self.runs = runs
+        self.corners = corners
+        self.modes = modes
+        self.run = run
+        self.corner = corner
+        self.mode = mode
+        self.metrics = metrics
+        self.values = values
+        self.limits = limits
+        self.weights = weights
+
+        larger_better = np.array([LARGER_IS_BETTER[name] for name in metrics], dtype=bool)
+        scale = np.maximum(np.abs(limits), 1.0)
+        # Positive margin is headroom, negative is violation; NaN when not reported
+        self.margin = np.where(larger_better, values - limits, limits - values) / scale
+        # A metric that was not reported does not fail the row
+        self.passed = ~(self.margin < 0)
+        self.row_passed = self.passed.all(axis=1)
+        self.score = (np.minimum(np.nan_to_num(self.margin), SCORE_CAP) * weights).sum(axis=1)
+        self._by_run = None
+
+    @classmethod
+    def evaluate(cls, table, constraints, corner_constraints=None, weights=None):
+        """
+        Build verdicts from a metrics table.
+
+        Args:
+            table: List of row dicts, or dict of equal-length columns
+            constraints: Base thresholds (DecisionEngine.constraints)
+            corner_constraints: corner -> threshold overrides
+            weights: metric -> score weight (default 1)
+
+        Returns:
+            VerdictTable
+        """
+        columns = _columns(table)
+        size = len(next(iter(columns.values()))) if columns else 0
+
+        keys = {}
+        for key in ('run', 'corner', 'mode'):
+            values = columns.get(key)
+            if values is None:
+                values = range(size) if key == 'run' else [KEY_DEFAULTS[key]] * size
+            keys[key] = _encode(values)
+
+        rules = [(metric, limit) for metric, limit, _ in RULES if metric in columns and limit in constraints]
+        metrics = [metric for metric, _ in rules]
+        values = np.column_stack([_floats(columns[metric]) for metric in metrics]) if metrics \
+            else np.empty((size, 0))
+
+        limits = np.tile(np.array([constraints[limit] for _, limit in rules], dtype=np.float64), (size, 1))
+        corners, corner = keys['corner']
+        for name, overrides in (corner_constraints or {}).items():
+            if name not in corners:
+                continue
+            rows = corner == corners.index(name)
+            for j, (_, limit) in enumerate(rules):
+                if limit in overrides:
+                    limits[rows, j] = overrides[limit]
+
+        weights = weights or {}
+        return cls(
+            runs=keys['run'][0], corners=corners, modes=keys['mode'][0],
+            run=keys['run'][1], corner=corner, mode=keys['mode'][1],
+            metrics=metrics, values=values, limits=limits,
+            weights=np.array([weights.get(metric, 1.0) for metric in metrics], dtype=np.float64)
+        )
+
+    def __len__(self):
+        return len(self.run)
+
+    def rows(self):
+        """
+        One verdict per row.
+
+        Returns:
+            list: dicts with the row keys, metric values, pass flag,
+                  score and the metrics that failed
+        """
+        return [{
+            'run': self.runs[self.run[i]],
+            'corner': self.corners[self.corner[i]],
+            'mode': self.modes[self.mode[i]],
+            'metrics': {name: float(value) for name, value in zip(self.metrics, self.values[i])
+                        if not np.isnan(value)},
+            'passed': bool(self.row_passed[i]),
+            'score': round(float(self.score[i]), 4),
+            'failed': [name for name, ok in zip(self.metrics, self.passed[i]) if not ok]
+        } for i in range(len(self))]
+
+    def by_run(self):
+        """
+        Sign-off of every run over all its corners and modes.
+
+        A run passes only if every one of its rows passes. Its margins are
+        the worst over its rows, and its score and Pareto front are
+        computed from those worst-case margins.
+
+        Returns:
+            list: dicts with run, passed, score, worst margins, the
+                  worst-scoring corner/mode and pareto_front
+        """
+        if self._by_run is not None:
+            return self._by_run
+
+        count = len(self.runs)
+        worst = np.full((count, len(self.metrics)), np.inf)
+        np.minimum.at(worst, self.run, np.nan_to_num(self.margin, nan=np.inf))
+        worst[np.isinf(worst)] = np.nan
+
+        passed = np.ones(count, dtype=bool)
+        np.logical_and.at(passed, self.run, self.row_passed)
+        score = (np.minimum(np.nan_to_num(worst), SCORE_CAP) * self.weights).sum(axis=1)
+        fronts = pareto_fronts(np.nan_to_num(worst))
+
+        # First row of each run once sorted by score: its worst corner/mode
+        order = np.lexsort((self.score, self.run))
+        first = order[np.r_[True, self.run[order][1:] != self.run[order][:-1]]] if len(order) else order
+        worst_row = np.empty(count, dtype=np.int64)
+        worst_row[self.run[first]] = first
+
+        self._by_run = [{
+            'run': name,
+            'passed': bool(passed[r]),
+            'score': round(float(score[r]), 4),
+            'worst_margin': {metric: round(float(margin), 4)
+                             for metric, margin in zip(self.metrics, worst[r]) if not np.isnan(margin)},
+            'worst_corner': self.corners[self.corner[worst_row[r]]],
+            'worst_mode': self.modes[self.mode[worst_row[r]]],
+            'pareto_front': int(fronts[r])
+        } for r, name in enumerate(self.runs)]
+        return self._by_run
+
+    def ranked(self):
+        """Runs that pass everywhere first, then by Pareto front and score"""
+        ranked = sorted(self.by_run(), key=lambda run: (not run['passed'], run['pareto_front'], -run['score']))
+        for rank, run in enumerate(ranked, 1):
+            run['rank'] = rank
+        return ranked
+
+
+def format_verdicts(table, top=None):
+    """Ranked runs of a VerdictTable as a fixed-width text table"""
+    ranked = table.ranked()[:top]
+    headers = ['rank', 'run', 'passed', 'front', 'score'] + [f"{name} margin" for name in table.metrics] \
+        + ['worst corner']
+    rows = [[str(run['rank']), run['run'], 'yes' if run['passed'] else 'no', str(run['pareto_front']),
+             f"{run['score']:.3f}"]
+            + [f"{run['worst_margin'][name]:.3f}" if name in run['worst_margin'] else '-' for name in table.metrics]
+            + [f"{run['worst_corner']}/{run['worst_mode']}"]
+            for run in ranked]
+
+    widths = [max(len(header), *(len(row[i]) for row in rows)) if rows else len(header)
+              for i, header in enumerate(headers)]
+    lines = ["  ".join(header.ljust(width) for header, width in zip(headers, widths))]
+    lines.append("  ".join("-" * width for width in widths))
+    lines += ["  ".join(cell.ljust(width) for cell, width in zip(row, widths)) for row in rows]
+    return "\n".join(lines)
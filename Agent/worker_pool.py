@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+worker_pool.py
+Worker Pool - Long-lived Python workers that keep OpenROAD warm between steps
+
+Each worker imports the OpenROAD modules once and runs every script it
+receives in one persistent namespace, so a design loaded by an earlier step
+is still there for the next one. Scripts arrive over a pipe; their stdout and
+stderr are captured at the file-descriptor level so output from OpenROAD's
+C++ side is collected too. A worker is killed and replaced when a script
+times out or crashes it, and recycled after max_jobs scripts.
+"""
+import ctypes
+import multiprocessing
+import os
+import queue
+import tempfile
+import threading
+import time
+import traceback
+
+DEFAULT_PRELOAD = ("openroad", "odb")
+
+
+def _flush_c_stdio():
+    try:
+        ctypes.CDLL(None).fflush(None)
+    except (OSError, AttributeError):
+        pass
+
+
+def _run_captured(code, namespace, working_dir):
+    """Run code in namespace with fds 1 and 2 redirected to temp files"""
+    import sys
+
+    with tempfile.TemporaryFile(mode='w+b', dir=working_dir) as out, \
+            tempfile.TemporaryFile(mode='w+b', dir=working_dir) as err:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        saved = os.dup(1), os.dup(2)
+        os.dup2(out.fileno(), 1)
+        os.dup2(err.fileno(), 2)
+
+        exitcode = 0
+        try:
+            exec(compile(code, "<step>", "exec"), namespace)
+        except SystemExit as e:
+            if e.code is None:
+                exitcode = 0
+            elif isinstance(e.code, int):
+                exitcode = e.code
+            else:
+                print(e.code, file=sys.stderr)
+                exitcode = 1
+        except BaseException:
+            traceback.print_exc()
+            exitcode = 1
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            _flush_c_stdio()
+            os.dup2(saved[0], 1)
+            os.dup2(saved[1], 2)
+            os.close(saved[0])
+            os.close(saved[1])
+
+        out.seek(0)
+        err.seek(0)
+        return {
+            'success': exitcode == 0,
+            'stdout': out.read().decode(errors='replace'),
+            'stderr': err.read().decode(errors='replace'),
+            'exitcode': exitcode
+        }
+
+
+def _worker_main(conn, working_dir, preload):
+    """Worker process: import preload modules once, then run scripts until told to stop"""
+    os.chdir(working_dir)
+
+    import_errors = {}
+    for name in preload:
+        try:
+            __import__(name)
+        except ImportError as e:
+            import_errors[name] = str(e)
+    conn.send({'ready': True, 'import_errors': import_errors})
+
+    namespace = {'__name__': '__main__'}
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            return
+        if message.get('op') == 'stop':
+            return
+        if message.get('op') == 'reset':
+            namespace = {'__name__': '__main__'}
+            conn.send({'reset': True})
+            continue
+
+        start = time.perf_counter()
+        result = _run_captured(message['code'], namespace, working_dir)
+        result['seconds'] = time.perf_counter() - start
+        conn.send(result)
+
+
+class _Worker:
+    """Parent-side handle of one worker process"""
+
+    def __init__(self, context, working_dir, preload):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=_worker_main,
+            args=(child_conn, str(working_dir), tuple(preload)),
+            daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+        self.jobs = 0
+
+        ready = self.conn.recv()
+        self.import_errors = ready['import_errors']
+
+    def alive(self):
+        return self.process.is_alive()
+
+    def kill(self):
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join(2)
+            if self.process.is_alive():
+                self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+    def stop(self):
+        try:
+            self.conn.send({'op': 'stop'})
+            self.process.join(2)
+        except (OSError, BrokenPipeError):
+            pass
+        self.kill()
+
+
+class WorkerPool:
+    """Fixed-size pool of warm script workers"""
+
+    def __init__(self, working_dir=".", size=1, max_jobs=50, preload=DEFAULT_PRELOAD):
+        """
+        Args:
+            working_dir: Directory the workers run scripts in
+            size: Number of worker processes
+            max_jobs: Scripts a worker runs before it is replaced (None: never)
+            preload: Modules every worker imports at startup
+        """
+        self.working_dir = working_dir
+        self.size = size
+        self.max_jobs = max_jobs
+        self.preload = preload
+        # spawn: a forked worker would inherit the parent's threads and model state
+        self._context = multiprocessing.get_context("spawn")
+
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._started = 0
+        self._closed = False
+
+        self.jobs = 0
+        self.worker_starts = 0
+        self.startup_seconds = 0.0
+        self.timeouts = 0
+        self.crashes = 0
+        self.recycled = 0
+        self.import_errors = {}
+
+    def _spawn(self):
+        start = time.perf_counter()
+        worker = _Worker(self._context, self.working_dir, self.preload)
+        self.startup_seconds += time.perf_counter() - start
+        self.worker_starts += 1
+        self.import_errors = worker.import_errors
+        return worker
+
+    def _acquire(self):
+        """(worker, seconds spent waiting for another script to free one)"""
+        waited = 0.0
+        while True:
+            with self._lock:
+                if self._closed:
+                    raise RuntimeError("Worker pool is closed")
+                spawn = self._idle.empty() and self._started < self.size
+                if spawn:
+                    self._started += 1
+            if spawn:
+                try:
+                    return self._spawn(), waited
+                except Exception:
+                    self._discard()
+                    raise
+            start = time.perf_counter()
+            try:
+                # Short waits so a slot freed by a killed worker is noticed
+                return self._idle.get(timeout=0.05), waited + time.perf_counter() - start
+            except queue.Empty:
+                waited += time.perf_counter() - start
+                continue
+
+    def _release(self, worker):
+        if self._closed or (self.max_jobs and worker.jobs >= self.max_jobs):
+            worker.stop()
+            self.recycled += not self._closed
+            self._discard()
+        else:
+            self._idle.put(worker)
+
+    def _discard(self):
+        # Replacements are spawned lazily by the next _acquire
+        with self._lock:
+            self._started -= 1
+
+    def run(self, code, timeout=30):
+        """
+        Run a script on a warm worker.
+
+        Args:
+            code: Python source
+            timeout: Seconds before the worker is killed
+
+        Returns:
+            dict: success, stdout, stderr, exitcode (or error), seconds and
+                  wait_seconds (time queued for a busy worker)
+        """
+        worker, waited = self._acquire()
+        try:
+            worker.conn.send({'op': 'run', 'code': code})
+            if not worker.conn.poll(timeout):
+                worker.kill()
+                self.timeouts += 1
+                self._discard()
+                return {'success': False, 'error': f'Execution timeout after {timeout}s', 'wait_seconds': waited}
+            result = worker.conn.recv()
+        except (EOFError, OSError) as e:
+            worker.kill()
+            exitcode = worker.process.exitcode
+            self.crashes += 1
+            self._discard()
+            return {
+                'success': False,
+                'error': f'Worker crashed (exit code {exitcode}): {str(e) or "connection closed"}',
+                'exitcode': exitcode,
+                'wait_seconds': waited
+            }
+
+        worker.jobs += 1
+        self.jobs += 1
+        self._release(worker)
+        result['wait_seconds'] = waited
+        return result
+
+    def reset(self):
+        """Clear the persistent namespace of every idle worker"""
+        workers = []
+        while not self._idle.empty():
+            workers.append(self._idle.get())
+        for worker in workers:
+            worker.conn.send({'op': 'reset'})
+            worker.conn.recv()
+            self._idle.put(worker)
+
+    def close(self):
+        """Stop all idle workers; busy ones are stopped when they finish"""
+        with self._lock:
+            self._closed = True
+        while not self._idle.empty():
+            self._idle.get().stop()
+            self._discard()
+
+    def stats(self):
+        return {
+            'size': self.size,
+            'jobs': self.jobs,
+            'worker_starts': self.worker_starts,
+            'startup_seconds': round(self.startup_seconds, 3),
+            'timeouts': self.timeouts,
+            'crashes': self.crashes,
+            'recycled': self.recycled,
+            'import_errors': self.import_errors
+        }